@@ -155,16 +155,14 @@ def save_current_state() -> bool:
         st.error("Não foi possível salvar: Número de processo ausente.")
         return False
 
-    raw = dict(st.session_state)
-
     keys_to_exclude_prefixes = ('input_', 'doc_', 'anexo_', 'quesito_', 'editing_', 'form_')
-    keys_to_exclude = {'process_to_load', 'CAMINHO_MODELO'}
+    keys_to_exclude = {'process_to_load', 'CAMINHO_MODELO', 'indices_por_id'}
 
-    for k in list(raw.keys()):
-        if any(k.startswith(pref) for pref in keys_to_exclude_prefixes):
-            keys_to_exclude.add(k)
-    for k in keys_to_exclude:
-        raw.pop(k, None)
+    # Filtra as chaves antes de copiar: widgets e estado temporário nunca entram na cópia
+    raw = {
+        k: st.session_state[k] for k in st.session_state.keys()
+        if k not in keys_to_exclude and not k.startswith(keys_to_exclude_prefixes)
+    }
 
     from datetime import date, datetime
     def make_serializable(obj):
@@ -262,22 +260,58 @@ def load_process(process_id: str):
 # Auxiliares de lista / render pequenos formulários (modulares)
 # --------------------------------------------------------------------------------
 
+# Listas da sessão indexadas por id (lista -> campo da chave). O índice fica em
+# st.session_state['indices_por_id'] (fora do JSON salvo) e é refeito quando a
+# lista é trocada ou muda de tamanho por fora de add_item/remove_item.
+INDICES_POR_ID = {
+    "questionados_list": "id",
+    "padroes_pce_list": "id",
+    "analises_eog_list": "questionado_id",
+    "adendos": "id_referencia",
+}
+
+def indice_por_id(list_key: str, session_state=None) -> Dict[str, Dict[str, Any]]:
+    """{id: item} da lista 'list_key' da sessão; em ids repetidos vale o primeiro, como na busca linear."""
+    session_state = st.session_state if session_state is None else session_state
+    lista = session_state.get(list_key, [])
+    indices = session_state.setdefault('indices_por_id', {})
+    cache = indices.get(list_key)
+    if cache is None or cache[0] is not lista or cache[1] != len(lista):
+        campo = INDICES_POR_ID[list_key]
+        indice = {}
+        for item in lista:
+            indice.setdefault(item.get(campo), item)
+        cache = (lista, len(lista), indice)
+        indices[list_key] = cache
+    return cache[2]
+
+def _indexar(list_key: str, item: Dict[str, Any], session_state=None):
+    """Registra no índice um item recém-anexado à lista (mantém o índice sem refazê-lo)."""
+    session_state = st.session_state if session_state is None else session_state
+    cache = session_state.get('indices_por_id', {}).get(list_key)
+    lista = session_state.get(list_key)
+    if cache is not None and cache[0] is lista and cache[1] == len(lista) - 1:
+        cache[2].setdefault(item.get(INDICES_POR_ID[list_key]), item)
+        session_state['indices_por_id'][list_key] = (lista, len(lista), cache[2])
+
 def add_item(list_key: str, default_data: Dict[str, Any]):
     if list_key not in st.session_state:
         st.session_state[list_key] = []
     new_item = {"id": str(uuid.uuid4()), **default_data}
     st.session_state[list_key].append(new_item)
+    if list_key in INDICES_POR_ID:
+        _indexar(list_key, new_item)
 
 def remove_item(list_key: str, item_id: str):
     if list_key in st.session_state:
         st.session_state[list_key] = [item for item in st.session_state[list_key] if item.get('id') != item_id]
+        st.session_state.get('indices_por_id', {}).pop(list_key, None)
         st.rerun()
 
 def get_analysis_for_questionado(questionado_id: str, session_state: Dict[str, Any]) -> Dict[str, Any]:
-    analises_list = session_state.get('analises_eog_list', [])
-    for analysis in analises_list:
-        if analysis.get('questionado_id') == questionado_id:
-            return analysis
+    analysis = indice_por_id('analises_eog_list', session_state).get(questionado_id)
+    if analysis is not None:
+        return analysis
 
     new_analysis = {
         "id": str(uuid.uuid4()),
@@ -291,6 +325,7 @@ def get_analysis_for_questionado(questionado_id: str, session_state: Dict[str, A
         "tem_imagem_analise": False
     }
     session_state.analises_eog_list.append(new_analysis)
+    _indexar('analises_eog_list', new_analysis, session_state)
     return new_analysis
 
 # --------------------------------------------------------------------------------
@@ -344,12 +379,13 @@ def render_radar_chart(eog_data: Dict[str, str]):
 # Funções auxiliares para geração de blocos do laudo e processamento de adendos / quesitos
 # --------------------------------------------------------------------------------
 
-def get_questionado_item(questionado_id: str, questionados_list: List[Dict[str, Any]]) -> Dict[str, Any]:
-    return next((item for item in questionados_list if item['id'] == questionado_id), {})
+def get_questionado_item(questionado_id: str, questionados_por_id: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Item do questionado no índice de indice_por_id('questionados_list') ({} se não existir)."""
+    return questionados_por_id.get(questionado_id, {})
 
 def get_final_conclusion_text(session_state: Dict[str, Any]) -> str:
     analises = session_state.get('analises_eog_list', [])
-    questionados = session_state.get('questionados_list', [])
+    questionados = indice_por_id('questionados_list', session_state)
     if not analises:
         return ""
     conclusoes_text = []
@@ -376,24 +412,31 @@ def gather_all_references(session_state: Dict[str, Any]) -> List[str]:
         if tipo == "Outros":
             tipo = item.get('TIPO_DOCUMENTO_CUSTOM', 'Outros')
         references.append(f"Doc. Padrão {idx+1}: {tipo} (Fls. {item.get('NUMEROS', 'S/N')})")
+    questionados = indice_por_id('questionados_list', session_state)
     for idx, item in enumerate(session_state.get('analises_eog_list', [])):
-        q_item = get_questionado_item(item['questionado_id'], session_state.get('questionados_list', []))
+        q_item = get_questionado_item(item['questionado_id'], questionados)
         if q_item:
             references.append(f"Análise Gráfica ({idx+1}): {q_item.get('TIPO_DOCUMENTO', 'N/A')} (Fls. {q_item.get('FLS_DOCUMENTOS', 'N/A')})")
     references.append("6. CONCLUSÃO (Bloco de texto final)")
     return references
 
 def process_quesitos_for_adendos(quesitos_list: List[Dict[str, Any]], party_name: str):
+    """
+    Gera os adendos das imagens dos quesitos. Os adendos substituídos ou removidos
+    são filtrados numa única passada ao final (a lista não é refeita por quesito).
+    """
     session_state = st.session_state
-    existing_adendo_ids = {a['id_adendo'] for a in session_state.adendos if a.get('origem') == f'quesito_{party_name.lower()}'}
+    adendos_por_referencia = indice_por_id('adendos', session_state)
     new_adendo_ids = set()
+    remover = set()
+    novos = []
     for idx, quesito in enumerate(quesitos_list):
         quesito_id = quesito['id']
         if quesito.get('imagem_bytes') is not None and quesito_id not in new_adendo_ids:
             adendo_id = str(uuid.uuid4())
             new_adendo_ids.add(quesito_id)
-            session_state.adendos = [a for a in session_state.adendos if a.get('id_referencia') != quesito_id]
-            session_state.adendos.append({
+            remover.add(quesito_id)
+            novos.append({
                 "id_adendo": adendo_id,
                 "origem": f"quesito_{party_name.lower()}",
                 "id_referencia": quesito_id,
@@ -404,7 +447,12 @@ def process_quesitos_for_adendos(quesitos_list: List[Dict[str, Any]], party_name
             quesito.pop('imagem_bytes', None)
             quesito['tem_imagem'] = True
         elif quesito.get('imagem_bytes') is None and not quesito.get('tem_imagem', False):
-            session_state.adendos = [a for a in session_state.adendos if a.get('id_referencia') != quesito_id]
+            if quesito_id in adendos_por_referencia:
+                remover.add(quesito_id)
+            if quesito_id in new_adendo_ids:  # id repetido na lista: descarta o adendo recém-gerado
+                novos = [a for a in novos if a['id_referencia'] != quesito_id]
+    if remover or novos:
+        session_state.adendos = [a for a in session_state.adendos if a.get('id_referencia') not in remover] + novos
 
 def get_quesito_id_text(party_name: str, index: int) -> str:
     return f"Quesito da Parte {party_name} nº {index + 1}"
@@ -692,7 +740,7 @@ def render_etapa_5(session_state: Dict[str, Any], save_callback: Callable[[], bo
         for idx, item in enumerate(questionados_list)
     }
 
-    existing_q_ids = {a['questionado_id'] for a in session_state.analises_eog_list}
+    existing_q_ids = indice_por_id('analises_eog_list', session_state)
     for q_id in questionados_options.keys():
         if q_id not in existing_q_ids:
             get_analysis_for_questionado(q_id, session_state)
@@ -880,7 +928,7 @@ def render_etapa_6(session_state: Dict[str, Any], save_callback: Callable[[], bo
         st.warning("⚠️ **Etapa 5 Incompleta:** Conclua a Análise Pericial (Etapa 5) para gerar a Conclusão.")
         return
     analises = session_state.get('analises_eog_list', [])
-    questionados = session_state.get('questionados_list', [])
+    questionados = indice_por_id('questionados_list', session_state)
     if not analises:
         st.info("Não há documentos questionados com análise para gerar conclusões.")
         return
@@ -0,0 +1,101 @@
+"""
+bench_importtime_gerar_laudo.py
+Perfil de importação (python -X importtime) da página pages/01_Gerar_laudo.py.
+
+Compara o que a página importa ao carregar (imports de nível de módulo,
+lidos do próprio arquivo) com as dependências adiadas para o primeiro uso
+(editor de imagem, gráfico matplotlib, geração do DOCX). Cada grupo roda
+num interpretador novo; módulos ausentes no ambiente são listados à parte.
+
+Uso:
+    python benchmarks/bench_importtime_gerar_laudo.py [modulos_exibidos]
+"""
+
+import ast
+import importlib.util
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGINA = os.path.join(BASE_DIR, "pages", "01_Gerar_laudo.py")
+sys.path.insert(0, BASE_DIR)
+
+# Importadas apenas dentro das funções que as usam
+SOB_DEMANDA = {
+    "editor de imagem": ["PIL.Image", "streamlit_cropper", "streamlit_drawable_canvas"],
+    "gráfico matplotlib": ["matplotlib.figure"],
+    "geração do DOCX": ["src.word_handler"],
+}
+
+
+def imports_de_carga(caminho: str) -> list:
+    """Módulos importados no nível do módulo (inclusive dentro de try/if), fora de funções."""
+    with open(caminho, "r", encoding="utf-8") as f:
+        arvore = ast.parse(f.read())
+
+    modulos = []
+    pendentes = list(arvore.body)
+    while pendentes:
+        no = pendentes.pop(0)
+        if isinstance(no, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        if isinstance(no, ast.Import):
+            modulos.extend(alias.name for alias in no.names)
+        elif isinstance(no, ast.ImportFrom) and no.module and not no.level:
+            modulos.append(no.module)
+        else:
+            pendentes.extend(ast.iter_child_nodes(no))
+
+    # Variantes sem 'src.' (fallback da página) só contam se o pacote src não existir
+    return [m for m in dict.fromkeys(modulos) if not (f"src.{m}" in modulos)]
+
+
+def disponivel(modulo: str) -> bool:
+    try:
+        return importlib.util.find_spec(modulo) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def perfil(modulos: list) -> list:
+    """Executa -X importtime e retorna [(ms acumulados, módulo)] dos imports de primeiro nível."""
+    codigo = "\n".join(f"import {m}" for m in modulos) or "pass"
+    resultado = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    linhas = []
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        _, acumulado, nome = linha[len("import time:"):].split("|", 2)
+        # Primeiro nível: sem indentação extra no nome
+        if acumulado.strip().isdigit() and not nome.startswith("   "):
+            linhas.append((int(acumulado) / 1000, nome.strip()))
+    return linhas
+
+
+def relatorio(titulo: str, modulos: list, exibidos: int, partida: set):
+    presentes = [m for m in modulos if disponivel(m)]
+    ausentes = [m for m in modulos if m not in presentes]
+    # Descarta o que o interpretador vazio já importa (site, encodings...)
+    linhas = [(ms, nome) for ms, nome in perfil(presentes) if nome not in partida]
+    total = sum(ms for ms, _ in linhas)
+
+    print(f"\n== {titulo}: {total:.1f} ms ==")
+    for ms, nome in sorted(linhas, reverse=True)[:exibidos]:
+        print(f"{ms:>10.1f} ms  {nome}")
+    if ausentes:
+        print(f"   (não instalados aqui: {', '.join(ausentes)})")
+
+
+def main(exibidos: int = 12):
+    partida = {nome for _, nome in perfil([])}
+    relatorio("carga da página", imports_de_carga(PAGINA), exibidos, partida)
+    for titulo, modulos in SOB_DEMANDA.items():
+        relatorio(f"sob demanda — {titulo}", modulos, exibidos, partida)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 12)
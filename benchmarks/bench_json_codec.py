@@ -0,0 +1,154 @@
+"""
+bench_json_codec.py
+Ida e volta (serializar + ler) de documentos de processo com cada codec JSON
+do data_handler (orjson, msgspec, json), comparado com o caminho antigo: cópia
+recursiva do estado (_make_serializable) seguida de json.dumps.
+
+Os documentos imitam o estado salvo pela página Gerar Laudo: questionados,
+padrões, análises com EOG, anexos já externalizados (bytes_ref), sets de etapas
+e datas — do processo pequeno ao de listas grandes de quesitos. Cada saída é
+também relida com json.loads, para confirmar que o formato em disco continua
+legível pelo carregador anterior.
+
+Uso:
+    python benchmarks/bench_json_codec.py [repeticoes]
+"""
+
+import datetime
+import importlib.util
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from src.data_handler import JSON_CODECS, decode_json, encode_json  # noqa: E402
+
+CENARIOS = {
+    "pequeno (10 quesitos)": (2, 3, 10),
+    "médio (100 quesitos)": (8, 10, 100),
+    "grande (1000 quesitos)": (20, 30, 1000),
+    "enorme (5000 quesitos)": (40, 60, 5000),
+}
+
+TEXTO = ("Assinatura questionada com traçado hesitante, pressão irregular e "
+         "retoques visíveis na zona de ataque; comparar com os padrões colhidos. ")
+
+
+def documento(questionados: int, padroes: int, quesitos: int) -> dict:
+    """Estado de processo em memória, como st.session_state o entrega (sets e datas incluídos)."""
+    hoje = datetime.date(2024, 5, 17)
+    return {
+        "AUTOR": "Maria José da Conceição",
+        "REU": "Banco Exemplo S.A.",
+        "DATA_LAUDO": hoje,
+        "atualizado_em": datetime.datetime(2024, 5, 17, 14, 30, 5),
+        "etapas_concluidas": set(range(1, 9)),
+        "questionados_list": [
+            {"id": f"q{i}", "TIPO_DOCUMENTO": "Contrato", "FLS_DOCUMENTOS": f"fls. {i * 3}",
+             "DESCRICAO_IMAGEM": TEXTO, "imagem_bytes_ref": f"{i:064x}", "imagem_obj": object()}
+            for i in range(questionados)
+        ],
+        "padroes_list": [
+            {"id": f"p{i}", "TIPO_DOCUMENTO": "Procuração", "DATA_DOCUMENTO": hoje, "NUMEROS": str(i)}
+            for i in range(padroes)
+        ],
+        "saved_analyses": {
+            f"q{i}": {
+                "descricao_analise": TEXTO * 3,
+                "eog": {"habilidade_velocidade": "ADEQUADO", "espontaneidade_dinamismo": "PENDENTE",
+                        "calibre": "DIVERGENTE", "alinhamento_grafico": "ADEQUADO",
+                        "comportamento_pauta": "PENDENTE"},
+                "conclusao": "Autêntica",
+            }
+            for i in range(questionados)
+        },
+        "LISTA_QS_AUTOR": [
+            {"id": f"a{i}", "fls": f"fls. {i}", "texto": f"{i}. {TEXTO}", "resposta": TEXTO * 2,
+             "referencias": [f"q{i % max(questionados, 1)}"], "imagem_bytes_ref": f"{i:064x}",
+             "imagem_bytes": None, "tem_imagem": True}
+            for i in range(quesitos // 2)
+        ],
+        "LISTA_QS_REU": [
+            {"id": f"r{i}", "fls": f"fls. {i}", "texto": f"{i}. {TEXTO}", "resposta": TEXTO,
+             "referencias": [], "tem_imagem": False}
+            for i in range(quesitos - quesitos // 2)
+        ],
+        "anexos": [{"nome": f"anexo{i}.pdf", "bytes_ref": f"{i:064x}"} for i in range(questionados)],
+    }
+
+
+def _make_serializable(obj):
+    """Cópia do pré-processamento que a página fazia antes de cada save."""
+    if isinstance(obj, set):
+        return list(obj)
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    if isinstance(obj, dict):
+        out = {}
+        for k, v in obj.items():
+            if k in ("imagem_obj", "imagem_bytes", "file_obj", "bytes"):
+                continue
+            out[k] = _make_serializable(v)
+        return out
+    if isinstance(obj, list):
+        return [_make_serializable(i) for i in obj]
+    return obj
+
+
+def sem_nulos(obj):
+    """Remove chaves com null (o codec grava null onde o caminho antigo omitia a chave)."""
+    if isinstance(obj, dict):
+        return {k: sem_nulos(v) for k, v in obj.items() if v is not None}
+    if isinstance(obj, list):
+        return [sem_nulos(i) for i in obj]
+    return obj
+
+
+def codec_anterior(doc: dict) -> bytes:
+    return json.dumps(_make_serializable(doc), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """Média (ms) de 'funcao()' após um aquecimento."""
+    funcao()
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main(repeticoes: int = 20):
+    disponiveis = [c for c in JSON_CODECS if c == "json" or importlib.util.find_spec(c) is not None]
+    ausentes = [c for c in JSON_CODECS if c not in disponiveis]
+
+    for titulo, tamanhos in CENARIOS.items():
+        doc = documento(*tamanhos)
+        referencia = json.loads(codec_anterior(doc))
+        print(f"\n== {titulo} ==")
+        print(f"{'codec':>16}{'grava ms':>10}{'lê ms':>9}{'total ms':>10}{'KB':>9}")
+
+        gravacao = medir(lambda: codec_anterior(doc), repeticoes)
+        conteudo = codec_anterior(doc)
+        leitura = medir(lambda: json.loads(conteudo), repeticoes)
+        print(f"{'anterior':>16}{gravacao:>10.2f}{leitura:>9.2f}{gravacao + leitura:>10.2f}{len(conteudo) / 1024:>9.1f}")
+
+        for codec in disponiveis:
+            gravacao = medir(lambda: encode_json(doc, codec=codec), repeticoes)
+            conteudo = encode_json(doc, codec=codec)
+            leitura = medir(lambda: decode_json(conteudo, codec=codec), repeticoes)
+
+            # O carregador anterior (json.loads) lê o arquivo; os campos salvos são os mesmos
+            lido = json.loads(conteudo)
+            assert decode_json(conteudo, codec=codec) == lido
+            assert sem_nulos(lido) == sem_nulos(referencia)
+            print(f"{codec:>16}{gravacao:>10.2f}{leitura:>9.2f}{gravacao + leitura:>10.2f}{len(conteudo) / 1024:>9.1f}")
+
+    if ausentes:
+        print(f"\n(não instalados aqui: {', '.join(ausentes)})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
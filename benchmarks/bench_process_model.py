@@ -0,0 +1,49 @@
+"""
+bench_process_model.py
+Memória e tempo de (de)serialização do modelo tipado (process_model) em
+comparação com o documento em dict, nos mesmos documentos realistas do
+bench_json_codec (de 10 a 5000 quesitos).
+
+- memória: deep_sizeof (session_handler) do documento carregado;
+- leitura: JSON -> dict (decode_json) vs JSON -> Processo (validado);
+- gravação: dict (encode_json) vs Processo (encode_processo).
+Os dois caminhos usam o mesmo codec do data_handler (o mais rápido instalado).
+
+Uso:
+    python benchmarks/bench_process_model.py [repeticoes]
+"""
+
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_json_codec import CENARIOS, documento, medir  # noqa: E402
+from src.data_handler import decode_json, encode_json, json_codec_name  # noqa: E402
+from src.process_model import decode_processo, encode_processo, processo_de_dict  # noqa: E402
+from src.session_handler import deep_sizeof  # noqa: E402
+
+
+def main(repeticoes: int = 20):
+    print(f"codec JSON: {json_codec_name()}")
+    for titulo, tamanhos in CENARIOS.items():
+        doc = documento(*tamanhos)
+        conteudo = encode_json(doc)
+        como_dict = decode_json(conteudo)
+        processo = processo_de_dict(como_dict)
+        assert decode_processo(encode_processo(processo)) == processo
+
+        print(f"\n== {titulo} ==")
+        print(f"{'':>10}{'memória KB':>12}{'lê ms':>9}{'grava ms':>10}")
+        print(f"{'dict':>10}{deep_sizeof(como_dict) / 1024:>12.1f}"
+              f"{medir(lambda: decode_json(conteudo), repeticoes):>9.2f}"
+              f"{medir(lambda: encode_json(como_dict), repeticoes):>10.2f}")
+        print(f"{'Processo':>10}{deep_sizeof(processo) / 1024:>12.1f}"
+              f"{medir(lambda: decode_processo(conteudo), repeticoes):>9.2f}"
+              f"{medir(lambda: encode_processo(processo), repeticoes):>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,70 @@
+"""
+bench_radar_eog.py
+Compara os dois desenhistas do radar EOG (chart_handler): "leve" (SVG em texto
+e PNG com Pillow) e "matplotlib" (Figure, sem pyplot).
+
+- partida: tempo de um interpretador novo importando o que cada backend usa
+  (mediana de vários processos, descontado o interpretador vazio);
+- desenho: tempo por gráfico, sem cache, em PNG e SVG.
+
+Uso:
+    python benchmarks/bench_radar_eog.py [repeticoes]
+"""
+
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from src import chart_handler  # noqa: E402
+
+IMPORTS_BACKEND = {
+    "leve": "from PIL import Image, ImageDraw, ImageFont",
+    "matplotlib": "from matplotlib.figure import Figure",
+}
+
+VALORES = (2, 1, 0, 2, 1)
+
+
+def tempo_partida(codigo: str, processos: int = 7) -> float:
+    """Mediana (ms) de 'python -c codigo' em processos novos."""
+    tempos = []
+    for _ in range(processos):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, "-c", codigo], check=True)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def tempo_desenho(backend: str, formato: str, repeticoes: int) -> float:
+    """Média (ms) de um desenho completo, sem passar pelo cache."""
+    renderizar = chart_handler._RENDERIZADORES[backend]
+    renderizar(VALORES, formato)  # aquecimento: importações e fontes
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        renderizar(VALORES, formato)
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main(repeticoes: int = 20):
+    vazio = tempo_partida("pass")
+    print(f"{'backend':>12}{'partida ms':>12}{'png ms':>10}{'svg ms':>10}{'png KB':>9}{'svg KB':>9}")
+    for backend in chart_handler.BACKENDS:
+        if backend == "matplotlib" and importlib.util.find_spec("matplotlib") is None:
+            print(f"{backend:>12}  (não instalado)")
+            continue
+        partida = tempo_partida(IMPORTS_BACKEND[backend]) - vazio
+        png = tempo_desenho(backend, "png", repeticoes)
+        svg = tempo_desenho(backend, "svg", repeticoes)
+        png_kb = len(chart_handler._RENDERIZADORES[backend](VALORES, "png")) / 1024
+        svg_kb = len(chart_handler._RENDERIZADORES[backend](VALORES, "svg")) / 1024
+        print(f"{backend:>12}{partida:>12.1f}{png:>10.2f}{svg:>10.2f}{png_kb:>9.1f}{svg_kb:>9.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
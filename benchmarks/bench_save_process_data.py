@@ -0,0 +1,78 @@
+"""
+bench_save_process_data.py
+Mede a latência de data_handler.save_process_data conforme o estado do processo cresce,
+comparando a gravação antiga (indent=4 direto no arquivo) com a atômica compacta e com fsync.
+
+Uso:
+    python benchmarks/bench_save_process_data.py [repeticoes]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from src import data_handler  # noqa: E402
+
+
+def estado_exemplo(n_questionados: int) -> dict:
+    """Estado de processo com n questionados, análises e quesitos (estrutura da página 01)."""
+    questionados = [
+        {"id": f"q{i:04d}", "TIPO_DOCUMENTO": "Contrato de Empréstimo", "FLS_DOCUMENTOS": f"{100 + i}",
+         "DATA_DOCUMENTO": "2023-05-10", "descricao": "Assinatura atribuída ao(à) Autor(a) " * 3}
+        for i in range(n_questionados)
+    ]
+    analises = {
+        q["id"]: {"eog": {"CALIBRE": "ADEQUADO", "ALINHAMENTO_GRAFICO": "LIMITADO"},
+                  "texto": "Confronto grafoscópico entre a peça questionada e os padrões. " * 10}
+        for q in questionados
+    }
+    quesitos = [
+        {"texto": f"Quesito {i}: a assinatura é autêntica?", "resposta": "Sim, conforme análise. " * 5}
+        for i in range(n_questionados)
+    ]
+    return {
+        "AUTOR": "Fulano de Tal", "REU": "Banco S.A.", "DATA_LAUDO": "2026-10-17",
+        "questionados_list": questionados, "saved_analyses": analises,
+        "LISTA_QS_AUTOR": quesitos, "LISTA_QS_REU": quesitos,
+        "etapas_concluidas": [1, 2, 3], "etapa_atual": 4,
+    }
+
+
+def save_antigo(process_id: str, data: dict) -> None:
+    """Gravação original: abre em 'w' e escreve com indent=4 (não atômica)."""
+    with open(data_handler.get_process_file_path(process_id), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+def medir(funcao, repeticoes: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main(repeticoes: int = 30):
+    with tempfile.TemporaryDirectory() as pasta:
+        data_handler.PROCESS_DATA_DIR = pasta
+
+        print(f"{'questionados':>12}{'KB (indent)':>13}{'antigo ms':>11}{'compacto ms':>13}{'indent ms':>11}{'+fsync ms':>11}")
+        for n in (1, 10, 50, 200, 1000):
+            estado = estado_exemplo(n)
+            save_antigo("bench", estado)
+            tamanho_kb = os.path.getsize(data_handler.get_process_file_path("bench")) / 1024
+
+            antigo = medir(lambda: save_antigo("bench", estado), repeticoes)
+            compacto = medir(lambda: data_handler.save_process_data("bench", estado, compact=True, fsync=False), repeticoes)
+            indentado = medir(lambda: data_handler.save_process_data("bench", estado, compact=False, fsync=False), repeticoes)
+            com_fsync = medir(lambda: data_handler.save_process_data("bench", estado, compact=True, fsync=True), repeticoes)
+
+            print(f"{n:>12}{tamanho_kb:>13.1f}{antigo:>11.2f}{compacto:>13.2f}{indentado:>11.2f}{com_fsync:>11.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30)
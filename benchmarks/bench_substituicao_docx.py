@@ -0,0 +1,85 @@
+"""
+bench_substituicao_docx.py
+Compara a substituição de placeholders no modo antigo (reatribui paragrafo.text)
+com o modo que preserva os runs, contando os elementos XML criados por laudo.
+
+Uso:
+    python benchmarks/bench_substituicao_docx.py [repeticoes]
+"""
+
+import copy
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import docx.oxml.parser  # noqa: E402
+from lxml import etree  # noqa: E402
+from src import word_handler  # noqa: E402
+
+CAMINHO_MODELO = os.path.join(BASE_DIR, "template", "LAUDO PERICIAL GRAFOTÉCNICO.docx")
+
+DADOS_EXEMPLO = {
+    "NUMERO_PROCESSO": "0001234-56.2023.8.26.0001",
+    "NUMERO_VARA": "5",
+    "COMARCA": "Rio de Janeiro",
+    "PRIMEIRO_AUTOR": "Fulano de Tal",
+    "ID_NOMEACAO": "123",
+    "NUM_LAUDAS": "12",
+    "NUM_LAUDAS_EXTENSO": "doze",
+    "NUM_ESPECIMES": "20",
+    "DATA_LAUDO": "17/10/2026",
+    "ID_QUESITO_AUTOR": "45",
+    "ID_QUESITO_REU": "67",
+}
+
+
+def contar_criacoes():
+    """
+    Troca o parser do python-docx por um que conta as chamadas a makeelement.
+    OxmlElement (usado em add_run, add_t, add_br, ...) consulta o parser a cada criação.
+    """
+    contador = {"elementos": 0}
+
+    class ParserContado(etree.XMLParser):
+        def makeelement(self, *args, **kwargs):
+            contador["elementos"] += 1
+            return super().makeelement(*args, **kwargs)
+
+    parser = ParserContado(remove_blank_text=True, resolve_entities=False)
+    parser.set_element_class_lookup(docx.oxml.parser.element_class_lookup)
+    docx.oxml.parser.oxml_parser = parser
+    return contador
+
+
+def renderizar(modelo, mapa, preservar_runs: bool):
+    """Aplica a substituição em uma cópia do modelo compilado (mesmo laço do gerar_laudo)."""
+    doc = copy.deepcopy(modelo.documento)
+    paragrafos_corpo = doc.paragraphs
+    for local in modelo.locais:
+        paragrafo = word_handler._resolver_paragrafo(doc, local, paragrafos_corpo)
+        word_handler.substituir_em_paragrafo(paragrafo, DADOS_EXEMPLO, mapa, preservar_runs)
+    return doc
+
+
+def main(repeticoes: int = 50):
+    modelo = word_handler.compilar_modelo(CAMINHO_MODELO)
+    mapa = word_handler.montar_mapa_placeholders(DADOS_EXEMPLO)
+    contador = contar_criacoes()
+
+    print(f"Modelo: {os.path.basename(CAMINHO_MODELO)} | {len(modelo.locais)} parágrafos com placeholders")
+    print(f"{'modo':<18}{'elementos/laudo':>18}{'ms/laudo':>12}")
+
+    for nome, preservar_runs in (("antes (text=)", False), ("depois (runs)", True)):
+        contador["elementos"] = 0
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            renderizar(modelo, mapa, preservar_runs)
+        decorrido = (time.perf_counter() - inicio) / repeticoes
+        print(f"{nome:<18}{contador['elementos'] / repeticoes:>18.0f}{decorrido * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -1,18 +1,26 @@
 import streamlit as st
 import os
-import json
 import shutil
 import pandas as pd
-from datetime import datetime
 # NOVO: Ajuste a importação para a nova estrutura de pastas 'src'
 from src.db_handler import (
     init_db,
-    listar_processos,
-    inserir_processo,
-    processo_existe,
-    excluir_processo,
-    atualizar_status
+    buscar_processos,
+    contar_processos,
+    STATUS_FINALIZADOS,
+    formatar_data_hora,
+    buscar_conteudo,
+    versao_dados,
 )
+from src.data_handler import rebuild_search_index
+# Toda gravação de processo (banco + JSON) passa pelo repositório
+from src.process_repository import (
+    create_process,
+    process_exists,
+    update_status_many,
+    delete_processes,
+)
+from src.session_handler import release_session_blobs
 
 # --- Configuração Inicial ---
 st.set_page_config(page_title="Início", layout="wide")
@@ -25,6 +33,77 @@ os.makedirs(DATA_FOLDER, exist_ok=True)
 
 init_db() # Garante que o banco de dados está inicializado
 
+# A tabela (st.data_editor) só desenha as linhas visíveis; a página pode ser maior
+ITENS_POR_PAGINA = 50
+
+COLUNAS_PROCESSOS = ["id", "autor", "reu", "status", "atualizado_em"]
+
+def selecionar_pagina(chave, total):
+    """Mostra o seletor de página (se houver mais de uma) e retorna o offset da consulta."""
+    paginas = max(1, -(-total // ITENS_POR_PAGINA))
+    if paginas == 1:
+        return 0
+    # A lista pode ter encolhido desde o último rerun (arquivamento/exclusão)
+    if st.session_state.get(chave, 1) > paginas:
+        st.session_state[chave] = paginas
+    pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, step=1, key=chave)
+    return (int(pagina) - 1) * ITENS_POR_PAGINA
+
+# As consultas ficam em cache até a próxima gravação na tabela de processos:
+# 'versao' (db_handler.versao_dados) faz parte da chave do cache.
+@st.cache_data(show_spinner=False, max_entries=64)
+def consultar_total(versao, status, excluir_status, texto):
+    return contar_processos(status=status, excluir_status=excluir_status, texto=texto)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def consultar_pagina(versao, status, excluir_status, texto, offset):
+    processos = buscar_processos(
+        status=status, excluir_status=excluir_status, texto=texto,
+        limite=ITENS_POR_PAGINA, offset=offset,
+    )
+    df = pd.DataFrame(processos, columns=COLUNAS_PROCESSOS)
+    df["atualizado_em"] = df["atualizado_em"].map(formatar_data_hora)
+    df.insert(0, "selecionado", False)
+    return df
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def consultar_ids(versao, status, excluir_status, texto, total):
+    """Números de todos os processos do filtro (para as ações em lote sobre todas as páginas)."""
+    processos = buscar_processos(status=status, excluir_status=excluir_status, texto=texto, limite=total)
+    return [processo[0] for processo in processos]
+
+def selecionar_todos(chave, total, versao, status, excluir_status, texto):
+    """
+    Caixa "selecionar todos os processos do filtro". Retorna os números de
+    todos eles, se marcada, ou None.
+    """
+    if total <= 1 or not st.checkbox(f"Selecionar todos os {total} processos listados (todas as páginas)", key=chave):
+        return None
+    return consultar_ids(versao, status, excluir_status, texto, total)
+
+def tabela_processos(chave, df, rotulo_data):
+    """
+    Desenha a página como uma única tabela com uma coluna de seleção e retorna
+    os números dos processos marcados. 'chave' deve mudar junto com os dados
+    (versão, página, filtro), para a seleção não sobreviver a uma ação.
+    """
+    editado = st.data_editor(
+        df,
+        key=chave,
+        hide_index=True,
+        use_container_width=True,
+        disabled=COLUNAS_PROCESSOS,
+        column_config={
+            "selecionado": st.column_config.CheckboxColumn("✔", width="small"),
+            "id": st.column_config.TextColumn("Nº do Processo"),
+            "autor": st.column_config.TextColumn("Autor(a)"),
+            "reu": st.column_config.TextColumn("Réu"),
+            "status": st.column_config.TextColumn("Status"),
+            "atualizado_em": st.column_config.TextColumn(rotulo_data),
+        },
+    )
+    return editado.loc[editado["selecionado"], "id"].tolist()
+
 st.title("Bem-vindo ao Gerador de Laudos")
 st.write("Selecione 'Gerar Laudo' no menu lateral ou use a tela abaixo para gerenciar processos.")
 
@@ -41,73 +120,81 @@ with st.expander("➕ Adicionar Novo Processo"):
         if submitted:
             if not novo_id or not novo_autor or not novo_reu:
                 st.error("Preencha todos os campos obrigatórios.")
-            elif processo_existe(novo_id):
+            elif process_exists(novo_id):
                 st.warning("Este número de processo já está cadastrado.")
             else:
-                atualizado_em = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
                 try:
-                    inserir_processo(novo_id, novo_autor, novo_reu, novo_status, atualizado_em)
+                    # Cria a linha no banco e o JSON básico do processo na mesma transação
+                    create_process(novo_id, novo_autor, novo_reu, novo_status)
                     st.success(f"✅ Processo **{novo_id}** cadastrado com sucesso!")
-                    # Cria o arquivo JSON básico para evitar erro de arquivo não encontrado
-                    json_path = os.path.join(DATA_FOLDER, f"{novo_id}.json")
-                    with open(json_path, "w", encoding="utf-8") as f:
-                        json.dump({
-                            "NUMERO_PROCESSO": novo_id,
-                            "AUTORES": novo_autor,
-                            "REUS": novo_reu,
-                            "status": novo_status,
-                            "atualizado_em": atualizado_em,
-                            "etapas_concluidas": list() # Inicializa como lista para salvar corretamente no JSON
-                        }, f)
                     st.rerun()
                 except Exception as e:
                     st.error(f"❌ Erro ao salvar no banco de dados: {e}")
 
 st.markdown("---")
 
+# --- Busca no conteúdo dos laudos (quesitos, conclusões, descrições) ---
+with st.expander("🔍 Buscar no Conteúdo dos Laudos"):
+    consulta = st.text_input("Palavras ou trechos (ex.: falsificação grosseira)", key="busca_conteudo")
+    if consulta:
+        resultados = buscar_conteudo(consulta)
+        if not resultados:
+            st.info("Nenhum processo contém esses termos.")
+        for processo_id, chave, trecho, _ in resultados:
+            with st.container(border=True):
+                col1, col2 = st.columns([8, 2])
+                with col1:
+                    st.markdown(f"**Nº:** `{processo_id}` · _{chave}_")
+                    st.markdown(trecho)
+                with col2:
+                    if st.button("▶️ Abrir", key=f"busca_abrir_{processo_id}"):
+                        st.session_state["process_to_load"] = processo_id
+                        st.switch_page("pages/01_Gerar_laudo.py")
+    if st.button("🔄 Reindexar todos os processos", help="Necessário apenas para processos salvos antes da busca existir."):
+        total = rebuild_search_index()
+        st.success(f"{total} processo(s) reindexado(s).")
+
+filtro_texto = st.text_input("🔎 Filtrar por número do processo, autor ou réu", key="filtro_processos")
+
+versao = versao_dados()
+
 # --- Processos Ativos (Lidos do DB) ---
 st.header("Processos Ativos")
-# Filtrar apenas processos que não estão 'Arquivado' para mostrar aqui
-processos_ativos_db = [
-    p for p in listar_processos() 
-    if p[3] != 'Arquivado' and p[3] != 'Concluído'
-]
-
-if processos_ativos_db:
-    # Cria um DataFrame para facilitar a visualização
-    df_processos = pd.DataFrame(processos_ativos_db, columns=["id", "autor", "reu", "status", "atualizado_em"])
-
-    for index, row in df_processos.iterrows():
-        processo_id = row['id']
-        
-        with st.container(border=True):
-            col1, col2, col3, col4 = st.columns([4, 2, 2, 2])
-            
-            with col1:
-                st.markdown(f"**Nº:** `{processo_id}`")
-                st.markdown(f"**Partes:** {row['autor']} x {row['reu']}")
-                st.caption(f"Status: **{row['status']}** | Última Atualização: {row['atualizado_em']}")
-            
-            with col2:
-                # Botão para EDITAR/CARREGAR
-                if st.button("▶️ Carregar para Edição", key=f"editar_{processo_id}", type="primary"):
-                    # Define a variável de estado para a outra página carregar
-                    st.session_state["process_to_load"] = processo_id
-                    st.switch_page("pages/01_Gerar_laudo.py")
-            
-            with col3:
-                # Botão para ARQUIVAR (muda o status no DB)
-                if st.button("📁 Arquivar", key=f"arquivar_{processo_id}", type="secondary"):
-                    atualizar_status(processo_id, 'Arquivado')
-                    st.success(f"Processo {processo_id} arquivado. Consulte em 'Processos Finalizados'.")
-                    st.rerun()
+# Somente a página exibida é lida do banco (status fora de 'Arquivado'/'Concluído')
+total_ativos = consultar_total(versao, None, STATUS_FINALIZADOS, filtro_texto)
+offset_ativos = selecionar_pagina("pagina_ativos", total_ativos)
 
-            with col4:
-                # Botão para CONCLUIR (muda o status no DB, diferente de arquivar)
-                if st.button("✔️ Concluído", key=f"concluir_{processo_id}"):
-                    atualizar_status(processo_id, 'Concluído')
-                    st.success(f"Processo {processo_id} marcado como Concluído.")
-                    st.rerun()
+if total_ativos:
+    df_ativos = consultar_pagina(versao, None, STATUS_FINALIZADOS, filtro_texto, offset_ativos)
+    selecionados = tabela_processos(
+        f"tabela_ativos_{versao}_{offset_ativos}_{filtro_texto}", df_ativos, "Última Atualização",
+    )
+    todos = selecionar_todos(f"todos_ativos_{versao}", total_ativos, versao, None, STATUS_FINALIZADOS, filtro_texto)
+    if todos is not None:
+        selecionados = todos
+    n = len(selecionados)
+    if not n:
+        st.caption("Marque processos na tabela para carregá-los, arquivá-los ou concluí-los.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        # Botão para EDITAR/CARREGAR (um processo por vez)
+        if st.button("▶️ Carregar para Edição", key="editar", type="primary", disabled=n != 1):
+            # Define a variável de estado para a outra página carregar
+            st.session_state["process_to_load"] = selecionados[0]
+            st.switch_page("pages/01_Gerar_laudo.py")
+    with col2:
+        # Botão para ARQUIVAR (muda o status no DB, de todos os marcados numa transação)
+        if st.button(f"📁 Arquivar ({n})", key="arquivar", disabled=not n):
+            update_status_many(selecionados, 'Arquivado')
+            st.success(f"{n} processo(s) arquivado(s). Consulte em 'Processos Finalizados'.")
+            st.rerun()
+    with col3:
+        # Botão para CONCLUIR (muda o status no DB, diferente de arquivar)
+        if st.button(f"✔️ Concluído ({n})", key="concluir", disabled=not n):
+            update_status_many(selecionados, 'Concluído')
+            st.success(f"{n} processo(s) marcado(s) como Concluído.")
+            st.rerun()
 else:
     st.info("Nenhum processo ativo encontrado. Adicione um novo processo acima.")
 
@@ -116,42 +203,39 @@ st.markdown("---")
 # --- Processos Finalizados (Arquivados e Concluídos) ---
 st.header("Processos Finalizados")
 
-processos_finalizados_db = [
-    p for p in listar_processos() 
-    if p[3] == 'Arquivado' or p[3] == 'Concluído'
-]
+total_finalizados = consultar_total(versao, STATUS_FINALIZADOS, None, filtro_texto)
 
-if processos_finalizados_db:
-    df_finalizados = pd.DataFrame(processos_finalizados_db, columns=["id", "autor", "reu", "status", "atualizado_em"])
-    
+if total_finalizados:
     with st.expander("Mostrar Processos Finalizados"):
-        for index, row in df_finalizados.iterrows():
-            processo_id = row['id']
-            
-            with st.container(border=True):
-                col1, col2, col3 = st.columns([6, 2, 2])
-                
-                with col1:
-                    st.markdown(f"**Nº:** `{processo_id}`")
-                    st.markdown(f"**Partes:** {row['autor']} x {row['reu']}")
-                    st.caption(f"Status: **{row['status']}** | Finalizado em: {row['atualizado_em']}")
-                
-                with col2:
-                    if st.button("📂 Desarquivar", key=f"desarquivar_{processo_id}", type="secondary"):
-                        # Atualiza o status no DB para 'Em andamento'
-                        atualizar_status(processo_id, 'Em andamento')
-                        st.success(f"Processo {processo_id} desarquivado e movido para Processos Ativos.")
-                        st.rerun()
-                
-                with col3:
-                    if st.button("🗑️ Excluir", key=f"excluir_{processo_id}"):
-                        # Exclui do DB
-                        excluir_processo(processo_id)
-                        # Remove o arquivo JSON também
-                        json_path = os.path.join(DATA_FOLDER, f"{processo_id}.json")
-                        if os.path.exists(json_path):
-                            os.remove(json_path)
-                        st.success(f"Processo {processo_id} excluído permanentemente.")
-                        st.rerun()
+        st.caption(f"{total_finalizados} processo(s) finalizado(s).")
+        offset_finalizados = selecionar_pagina("pagina_finalizados", total_finalizados)
+        df_finalizados = consultar_pagina(versao, STATUS_FINALIZADOS, None, filtro_texto, offset_finalizados)
+        selecionados = tabela_processos(
+            f"tabela_finalizados_{versao}_{offset_finalizados}_{filtro_texto}", df_finalizados, "Finalizado em",
+        )
+        todos = selecionar_todos(f"todos_finalizados_{versao}", total_finalizados, versao, STATUS_FINALIZADOS, None, filtro_texto)
+        if todos is not None:
+            selecionados = todos
+        n = len(selecionados)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button(f"📂 Desarquivar ({n})", key="desarquivar", disabled=not n):
+                # Atualiza o status no DB para 'Em andamento'
+                update_status_many(selecionados, 'Em andamento')
+                st.success(f"{n} processo(s) desarquivado(s) e movido(s) para Processos Ativos.")
+                st.rerun()
+        with col2:
+            # Exclusão em lote exige confirmação explícita
+            confirmado = n <= 1 or st.checkbox(f"Confirmo a exclusão permanente de {n} processos", key=f"confirmar_exclusao_{versao}")
+            if st.button(f"🗑️ Excluir ({n})", key="excluir", disabled=not (n and confirmado)):
+                # Exclui as linhas numa única transação; JSONs e imagens só depois do commit
+                delete_processes(selecionados)
+                # Processo aberto nesta sessão foi excluído: libera seus uploads descarregados
+                if st.session_state.get("selected_process_id") in selecionados:
+                    release_session_blobs(st.session_state)
+                    st.session_state.pop("selected_process_id", None)
+                st.success(f"{n} processo(s) excluído(s) permanentemente.")
+                st.rerun()
 else:
     st.info("Nenhum processo finalizado ou arquivado encontrado.")
\ No newline at end of file
@@ -5,17 +5,20 @@
 
 import streamlit as st
 import uuid
-import json
+import hashlib
 import os
 import datetime
+import importlib
+import importlib.util
 from datetime import date
-import matplotlib.pyplot as plt
 from io import BytesIO
-from PIL import Image
 from typing import Dict, List, Any, Optional
 
+# Dependências pesadas (PIL, streamlit_cropper, streamlit_drawable_canvas,
+# matplotlib, python-docx) são importadas só no primeiro uso, dentro das funções.
+
 # ======================================================================
-# IMPORTS ROBUSTOS DO BACKEND (tenta src/ → raiz → stubs)
+# IMPORTS ROBUSTOS DO BACKEND (src/ → stubs)
 # ======================================================================
 
 BACKEND_OK = True
@@ -33,62 +36,81 @@ def _stub_load_process_data(*args, **kwargs):
 def _stub_list_processes(*args, **kwargs):
     return []
 
+def _stub_get_process_index(*args, **kwargs):
+    return {}
+
 def _stub_generate_report_from_template(*args, **kwargs):
     raise FileNotFoundError("generate_report_from_template indisponível (backend ausente).")
 
-def _stub_atualizar_status(*args, **kwargs):
+def _stub_put_blob(*args, **kwargs):
+    raise FileNotFoundError("blob store indisponível (backend ausente).")
+
+def _stub_radar_eog(*args, **kwargs):
+    raise FileNotFoundError("gráfico EOG indisponível (backend ausente).")
+
+def _stub_processo_de_dict(*args, **kwargs):
+    raise ValueError("modelo do processo indisponível (backend ausente).")
+
+def _stub_spill_session_blobs(*args, **kwargs):
+    return []
+
+def _stub_release_session_blobs(*args, **kwargs):
     pass
 
-# Try src package first, then root
+def _stub_session_memory_report(*args, **kwargs):
+    return []
+
+def _gerador_laudo_sob_demanda(modulo: str):
+    """generate_report_from_template que só importa o word_handler (python-docx) ao gerar o laudo."""
+    def generate_report_from_template(*args, **kwargs):
+        return importlib.import_module(modulo).generate_report_from_template(*args, **kwargs)
+    return generate_report_from_template
+
 try:
-    from src.data_handler import save_process_data, load_process_data, list_processes, PROCESS_DATA_DIR
-    try:
-        from src.word_handler import generate_report_from_template
-    except Exception as e:
+    # Leituras e gravações de processos passam pelo repositório (banco + JSON)
+    from src.process_repository import (
+        create_process,
+        save_process,
+        patch_process,
+        load_process as load_process_data,
+        list_processes,
+        get_process_index,
+    )
+    from src.blob_handler import put_blob
+    from src.chart_handler import radar_eog
+    from src.session_handler import spill_session_blobs, release_session_blobs, session_memory_report
+    from src.process_model import processo_de_dict, processo_para_dict, encode_processo
+    # Só verifica se o python-docx está instalado; o import fica para a geração
+    if importlib.util.find_spec("docx") is None:
         generate_report_from_template = _stub_generate_report_from_template
         BACKEND_OK = False
-        BACKEND_ISSUES.append(f"src.word_handler: {e}")
-    try:
-        from src.db_handler import atualizar_status
-    except Exception:
-        atualizar_status = _stub_atualizar_status
-        BACKEND_OK = False
-        BACKEND_ISSUES.append("src.db_handler import failed")
+        BACKEND_ISSUES.append("src.word_handler: python-docx não instalado")
+    else:
+        generate_report_from_template = _gerador_laudo_sob_demanda("src.word_handler")
 except Exception as e_src:
-    # fallback to root-level modules
-    try:
-        from data_handler import save_process_data, load_process_data, list_processes, PROCESS_DATA_DIR
-        try:
-            from word_handler import generate_report_from_template
-        except Exception as e_wh:
-            generate_report_from_template = _stub_generate_report_from_template
-            BACKEND_OK = False
-            BACKEND_ISSUES.append(f"root word_handler: {e_wh}")
-        try:
-            from db_handler import atualizar_status
-        except Exception:
-            atualizar_status = _stub_atualizar_status
-            BACKEND_OK = False
-            BACKEND_ISSUES.append("root db_handler import failed")
-    except Exception as e_root:
-        # no usable backend found — attach stubs
-        BACKEND_OK = False
-        BACKEND_ISSUES.append(f"src import error: {e_src}")
-        BACKEND_ISSUES.append(f"root import error: {e_root}")
-        save_process_data = _stub_save_process_data
-        load_process_data = _stub_load_process_data
-        list_processes = _stub_list_processes
-        generate_report_from_template = _stub_generate_report_from_template
-        atualizar_status = _stub_atualizar_status
-        # set PROCESS_DATA_DIR to sensible default
-        PROCESS_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+    # no usable backend found — attach stubs
+    BACKEND_OK = False
+    BACKEND_ISSUES.append(f"src import error: {e_src}")
+    create_process = _stub_save_process_data
+    save_process = _stub_save_process_data
+    patch_process = _stub_save_process_data
+    load_process_data = _stub_load_process_data
+    list_processes = _stub_list_processes
+    get_process_index = _stub_get_process_index
+    generate_report_from_template = _stub_generate_report_from_template
+    put_blob = _stub_put_blob
+    radar_eog = _stub_radar_eog
+    spill_session_blobs = _stub_spill_session_blobs
+    release_session_blobs = _stub_release_session_blobs
+    session_memory_report = _stub_session_memory_report
+    processo_de_dict = processo_para_dict = encode_processo = _stub_processo_de_dict
 
 # ======================================================================
 # AVISO DETALHADO AO USUÁRIO SE BACKEND NÃO CARREGOU PERFEITAMENTE
 # ======================================================================
 if not BACKEND_OK:
     msg = (
-        "⚠️ **Não foi possível carregar os módulos de backend (src/ ou raiz).**\n\n"
+        "⚠️ **Não foi possível carregar os módulos de backend (src/).**\n\n"
         "A funcionalidade de **salvar processos**, **carregar dados** e **gerar laudo** pode estar limitada.\n"
         "Verifique a pasta `/src` e os arquivos word_handler.py, data_handler.py, db_handler.py e reinicie a aplicação.\n\n"
         "Problemas detectados:\n"
@@ -163,26 +185,41 @@ def ensure_session_defaults():
 # inicializa
 ensure_session_defaults()
 
-# ======================================================================
-# SERIALIZAÇÃO ROBUSTA (para salvar dados no JSON)
-# ======================================================================
+# Chaves de dados do laudo que podem conter uploads (bytes) a descarregar para o disco
+# Chaves do documento do processo editadas na página (save completo)
+PROCESS_STATE_KEYS = (
+    "AUTOR", "REU", "DATA_LAUDO", "etapa_atual", "etapas_concluidas",
+    "questionados_list", "padroes_list", "saved_analyses",
+    "LISTA_QS_AUTOR", "LISTA_QS_REU", "LISTA_QS_AUTOR_NAO_ENVIADOS", "LISTA_QS_REU_NAO_ENVIADOS",
+    "conclusao_final", "anexos", "adendos",
+)
+
+SESSION_DATA_KEYS = (
+    "anexos", "adendos", "saved_analyses", "questionados_list",
+    "padroes_list", "LISTA_QS_AUTOR", "LISTA_QS_REU",
+)
+
+def spill_session_state():
+    """Move os uploads grandes da sessão para o blob store; a sessão fica só com os handles."""
+    if BACKEND_OK and st.session_state.get("selected_process_id"):
+        spill_session_blobs(st.session_state, keys=SESSION_DATA_KEYS)
 
-def _make_serializable(obj):
-    """Recursivamente torna um objeto JSON-serializável, pulando bytes/objetos pesados."""
-    if isinstance(obj, set):
-        return list(obj)
-    if isinstance(obj, (datetime.date, datetime.datetime)):
-        return obj.isoformat()
-    if isinstance(obj, dict):
-        out = {}
-        for k, v in obj.items():
-            if k in ("imagem_obj", "imagem_bytes", "file_obj", "bytes"):
-                continue
-            out[k] = _make_serializable(v)
-        return out
-    if isinstance(obj, list):
-        return [_make_serializable(i) for i in obj]
-    return obj
+def render_memory_panel():
+    """Painel lateral com o tamanho (aproximado) de cada chave do st.session_state."""
+    report = session_memory_report(st.session_state)
+    total = sum(size for _, size in report)
+    st.sidebar.caption(f"Total aproximado da sessão: **{total / 1024:.1f} KB**")
+    st.sidebar.table([{"chave": key, "KB": round(size / 1024, 1)} for key, size in report[:10]])
+
+def _externalize_blobs(itens: list):
+    """
+    Move os bytes das imagens (anexos/adendos) para o blob store, deixando no item
+    apenas a referência 'bytes_ref' (SHA-256). As referências do processo são
+    registradas pelo process_repository, a partir do documento gravado.
+    """
+    for item in itens or []:
+        if isinstance(item, dict) and isinstance(item.get("bytes"), (bytes, bytearray)):
+            item["bytes_ref"] = put_blob(bytes(item.pop("bytes")))
 
 def save_current_state(data: dict = None) -> bool:
     """
@@ -198,24 +235,30 @@ def save_current_state(data: dict = None) -> bool:
         st.error("Nenhum processo selecionado. Selecione ou crie um processo primeiro.")
         return False
 
-    payload = data if data is not None else {
-        "AUTOR": st.session_state.get("AUTOR"),
-        "REU": st.session_state.get("REU"),
-        "DATA_LAUDO": st.session_state.get("DATA_LAUDO").isoformat()
-            if isinstance(st.session_state.get("DATA_LAUDO"), (datetime.date, datetime.datetime))
-            else st.session_state.get("DATA_LAUDO"),
-        "questionados_list": st.session_state.get("questionados_list", []),
-        "padroes_list": st.session_state.get("padroes_list", []),
-        "saved_analyses": st.session_state.get("saved_analyses", {}),
-        "anexos": st.session_state.get("anexos", []),
-        "adendos": st.session_state.get("adendos", []),
-        "etapas_concluidas": list(st.session_state.get("etapas_concluidas", [])),
-        "etapa_atual": st.session_state.get("etapa_atual", 1)
-    }
-
     try:
-        serializable = _make_serializable(payload)
-        save_process_data(process_id, serializable)
+        if data is None:
+            # Save completo: substitui o documento e descarta o journal. Parte do
+            # documento salvo (com o journal já aplicado), para não perder campos
+            # gravados só por saves parciais ou que não estão na sessão (status...)
+            payload = load_process_data(process_id)
+            payload.update({k: st.session_state[k] for k in PROCESS_STATE_KEYS if k in st.session_state})
+            if "etapas_concluidas" in payload:
+                payload["etapas_concluidas"] = sorted(payload["etapas_concluidas"])
+        else:
+            payload = data
+
+        # Imagens vão para o blob store; o JSON e a sessão guardam só a referência.
+        # save_process/patch_process registram todos os '*_ref' do documento gravado
+        _externalize_blobs(payload.get("anexos"))
+        _externalize_blobs(payload.get("adendos"))
+
+        # O codec do data_handler converte set/date/datetime e grava bytes/objetos
+        # pesados (imagem_obj, file_obj...) como null, sem uma cópia prévia do estado
+        if data is None:
+            save_process(process_id, payload)
+        else:
+            # Save parcial: mescla só as chaves informadas, sem apagar o restante do processo
+            patch_process(process_id, payload)
         return True
     except Exception as e:
         st.error(f"Erro ao salvar estado: {e}")
@@ -236,17 +279,23 @@ def load_process(process_id: str) -> bool:
         st.error("Processo não encontrado.")
         return False
 
-    # aplica valores no session_state com normalizações
-    for k, v in dados.items():
-        if k == "etapas_concluidas" and isinstance(v, list):
-            st.session_state[k] = set(v)
-        elif k == "DATA_LAUDO" and isinstance(v, str):
-            try:
-                st.session_state[k] = date.fromisoformat(v)
-            except Exception:
-                st.session_state[k] = date.today()
-        else:
-            st.session_state[k] = v
+    try:
+        # Valida o documento e unifica as variantes de chaves (AUTORES, numero_processo...)
+        processo = processo_de_dict(dados, numero=process_id)
+    except ValueError as e:
+        st.error(f"Documento do processo inválido: {e}")
+        return False
+
+    # Os uploads não salvos do processo anterior saem da sessão: libera seus blobs
+    if st.session_state.get("selected_process_id") not in (None, process_id):
+        release_session_blobs(st.session_state)
+
+    # Mesmas chaves do JSON, com os tipos usados pelos widgets (set de etapas, date)
+    estado = processo_para_dict(processo)
+    estado["etapas_concluidas"] = processo.etapas_concluidas
+    estado["DATA_LAUDO"] = processo.data_laudo or date.today()
+    for k, v in estado.items():
+        st.session_state[k] = v
 
     st.session_state["process_loaded"] = True
     st.session_state["selected_process_id"] = process_id
@@ -265,9 +314,10 @@ def format_process_label(process_id: str) -> str:
     if not BACKEND_OK:
         return f"{process_id} — backend indisponível"
     try:
-        dados = load_process_data(process_id)
-        autor = dados.get("AUTOR", "N/A")
-        reu = dados.get("REU", "N/A")
+        # Lê apenas o índice de metadados (não abre o JSON do processo)
+        meta = get_process_index().get(process_id, {})
+        autor = meta.get("AUTOR", "N/A")
+        reu = meta.get("REU", "N/A")
         return f"{process_id} — Autor: {autor} | Réu: {reu}"
     except Exception:
         return f"{process_id} — [Erro ao acessar dados]"
@@ -314,15 +364,6 @@ def _render_theme_and_wallpaper_controls():
 # PARTE 2 — EDITOR DE IMAGEM, FUNÇÕES DE ANÁLISE E GRÁFICO EOG
 # ======================================================================
 
-from typing import Dict, List, Any, Optional
-from PIL import Image
-from io import BytesIO
-import matplotlib.pyplot as plt
-from streamlit_drawable_canvas import st_canvas
-from streamlit_cropper import st_cropper
-import streamlit as st
-import uuid
-
 # ======================================================================
 # 2.1 — Funções auxiliares de análise
 # ======================================================================
@@ -349,6 +390,26 @@ def save_analysis_for_questionado(questionado_id: str, analysis: Dict[str, Any])
 # 2.2 — EDITOR DE IMAGEM (Mesa Gráfica)
 # ======================================================================
 
+# Largura máxima da prévia enviada ao navegador (cropper e canvas)
+EDITOR_LARGURA_PREVIA = 700
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def _imagem_editor(chave: str, _image_bytes: bytes):
+    """
+    Decodifica a imagem uma única vez por conteúdo ('chave' = hash dos bytes) e
+    prepara a prévia reduzida. Retorna (original, prévia). Os objetos são
+    compartilhados entre reruns e sessões: nunca devem ser alterados no lugar.
+    """
+    from PIL import Image, ImageOps
+
+    original = ImageOps.exif_transpose(Image.open(BytesIO(_image_bytes)))
+    original.load()
+    previa = original.copy()
+    previa.thumbnail((EDITOR_LARGURA_PREVIA, EDITOR_LARGURA_PREVIA * 4), Image.LANCZOS)
+    return original, previa
+
+
 def image_editor_tool(image_bytes: bytes) -> Optional[bytes]:
     """
     Editor completo de imagem:
@@ -356,53 +417,78 @@ def image_editor_tool(image_bytes: bytes) -> Optional[bytes]:
     - Zoom
     - Desenho livre
     - Linhas, setas e anotações
-    Retorna a imagem final editada como bytes PNG.
+    O navegador recebe apenas uma prévia reduzida; as chaves dos componentes
+    derivam do hash da imagem, então reruns não remontam o cropper/canvas nem
+    apagam o desenho. Ao clicar em "Aplicar edição", o recorte e as anotações
+    são aplicados à imagem original (resolução completa), retornada como bytes PNG.
     """
+    # Importados só quando o editor é aberto (os componentes carregam numpy/PIL)
+    from PIL import Image
+    from streamlit_cropper import st_cropper
+    from streamlit_drawable_canvas import st_canvas
 
     st.subheader("🖼️ Editor de Imagem — Mesa Gráfica")
 
-    # Carrega imagem original
-    img = Image.open(BytesIO(image_bytes))
+    # Imagem decodificada e prévia em cache, pela identidade do conteúdo
+    chave = hashlib.sha256(image_bytes).hexdigest()[:16]
+    original, previa = _imagem_editor(chave, image_bytes)
+    escala = original.width / previa.width
 
     # 1) CROPPER --------------------------------------------------------
     st.write("### 1) Recortar imagem")
-    cropped = st_cropper(
-        img,
-        realtime_update=True,
+    caixa = st_cropper(
+        previa,
+        realtime_update=False,
         box_color="#ff0000",
         aspect_ratio=None,
-        key=f"crop_{uuid.uuid4()}"
+        return_type="box",
+        key=f"crop_{chave}"
     )
+    caixa_previa = (
+        caixa["left"], caixa["top"],
+        caixa["left"] + caixa["width"], caixa["top"] + caixa["height"],
+    )
+    cropped = previa.crop(caixa_previa)
 
     st.write("Imagem recortada:")
     st.image(cropped, use_column_width=True)
 
     # 2) CANVAS ---------------------------------------------------------
+    # O canvas é remontado só quando o recorte muda (o desenho é relativo a ele)
     st.write("### 2) Anotar imagem")
+    largura_canvas = min(EDITOR_LARGURA_PREVIA, cropped.width)
+    altura_canvas = max(1, round(cropped.height * largura_canvas / cropped.width))
     canvas_result = st_canvas(
         fill_color="rgba(255, 0, 0, 0.3)",
         stroke_color="#0000ff",
         stroke_width=2,
         background_image=cropped,
         update_streamlit=True,
-        height=450,
-        width=700,
+        height=altura_canvas,
+        width=largura_canvas,
         drawing_mode="freedraw",
-        key=f"canvas_{uuid.uuid4()}"
+        key=f"canvas_{chave}_{'_'.join(map(str, caixa_previa))}"
     )
 
-    # 3) EXPORTAÇÃO -----------------------------------------------------
+    # 3) EXPORTAÇÃO (resolução original) --------------------------------
+    if not st.button("✅ Aplicar edição", key=f"aplicar_{chave}"):
+        return None
+
+    caixa_original = tuple(min(round(v * escala), limite) for v, limite in
+                           zip(caixa_previa, (original.width, original.height) * 2))
+    final_img = original.crop(caixa_original).convert("RGBA")
 
     if canvas_result.image_data is not None:
-        final_img = Image.fromarray(canvas_result.image_data.astype("uint8"))
-        st.write("### 3) Resultado final")
-        st.image(final_img, use_column_width=True)
+        # Camada de anotações (transparente fora dos traços) ampliada para o recorte original
+        tracos = Image.fromarray(canvas_result.image_data.astype("uint8"), "RGBA")
+        final_img = Image.alpha_composite(final_img, tracos.resize(final_img.size, Image.LANCZOS))
 
-        buffer = BytesIO()
-        final_img.save(buffer, format="PNG")
-        return buffer.getvalue()
+    st.write("### 3) Resultado final")
+    st.image(final_img, use_column_width=True)
 
-    return None
+    buffer = BytesIO()
+    final_img.save(buffer, format="PNG")
+    return buffer.getvalue()
 
 
 # ======================================================================
@@ -411,51 +497,39 @@ def image_editor_tool(image_bytes: bytes) -> Optional[bytes]:
 
 def plot_eog_radar(eog_data: Dict[str, str]):
     """
-    Gera o gráfico Radar dos Elementos de Ordem Geral (EOG).
+    Exibe o gráfico Radar dos Elementos de Ordem Geral (EOG).
     Cada EOG possui um valor numérico definido no dicionário EOG_OPCOES_RADAR.
+    O PNG vem do cache do chart_handler (o mesmo inserido no laudo): reruns não redesenham.
     """
+    st.image(radar_eog(eog_data, "png"))
 
-    ordered_keys = [
-        "HABILIDADE_VELOCIDADE",
-        "ESPONTANEIDADE_DINAMISMO",
-        "CALIBRE",
-        "ALINHAMENTO_GRAFICO",
-        "ATAQUES_REMATES"
-    ]
 
-    # Cria lista de valores convertidos (0,1,2)
-    values = [
-        EOG_OPCOES_RADAR.get(eog_data.get(k, "PENDENTE"), 1)
-        for k in ordered_keys
-    ]
-    values.append(values[0])
+def _descricao_grafico_eog(questionado_id: str) -> str:
+    q = next((q for q in st.session_state.get("questionados_list", []) if q.get("id") == questionado_id), {})
+    return f"Gráfico EOG — {q.get('TIPO_DOCUMENTO', 'Documento questionado')} (Fls. {q.get('FLS_DOCUMENTOS', 'N/A')})"
 
-    # Labels
-    labels = [EOG_ELEMENTS[k] for k in ordered_keys]
-    labels.append(labels[0])
 
-    # Ângulos
-    N = len(ordered_keys)
-    angles = [(n / float(N)) * 2 * 3.141592 for n in range(N)]
-    angles.append(angles[0])
-
-    # Plot
-    fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(polar=True))
-
-    ax.plot(angles, values, linewidth=2)
-    ax.fill(angles, values, alpha=0.3)
-
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(labels, fontsize=9)
-
-    ax.set_yticks([0, 1, 2])
-    ax.set_yticklabels(["Divergente", "Limitado", "Adequado"])
-
-    ax.set_ylim(0, 2)
-
-    ax.set_title("Análise dos Elementos de Ordem Geral (EOG)", y=1.1)
-
-    st.pyplot(fig)
+def adendos_graficos_eog() -> List[Dict[str, Any]]:
+    """
+    Adendos 'grafico_eog' das análises marcadas para o laudo (Etapa 6).
+    São montados a cada geração, a partir do EOG atual da análise; o word_handler
+    insere o mesmo PNG em cache exibido por plot_eog_radar.
+    """
+    adendos = []
+    for qid, analise in st.session_state.get("saved_analyses", {}).items():
+        eog = analise["eog"]
+        if not (analise.get("incluir_grafico_laudo") and eog):
+            continue
+        adendos.append({
+            "id": f"grafico_eog_{qid}",
+            "tipo": "grafico_eog",
+            "origem": "analise",
+            "id_referencia": qid,
+            "descricao": _descricao_grafico_eog(qid),
+            "filename": f"grafico_eog_{qid}.png",
+            "eog": dict(eog),
+        })
+    return adendos
 
 
 # ======================================================================
@@ -485,8 +559,21 @@ def render_etapa_6():
         key="txt_conclusao_final"
     )
 
+    analises = st.session_state.get("saved_analyses", {})
+    com_eog = [(qid, a) for qid, a in analises.items() if a["eog"]]
+    if com_eog:
+        st.subheader("Gráficos EOG das análises")
+        for qid, analise in com_eog:
+            with st.expander(_descricao_grafico_eog(qid)):
+                plot_eog_radar(analise["eog"])
+                analise["incluir_grafico_laudo"] = st.checkbox(
+                    "Incluir este gráfico no laudo (adendo)",
+                    value=bool(analise.get("incluir_grafico_laudo")),
+                    key=f"incluir_grafico_{qid}"
+                )
+
     if st.button("💾 Salvar Conclusão (Etapa 6)", key="save_etp6"):
-        save_current_state({"conclusao_final": st.session_state.conclusao_final})
+        save_current_state({"conclusao_final": st.session_state.conclusao_final, "saved_analyses": analises})
         st.success("Conclusão salva!")
         marcar_etapa_concluida(6)
 
@@ -733,7 +820,12 @@ def create_and_load_new_process(numero_processo, autor, reu):
         "etapa_atual": 1,
     }
 
-    save_process_data(numero_processo, payload)
+    try:
+        # Cadastra também a linha no banco: o processo aparece na tela inicial
+        create_process(numero_processo, autor, reu, data=payload)
+    except ValueError as e:
+        st.error(str(e))
+        return False
 
     ok = load_process(numero_processo)
     if ok:
@@ -746,37 +838,42 @@ def create_and_load_new_process(numero_processo, autor, reu):
 # ---------------------------------------------------------------------
 def gerar_laudo_docx():
     try:
-        dados = {
-            "numero_processo": st.session_state.get("selected_process_id"),
+        # A sessão guarda dicts (editados pelos widgets); o laudo recebe o modelo tipado,
+        # montado uma única vez e de forma tolerante, como o laudo sempre aceitou
+        processo = processo_de_dict({
+            "NUMERO_PROCESSO": st.session_state.get("selected_process_id"),
             "AUTOR": st.session_state.get("AUTOR"),
             "REU": st.session_state.get("REU"),
             "DATA_LAUDO": st.session_state.get("DATA_LAUDO"),
-            "questionados": st.session_state.get("questionados_list", []),
-            "padroes": st.session_state.get("padroes_list", []),
-            "analises": st.session_state.get("saved_analyses", {}),
+            "questionados_list": st.session_state.get("questionados_list", []),
+            "padroes_list": st.session_state.get("padroes_list", []),
+            "saved_analyses": st.session_state.get("saved_analyses", {}),
             "conclusao_final": st.session_state.get("conclusao_final", ""),
             "LISTA_QS_AUTOR": st.session_state.get("LISTA_QS_AUTOR", []),
             "LISTA_QS_REU": st.session_state.get("LISTA_QS_REU", []),
             "anexos": st.session_state.get("anexos", []),
-            "adendos": st.session_state.get("adendos", []),
-        }
+            # Gráficos EOG marcados na Etapa 6 entram como adendos 'grafico_eog'
+            "adendos": [a for a in st.session_state.get("adendos", []) if a.get("tipo") != "grafico_eog"]
+                       + adendos_graficos_eog(),
+        }, estrito=False)
 
         try:
-            output = generate_report_from_template(dados)
+            # Gerado em memória: os bytes vão direto para o download, sem passar por /output
+            laudo_bytes = generate_report_from_template(processo)
             st.success("Laudo gerado com sucesso!")
-            with open(output, "rb") as f:
-                st.download_button(
-                    "⬇️ Baixar Laudo (.docx)",
-                    data=f,
-                    file_name=os.path.basename(output)
-                )
+            st.download_button(
+                "⬇️ Baixar Laudo (.docx)",
+                data=laudo_bytes,
+                file_name=f"{st.session_state.get('selected_process_id')}_LAUDO.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+            )
         except Exception:
             fallback = os.path.join(
                 OUTPUT_FOLDER,
                 f"{st.session_state.get('selected_process_id')}_LAUDO_DEBUG.json"
             )
-            with open(fallback, "w", encoding="utf-8") as fp:
-                json.dump(dados, fp, indent=2, ensure_ascii=False)
+            with open(fallback, "wb") as fp:
+                fp.write(encode_processo(processo, compact=False))
 
             st.warning("Erro no template. Gerado arquivo JSON para verificação.")
             with open(fallback, "rb") as f:
@@ -803,7 +900,7 @@ def render_sidebar_controls():
         processos = []
 
     if processos:
-        choice = st.sidebar.selectbox("Processos encontrados:", processos)
+        choice = st.sidebar.selectbox("Processos encontrados:", processos, format_func=format_process_label)
 
         if st.sidebar.button("📂 Carregar Processo"):
             load_process(choice)
@@ -833,6 +930,10 @@ def render_sidebar_controls():
         if save_current_state():
             st.sidebar.success("Estado salvo.")
 
+    st.sidebar.markdown("---")
+    if st.sidebar.checkbox("🧠 Mostrar uso de memória da sessão", key="mostrar_memoria"):
+        render_memory_panel()
+
     st.sidebar.markdown("---")
     st.sidebar.caption("Tema claro/escuro pode ser alternado no topo da tela.")
 
@@ -872,6 +973,9 @@ def main_app_ui():
 
     st.markdown(css, unsafe_allow_html=True)
 
+    # Uploads grandes vão para o disco antes de renderizar (menor RSS por sessão)
+    spill_session_state()
+
     # Painéis laterais
     render_sidebar_etapas()
     render_sidebar_controls()
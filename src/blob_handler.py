@@ -0,0 +1,251 @@
+"""
+blob_handler.py
+Armazenamento endereçado por conteúdo (SHA-256) das imagens de anexos e adendos.
+
+Cada imagem é gravada uma única vez em data/blobs/<aa>/<sha256>, mesmo que
+usada por vários processos. O JSON do processo guarda apenas a referência
+('bytes_ref') e os bytes só são lidos quando o laudo é gerado.
+As referências são contadas por processo: a imagem é apagada quando nenhum
+processo a utiliza mais. Uma imagem recém-gravada (put_blob) e ainda não
+referenciada não é apagada por outro dono antes que o seu processo a registre;
+se nunca for registrada, sweep_orphan_blobs a remove depois de BLOB_GRACE_SECONDS.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# ============================================================
+# CONFIGURAÇÃO DO DIRETÓRIO DE BLOBS
+# ============================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BLOB_DIR = os.path.join(BASE_DIR, "data", "blobs")
+REFS_FILE = os.path.join(BLOB_DIR, "refs.json")
+
+os.makedirs(BLOB_DIR, exist_ok=True)
+
+# Protege o arquivo de referências entre sessões Streamlit (threads do mesmo servidor).
+# Toda leitura/gravação de refs.json e toda remoção de blob acontecem sob este lock.
+_REFS_LOCK = threading.Lock()
+
+# Mapa de referências já lido, reaproveitado enquanto refs.json não mudar
+_REFS_CACHE: Dict[str, Any] = {"mtime_ns": None, "refs": {}}
+
+# Blobs gravados e ainda não referenciados: {sha256: instante do put_blob (monotonic)}
+_PENDENTES: Dict[str, float] = {}
+
+# Prazo para o dono registrar um blob recém-gravado (e idade mínima para a varredura)
+BLOB_GRACE_SECONDS = 60 * 60
+
+
+# ============================================================
+# FUNÇÕES AUXILIARES
+# ============================================================
+
+def get_blob_path(sha256: str) -> str:
+    """
+    Retorna o caminho do blob. Usa os 2 primeiros caracteres do hash como
+    subpasta para não concentrar milhares de arquivos num único diretório.
+    """
+    return os.path.join(BLOB_DIR, sha256[:2], sha256)
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _load_refs() -> Dict[str, Dict[str, int]]:
+    """
+    Mapa {sha256: {process_id: quantidade}} ({} se ausente). Chamar sob _REFS_LOCK:
+    o dict retornado é o do cache, relido só quando refs.json muda.
+    """
+    mtime_ns = _mtime_ns(REFS_FILE)
+    if mtime_ns is None or mtime_ns != _REFS_CACHE["mtime_ns"]:
+        try:
+            with open(REFS_FILE, "r", encoding="utf-8") as f:
+                refs = json.load(f)
+        except Exception:
+            refs = {}
+        _REFS_CACHE["mtime_ns"], _REFS_CACHE["refs"] = mtime_ns, refs
+    return _REFS_CACHE["refs"]
+
+
+def _save_refs(refs: Dict[str, Dict[str, int]]) -> None:
+    """Grava o mapa de referências via arquivo temporário único + os.replace."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(REFS_FILE), prefix="refs.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(refs, f)
+        os.replace(tmp_path, REFS_FILE)
+    except BaseException:
+        _REFS_CACHE["mtime_ns"] = None
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _REFS_CACHE["mtime_ns"], _REFS_CACHE["refs"] = _mtime_ns(REFS_FILE), refs
+
+
+def _pendente(sha256: str, agora: float) -> bool:
+    """Gravado há menos de BLOB_GRACE_SECONDS e ainda não referenciado (chamar sob _REFS_LOCK)."""
+    inicio = _PENDENTES.get(sha256)
+    if inicio is None:
+        return False
+    if agora - inicio > BLOB_GRACE_SECONDS:
+        del _PENDENTES[sha256]
+        return False
+    return True
+
+
+def _remover_blob(sha256: str) -> None:
+    try:
+        os.remove(get_blob_path(sha256))
+    except OSError:
+        pass
+
+
+# ============================================================
+# FUNÇÕES PRINCIPAIS
+# ============================================================
+
+def put_blob(data: bytes) -> str:
+    """
+    Armazena os bytes (se ainda não existirem) e retorna o SHA-256.
+    A referência ao processo é registrada por sync_process_blobs.
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = get_blob_path(sha256)
+
+    tmp_path = None
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+    # Sob o lock: uma remoção concorrente do mesmo hash já terminou ou verá o blob como pendente
+    with _REFS_LOCK:
+        if tmp_path is not None:
+            os.replace(tmp_path, path)
+        elif not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        _PENDENTES[sha256] = time.monotonic()
+
+    return sha256
+
+
+def get_blob(sha256: str) -> Optional[bytes]:
+    """Lê os bytes do blob. Retorna None se o blob não existir."""
+    try:
+        with open(get_blob_path(sha256), "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def sync_process_blobs(process_id: str, hashes: Iterable[str]) -> None:
+    """
+    Define o conjunto de blobs referenciados pelo processo (com multiplicidade).
+    Blobs que deixam de ser usados por todos os processos são apagados, exceto
+    os recém-gravados que outro dono ainda vai registrar. refs.json só é
+    regravado quando as referências do processo mudam.
+    """
+    novas = Counter(h for h in hashes if h)
+
+    with _REFS_LOCK:
+        refs = _load_refs()
+        atuais = Counter({sha256: donos[process_id] for sha256, donos in refs.items() if process_id in donos})
+        if atuais == novas:
+            return
+
+        refs = {sha256: dict(donos) for sha256, donos in refs.items()}
+        orfaos = []
+
+        for sha256 in list(refs):
+            if process_id in refs[sha256] and sha256 not in novas:
+                del refs[sha256][process_id]
+                if not refs[sha256]:
+                    del refs[sha256]
+                    orfaos.append(sha256)
+
+        for sha256, quantidade in novas.items():
+            refs.setdefault(sha256, {})[process_id] = quantidade
+            _PENDENTES.pop(sha256, None)
+
+        _save_refs(refs)
+
+        agora = time.monotonic()
+        for sha256 in orfaos:
+            if not _pendente(sha256, agora):
+                _remover_blob(sha256)
+
+
+def collect_blob_refs(value: Any, refs: Optional[List[str]] = None) -> List[str]:
+    """
+    Handles de blob em 'value': os textos das chaves terminadas em '_ref'
+    (bytes_ref, imagem_bytes_ref, imagem_analise_bytes_ref...), em qualquer
+    nível de dicts e listas, com multiplicidade.
+    """
+    refs = [] if refs is None else refs
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, str):
+                if item and isinstance(key, str) and key.endswith("_ref"):
+                    refs.append(item)
+            elif isinstance(item, (dict, list)):
+                collect_blob_refs(item, refs)
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, (dict, list)):
+                collect_blob_refs(item, refs)
+    return refs
+
+
+def release_process_blobs(process_id: str) -> None:
+    """Remove todas as referências do processo (usado ao excluir o processo)."""
+    sync_process_blobs(process_id, [])
+
+
+def list_blob_owners(prefix: str = "") -> Set[str]:
+    """Donos com alguma referência registrada (só os que começam com 'prefix')."""
+    with _REFS_LOCK:
+        refs = _load_refs()
+        return {owner for owners in refs.values() for owner in owners if owner.startswith(prefix)}
+
+
+def sweep_orphan_blobs(max_age: float = BLOB_GRACE_SECONDS) -> List[str]:
+    """
+    Remove os blobs sem nenhuma referência gravados há mais de 'max_age' segundos
+    (ex.: put_blob de uma sessão que terminou antes de registrá-los).
+    Retorna os hashes removidos.
+    """
+    limite = time.time() - max_age
+    removidos = []
+    with _REFS_LOCK:
+        refs = _load_refs()
+        agora = time.monotonic()
+        for pasta, _, arquivos in os.walk(BLOB_DIR):
+            if os.path.abspath(pasta) == os.path.abspath(BLOB_DIR):
+                continue
+            for nome in arquivos:
+                if nome.endswith(".tmp") or nome in refs or _pendente(nome, agora):
+                    continue
+                try:
+                    if os.stat(os.path.join(pasta, nome)).st_mtime > limite:
+                        continue
+                except OSError:
+                    continue
+                _remover_blob(nome)
+                removidos.append(nome)
+    return removidos
@@ -0,0 +1,362 @@
+"""
+chart_handler.py
+Gráfico radar dos Elementos de Ordem Geral (EOG).
+
+O gráfico depende apenas dos cinco valores de EOG, cada um convertido para
+0, 1 ou 2 (ver EOG_VALORES_RADAR): há no máximo 3^5 = 243 gráficos distintos.
+Cada um é desenhado uma única vez e os bytes ficam em memória e em disco
+(data/cache_graficos), servindo tanto à página quanto ao laudo DOCX.
+O nome do arquivo inclui VERSAO_RADAR: ao mudar o desenho, incremente-a e
+os arquivos das versões anteriores são apagados na primeira gravação.
+Há dois desenhistas, escolhidos por instalação (RADAR_BACKEND ou a
+variável de ambiente LAUDO_RADAR_BACKEND):
+- "leve" (padrão): geometria simples, SVG montado em texto e PNG com
+  Pillow (ImageDraw); não importa o matplotlib.
+- "matplotlib": maior qualidade tipográfica; o matplotlib só é importado
+  no primeiro desenho e usa a API orientada a objetos (Figure), sem o
+  estado global do pyplot.
+"""
+
+import itertools
+import math
+import os
+import tempfile
+from functools import lru_cache
+from io import BytesIO
+from typing import Callable, Dict, List, Optional, Tuple
+from html import escape
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHART_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache_graficos")
+
+# Ordem dos eixos do radar e rótulos exibidos
+EOG_ORDEM = (
+    "HABILIDADE_VELOCIDADE",
+    "ESPONTANEIDADE_DINAMISMO",
+    "CALIBRE",
+    "ALINHAMENTO_GRAFICO",
+    "ATAQUES_REMATES",
+)
+
+EOG_ROTULOS = {
+    "HABILIDADE_VELOCIDADE": "Habilidade / Velocidade",
+    "ESPONTANEIDADE_DINAMISMO": "Espontaneidade / Dinamismo",
+    "CALIBRE": "Calibre",
+    "ALINHAMENTO_GRAFICO": "Alinhamento Gráfico",
+    "ATAQUES_REMATES": "Ataques / Remates",
+}
+
+EOG_VALORES_RADAR = {
+    "ADEQUADO": 2,
+    "LIMITADO": 1,
+    "DIVERGENTE": 0,
+    "PENDENTE": 1,
+}
+
+TITULO_RADAR = "Análise dos Elementos de Ordem Geral (EOG)"
+ROTULOS_NIVEIS = ("Divergente", "Limitado", "Adequado")
+DPI_GRAFICO = 100
+FORMATOS = ("png", "svg")
+
+# Versão do desenho (layout, cores, fontes): incrementar a cada mudança visual
+VERSAO_RADAR = 1
+
+BACKENDS = ("leve", "matplotlib")
+RADAR_BACKEND = os.environ.get("LAUDO_RADAR_BACKEND", "leve")
+
+# Desenho "leve": tela de 600x600 px (6 pol a 100 DPI, como no matplotlib)
+TAMANHO_PX = 600
+RAIO_PX = 170
+MARGEM_PX = 8
+COR_LINHA = (31, 119, 180)  # azul padrão do matplotlib (C0)
+COR_GRADE = (176, 176, 176)
+COR_TEXTO = (38, 38, 38)
+SUPERAMOSTRAGEM = 2  # PNG desenhado em escala maior e reduzido (antisserrilhado)
+
+# Versões antigas são removidas uma vez por processo (na primeira gravação)
+_VERSOES_PODADAS = {"feito": False}
+
+
+# ============================================================
+# FUNÇÕES AUXILIARES
+# ============================================================
+
+def valores_radar(eog_data: Dict[str, str]) -> Tuple[int, ...]:
+    """Converte {EOG: opção} na tupla de valores (0, 1, 2) na ordem dos eixos."""
+    return tuple(EOG_VALORES_RADAR.get(eog_data.get(k, "PENDENTE"), 1) for k in EOG_ORDEM)
+
+
+def _cache_path(valores: Tuple[int, ...], formato: str, backend: str) -> str:
+    nome = f"radar_v{VERSAO_RADAR}_{backend}_{''.join(map(str, valores))}.{formato}"
+    return os.path.join(CHART_CACHE_DIR, nome)
+
+
+def podar_versoes_antigas() -> int:
+    """Apaga do cache em disco os radares de outras versões do desenho. Retorna quantos."""
+    prefixo_atual = f"radar_v{VERSAO_RADAR}_"
+    try:
+        nomes = os.listdir(CHART_CACHE_DIR)
+    except OSError:
+        return 0
+    removidos = 0
+    for nome in nomes:
+        if not nome.startswith("radar_") or nome.startswith(prefixo_atual) or nome.endswith(".tmp"):
+            continue
+        try:
+            os.remove(os.path.join(CHART_CACHE_DIR, nome))
+            removidos += 1
+        except OSError:
+            pass
+    return removidos
+
+
+def _renderizar_matplotlib(valores: Tuple[int, ...], formato: str) -> bytes:
+    """Desenha o radar com matplotlib.figure.Figure (sem pyplot)."""
+    try:
+        from matplotlib.figure import Figure
+    except ImportError as e:
+        # Dependência opcional: só o backend "matplotlib" precisa dela
+        raise ImportError("matplotlib não instalado: instale-o ou use o backend 'leve' "
+                          "(LAUDO_RADAR_BACKEND=leve)") from e
+
+    n = len(EOG_ORDEM)
+    angulos = [i / n * 2 * math.pi for i in range(n)]
+    angulos_fechado = angulos + angulos[:1]
+    valores_fechado = list(valores) + list(valores[:1])
+
+    fig = Figure(figsize=(6, 6))
+    ax = fig.add_subplot(projection="polar")
+
+    ax.plot(angulos_fechado, valores_fechado, linewidth=2)
+    ax.fill(angulos_fechado, valores_fechado, alpha=0.3)
+
+    ax.set_xticks(angulos)
+    ax.set_xticklabels([EOG_ROTULOS[k] for k in EOG_ORDEM], fontsize=9)
+
+    ax.set_yticks([0, 1, 2])
+    ax.set_yticklabels(list(ROTULOS_NIVEIS))
+
+    ax.set_ylim(0, 2)
+
+    ax.set_title(TITULO_RADAR, y=1.1)
+
+    buffer = BytesIO()
+    fig.savefig(buffer, format=formato, dpi=DPI_GRAFICO)
+    return buffer.getvalue()
+
+
+def _ponto(angulo: float, raio: float, escala: float = 1.0) -> Tuple[float, float]:
+    """Coordenada na tela (y para baixo) do ponto polar; ângulo 0 à direita, sentido anti-horário."""
+    centro = TAMANHO_PX / 2 * escala
+    return (centro + raio * escala * math.cos(angulo), centro - raio * escala * math.sin(angulo))
+
+
+def _poligono(valores: Tuple[int, ...], escala: float = 1.0) -> List[Tuple[float, float]]:
+    n = len(valores)
+    return [_ponto(i / n * 2 * math.pi, v / 2 * RAIO_PX, escala) for i, v in enumerate(valores)]
+
+
+def _layout_rotulo(angulo: float, rotulo: str, medir: Callable[[str], float],
+                   altura_linha: float, escala: float = 1.0) -> List[Tuple[str, float, float]]:
+    """
+    Posiciona o rótulo do eixo: à direita do ponto no lado direito do gráfico,
+    à esquerda no lado esquerdo, centralizado em cima/embaixo. Se não couber na
+    tela, quebra em duas linhas no " / ". Retorna [(linha, x esquerdo, y do centro)].
+    """
+    x, y = _ponto(angulo, RAIO_PX + 18, escala)
+    cos = math.cos(angulo)
+    margem = MARGEM_PX * escala
+    limite = TAMANHO_PX * escala - margem
+
+    def esquerda(largura: float) -> float:
+        if abs(cos) < 0.2:
+            return x - largura / 2
+        return x if cos > 0 else x - largura
+
+    linhas = [rotulo]
+    largura = medir(rotulo)
+    if (esquerda(largura) < margem or esquerda(largura) + largura > limite) and " / " in rotulo:
+        inicio, fim = rotulo.split(" / ", 1)
+        linhas = [inicio + " /", fim]
+        largura = max(medir(linha) for linha in linhas)
+
+    x_esq = min(max(esquerda(largura), margem), limite - largura)
+    y_topo = y - altura_linha * (len(linhas) - 1) / 2
+    return [(linha, x_esq, y_topo + i * altura_linha) for i, linha in enumerate(linhas)]
+
+
+def _rgb(cor: Tuple[int, int, int]) -> str:
+    return "#%02x%02x%02x" % cor
+
+
+def _renderizar_svg(valores: Tuple[int, ...]) -> bytes:
+    """Radar em SVG montado diretamente (sem dependências)."""
+    n = len(EOG_ORDEM)
+    centro = TAMANHO_PX / 2
+    partes = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{TAMANHO_PX}" height="{TAMANHO_PX}" '
+        f'viewBox="0 0 {TAMANHO_PX} {TAMANHO_PX}" font-family="DejaVu Sans, Arial, sans-serif">',
+        f'<rect width="100%" height="100%" fill="#ffffff"/>',
+        f'<text x="{centro}" y="40" font-size="14" text-anchor="middle" fill="{_rgb(COR_TEXTO)}">'
+        f'{escape(TITULO_RADAR)}</text>',
+    ]
+
+    # Grade: circunferências dos níveis 1 e 2 e raios de cada eixo
+    for nivel in (1, 2):
+        partes.append(f'<circle cx="{centro}" cy="{centro}" r="{nivel / 2 * RAIO_PX:.1f}" '
+                      f'fill="none" stroke="{_rgb(COR_GRADE)}" stroke-width="0.8"/>')
+    for i, chave in enumerate(EOG_ORDEM):
+        angulo = i / n * 2 * math.pi
+        x, y = _ponto(angulo, RAIO_PX)
+        partes.append(f'<line x1="{centro}" y1="{centro}" x2="{x:.1f}" y2="{y:.1f}" '
+                      f'stroke="{_rgb(COR_GRADE)}" stroke-width="0.8"/>')
+        # Sem medir a fonte: largura estimada em ~0,6 do corpo por caractere
+        for linha, tx, ty in _layout_rotulo(angulo, EOG_ROTULOS[chave], lambda t: 0.6 * 12 * len(t), 14):
+            partes.append(f'<text x="{tx:.1f}" y="{ty + 4:.1f}" font-size="12" '
+                          f'fill="{_rgb(COR_TEXTO)}">{escape(linha)}</text>')
+
+    # Rótulos dos níveis, ao longo de um eixo diagonal (como no matplotlib)
+    for nivel, rotulo in enumerate(ROTULOS_NIVEIS):
+        x, y = _ponto(math.radians(22.5), nivel / 2 * RAIO_PX)
+        partes.append(f'<text x="{x + 4:.1f}" y="{y - 4:.1f}" font-size="10" fill="{_rgb(COR_TEXTO)}">{rotulo}</text>')
+
+    pontos = " ".join(f"{x:.1f},{y:.1f}" for x, y in _poligono(valores))
+    partes.append(f'<polygon points="{pontos}" fill="{_rgb(COR_LINHA)}" fill-opacity="0.3" '
+                  f'stroke="{_rgb(COR_LINHA)}" stroke-width="2" stroke-linejoin="round"/>')
+    partes.append("</svg>")
+    return "\n".join(partes).encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _fonte(tamanho: int):
+    """DejaVu Sans (acentos), se instalada; senão a fonte embutida do Pillow."""
+    from PIL import ImageFont
+    for nome in ("DejaVuSans.ttf", "Arial.ttf"):
+        try:
+            return ImageFont.truetype(nome, tamanho)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=tamanho)
+    except TypeError:
+        # Pillow < 10.1: fonte bitmap de tamanho fixo
+        return ImageFont.load_default()
+
+
+def _renderizar_png_pillow(valores: Tuple[int, ...]) -> bytes:
+    """Radar em PNG com Pillow (ImageDraw), desenhado em escala maior e reduzido."""
+    from PIL import Image, ImageDraw
+
+    k = SUPERAMOSTRAGEM
+    n = len(EOG_ORDEM)
+    lado = TAMANHO_PX * k
+    centro = lado / 2
+
+    img = Image.new("RGB", (lado, lado), "white")
+    draw = ImageDraw.Draw(img)
+
+    for nivel in (1, 2):
+        r = nivel / 2 * RAIO_PX * k
+        draw.ellipse((centro - r, centro - r, centro + r, centro + r), outline=COR_GRADE, width=k)
+    fonte_eixo = _fonte(12 * k)
+    for i, chave in enumerate(EOG_ORDEM):
+        angulo = i / n * 2 * math.pi
+        draw.line((centro, centro) + _ponto(angulo, RAIO_PX, k), fill=COR_GRADE, width=k)
+        medir = lambda t: draw.textlength(t, font=fonte_eixo)
+        for linha, x, y in _layout_rotulo(angulo, EOG_ROTULOS[chave], medir, 14 * k, k):
+            draw.text((x, y), linha, fill=COR_TEXTO, font=fonte_eixo, anchor="lm")
+
+    fonte_nivel = _fonte(10 * k)
+    for nivel, rotulo in enumerate(ROTULOS_NIVEIS):
+        x, y = _ponto(math.radians(22.5), nivel / 2 * RAIO_PX, k)
+        draw.text((x + 4 * k, y - 4 * k), rotulo, fill=COR_TEXTO, font=fonte_nivel, anchor="ls")
+
+    draw.text((centro, 40 * k), TITULO_RADAR, fill=COR_TEXTO, font=_fonte(14 * k), anchor="ms")
+
+    # Preenchimento translúcido numa camada própria, depois o contorno
+    pontos = _poligono(valores, k)
+    camada = Image.new("L", img.size, 0)
+    ImageDraw.Draw(camada).polygon(pontos, fill=int(255 * 0.3))
+    img.paste(Image.new("RGB", img.size, COR_LINHA), mask=camada)
+    draw.line(pontos + pontos[:1], fill=COR_LINHA, width=2 * k, joint="curve")
+
+    # reduce(): média de blocos k x k, bem mais rápida que LANCZOS para fator inteiro
+    img = img.reduce(k)
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _renderizar_leve(valores: Tuple[int, ...], formato: str) -> bytes:
+    if formato == "svg":
+        return _renderizar_svg(valores)
+    return _renderizar_png_pillow(valores)
+
+
+_RENDERIZADORES = {
+    "leve": _renderizar_leve,
+    "matplotlib": _renderizar_matplotlib,
+}
+
+
+@lru_cache(maxsize=None)
+def _radar_bytes(valores: Tuple[int, ...], formato: str, backend: str) -> bytes:
+    """Bytes do radar: memória → disco → desenho (gravado no disco para os próximos processos)."""
+    cache_path = _cache_path(valores, formato, backend)
+    try:
+        with open(cache_path, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    resultado = _RENDERIZADORES[backend](valores, formato)
+
+    os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CHART_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(resultado)
+    os.replace(tmp_path, cache_path)
+
+    if not _VERSOES_PODADAS["feito"]:
+        _VERSOES_PODADAS["feito"] = True
+        podar_versoes_antigas()
+
+    return resultado
+
+
+# ============================================================
+# FUNÇÕES PRINCIPAIS
+# ============================================================
+
+def _backend(backend: Optional[str]) -> str:
+    backend = backend or RADAR_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de gráfico desconhecido: {backend} (use {', '.join(BACKENDS)})")
+    return backend
+
+
+def radar_eog(eog_data: Dict[str, str], formato: str = "png", backend: Optional[str] = None) -> bytes:
+    """
+    Retorna o gráfico radar dos EOG em 'png' ou 'svg'.
+    Valores ausentes contam como PENDENTE. 'backend' usa RADAR_BACKEND se omitido.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de gráfico não suportado: {formato}")
+    return _radar_bytes(valores_radar(eog_data), formato, _backend(backend))
+
+
+def pre_renderizar_radares(formato: str = "png", backend: Optional[str] = None) -> int:
+    """
+    Desenha e grava em disco todas as combinações possíveis (ex.: na instalação),
+    para que nenhum usuário espere pelo desenho. Retorna quantas foram geradas.
+    """
+    combinacoes = list(itertools.product(sorted(set(EOG_VALORES_RADAR.values())), repeat=len(EOG_ORDEM)))
+    backend = _backend(backend)
+    for valores in combinacoes:
+        _radar_bytes(valores, formato, backend)
+    return len(combinacoes)
+
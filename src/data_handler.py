@@ -2,11 +2,22 @@
 data_handler.py
 Backend responsável por salvar, carregar, apagar e listar processos.
 Compatível com o fluxo do arquivo pages/01_Gerar_laudo.py.
+
+A (de)serialização passa por encode_json/decode_json, que usam orjson ou
+msgspec quando instalados e o json da biblioteca padrão como reserva.
 """
 
 import os
 import json
-from typing import Any, Dict, List
+import sqlite3
+import tempfile
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.blob_handler import release_process_blobs
+from src.db_handler import indexar_conteudo, remover_conteudo
 
 # ============================================================
 # CONFIGURAÇÃO DO DIRETÓRIO DE DADOS
@@ -18,6 +29,175 @@ PROCESS_DATA_DIR = os.path.join(BASE_DIR, "data")
 # Garante que a pasta /data exista
 os.makedirs(PROCESS_DATA_DIR, exist_ok=True)
 
+# Padrões de gravação: o JSON sai indentado, como sempre foi gravado; o modo
+# compacto (sem indentação, mais rápido e menor) é opcional, por chamada
+# (compact=True) ou para a instalação (LAUDO_SAVE_COMPACT=1).
+# fsync garante durabilidade em queda de energia, ao custo de latência por save.
+SAVE_COMPACT = os.environ.get("LAUDO_SAVE_COMPACT", "0") == "1"
+SAVE_FSYNC = False
+
+# Saves parciais (patch_process_data) vão para um journal <id>.journal (JSON lines).
+# O journal é incorporado ao JSON quando passa do tamanho do próprio documento
+# (com um mínimo), o que mantém o custo amortizado de cada save proporcional à mudança.
+JOURNAL_MIN_COMPACT_BYTES = 64 * 1024
+
+# Chaves do documento refletidas no índice de metadados (ver get_process_index)
+INDEX_FIELDS = frozenset({"AUTOR", "AUTORES", "REU", "REUS", "status"})
+
+# Chaves (em qualquer nível) cujo valor não é texto útil para a busca
+SEARCH_SKIP_KEYS = frozenset({"id", "bytes", "bytes_ref"})
+
+# Serializa journal/compactação entre sessões Streamlit (threads do mesmo servidor)
+_JOURNAL_LOCK = threading.RLock()
+
+# Codec dos documentos JSON: "auto" usa o primeiro instalado entre orjson e
+# msgspec, com o json da biblioteca padrão como reserva (ou fixe um deles pela
+# variável de ambiente LAUDO_JSON_CODEC). Todos gravam JSON UTF-8 comum.
+JSON_CODECS = ("orjson", "msgspec", "json")
+JSON_CODEC = os.environ.get("LAUDO_JSON_CODEC", "auto")
+
+
+# ============================================================
+# CODEC JSON
+# ============================================================
+
+def _encode_iterable(obj: Any) -> list:
+    return list(obj)
+
+
+def _encode_date(obj: Any) -> str:
+    return obj.isoformat()
+
+
+# Tipos sem equivalente JSON, convertidos durante a própria serialização
+# (sem percorrer o documento antes). Qualquer outro tipo desconhecido — bytes,
+# imagens PIL, arquivos enviados — é gravado como null: os bytes moram no
+# blob store e o documento guarda só a referência ('bytes_ref').
+ENCODE_HOOKS: Dict[type, Callable[[Any], Any]] = {
+    set: _encode_iterable,
+    frozenset: _encode_iterable,
+    date: _encode_date,
+    datetime: _encode_date,
+}
+
+
+def _encode_default(obj: Any) -> Any:
+    hook = ENCODE_HOOKS.get(type(obj))
+    if hook is None:
+        hook = next((h for tipo, h in ENCODE_HOOKS.items() if isinstance(obj, tipo)), None)
+    return hook(obj) if hook is not None else None
+
+
+_TIPOS_BYTES = (bytes, bytearray, memoryview)
+_TIPOS_COM_BYTES = (dict, list, tuple) + _TIPOS_BYTES
+
+
+def _sem_bytes(obj: Any) -> Any:
+    """
+    'obj' com bytes/bytearray/memoryview trocados por None, como fazem os outros
+    codecs (via _encode_default). Só os dicts/listas no caminho até um bytes são
+    copiados; sem bytes, devolve o próprio 'obj' (e o estado nunca é alterado).
+    """
+    if isinstance(obj, _TIPOS_BYTES):
+        return None
+    if isinstance(obj, dict):
+        itens = obj.items()
+    elif isinstance(obj, (list, tuple)):
+        itens = enumerate(obj)
+    else:
+        return obj
+    copia = None
+    for chave, valor in itens:
+        if isinstance(valor, _TIPOS_COM_BYTES):
+            limpo = _sem_bytes(valor)
+            if limpo is not valor:
+                if copia is None:
+                    copia = dict(obj) if isinstance(obj, dict) else list(obj)
+                copia[chave] = limpo
+    return obj if copia is None else copia
+
+
+def _codec_orjson() -> Tuple[Callable[[Any, bool], bytes], Callable[[Any], Any]]:
+    import orjson
+
+    # date/datetime são nativos no orjson (mesmo texto de isoformat())
+    opcoes = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any, compact: bool = True) -> bytes:
+        return orjson.dumps(obj, default=_encode_default,
+                            option=opcoes if compact else opcoes | orjson.OPT_INDENT_2)
+
+    return dumps, orjson.loads
+
+
+def _codec_msgspec() -> Tuple[Callable[[Any, bool], bytes], Callable[[Any], Any]]:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=_encode_default)
+    decoder = msgspec.json.Decoder()
+
+    def dumps(obj: Any, compact: bool = True) -> bytes:
+        # O msgspec grava bytes em base64 sem passar pelo enc_hook: os bytes saem
+        # antes, para que o arquivo seja o mesmo com qualquer codec (bytes -> null)
+        conteudo = encoder.encode(_sem_bytes(obj))
+        return conteudo if compact else msgspec.json.format(conteudo, indent=4)
+
+    def loads(conteudo: Any) -> Any:
+        try:
+            return decoder.decode(conteudo)
+        except msgspec.DecodeError as e:
+            # Mesmo contrato dos outros codecs (json.JSONDecodeError é um ValueError)
+            raise ValueError(str(e)) from e
+
+    return dumps, loads
+
+
+def _codec_json() -> Tuple[Callable[[Any, bool], bytes], Callable[[Any], Any]]:
+    def dumps(obj: Any, compact: bool = True) -> bytes:
+        if compact:
+            texto = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_encode_default)
+        else:
+            texto = json.dumps(obj, ensure_ascii=False, indent=4, default=_encode_default)
+        return texto.encode("utf-8")
+
+    return dumps, json.loads
+
+
+_CODECS = {"orjson": _codec_orjson, "msgspec": _codec_msgspec, "json": _codec_json}
+
+
+@lru_cache(maxsize=None)
+def _codec(nome: str) -> Tuple[str, Callable[[Any, bool], bytes], Callable[[Any], Any]]:
+    if nome != "auto" and nome not in JSON_CODECS:
+        raise ValueError(f"Codec JSON desconhecido: {nome} (use auto, {', '.join(JSON_CODECS)})")
+    for candidato in (JSON_CODECS if nome == "auto" else (nome,)):
+        try:
+            dumps, loads = _CODECS[candidato]()
+        except ImportError:
+            if nome != "auto":
+                raise
+            continue
+        return candidato, dumps, loads
+    raise RuntimeError("Nenhum codec JSON disponível.")  # inalcançável: o json sempre existe
+
+
+def json_codec_name(codec: Optional[str] = None) -> str:
+    """Nome do codec efetivamente usado ('codec' usa JSON_CODEC se omitido)."""
+    return _codec(codec or JSON_CODEC)[0]
+
+
+def encode_json(obj: Any, compact: bool = True, codec: Optional[str] = None) -> bytes:
+    """
+    Serializa 'obj' em JSON UTF-8. set/frozenset viram listas e date/datetime
+    texto ISO-8601 (ver ENCODE_HOOKS); compact=False gera JSON indentado.
+    """
+    return _codec(codec or JSON_CODEC)[1](obj, compact)
+
+
+def decode_json(conteudo: Any, codec: Optional[str] = None) -> Any:
+    """Lê JSON de bytes ou str. JSON inválido levanta ValueError."""
+    return _codec(codec or JSON_CODEC)[2](conteudo)
+
 
 # ============================================================
 # FUNÇÕES PRINCIPAIS DE BACKEND
@@ -30,43 +210,207 @@ def get_process_file_path(process_id: str) -> str:
     return os.path.join(PROCESS_DATA_DIR, f"{process_id}.json")
 
 
-def save_process_data(process_id: str, data: Dict[str, Any]) -> None:
+def get_process_journal_path(process_id: str) -> str:
+    """
+    Retorna o caminho do journal de alterações parciais do processo.
+    """
+    return os.path.join(PROCESS_DATA_DIR, f"{process_id}.journal")
+
+
+def _fsync_dir(dir_path: str) -> None:
+    """Sincroniza a entrada de diretório após o os.replace (POSIX)."""
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_process_file(process_id: str, data: Dict[str, Any], compact: bool, fsync: bool) -> None:
     """
-    Salva o dicionário de dados do processo em formato JSON.
+    Grava o JSON de forma atômica: o conteúdo vai para um arquivo temporário na
+    mesma pasta e só então substitui o original (os.replace).
     """
     file_path = get_process_file_path(process_id)
+    dir_path = os.path.dirname(file_path)
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    conteudo = encode_json(data, compact)
+
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, prefix=f".{process_id}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(conteudo)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    if fsync:
+        _fsync_dir(dir_path)
+
+
+def _remove_journal(process_id: str) -> None:
+    try:
+        os.remove(get_process_journal_path(process_id))
+    except FileNotFoundError:
+        pass
+
+
+def save_process_data(process_id: str, data: Dict[str, Any],
+                      compact: Optional[bool] = None, fsync: Optional[bool] = None) -> None:
+    """
+    Salva o dicionário de dados do processo em formato JSON (documento completo).
+
+    A gravação é atômica: uma queda no meio da gravação nunca deixa o JSON
+    truncado. O journal de saves parciais é descartado, pois 'data' o substitui.
+    compact/fsync usam SAVE_COMPACT/SAVE_FSYNC quando não informados.
+    """
+    compact = SAVE_COMPACT if compact is None else compact
+    fsync = SAVE_FSYNC if fsync is None else fsync
+
+    was_fresh = not _index_is_stale()
+    with _JOURNAL_LOCK:
+        # Remove antes de gravar: um journal antigo nunca é reaplicado sobre o documento novo
+        _remove_journal(process_id)
+        _write_process_file(process_id, data, compact, fsync)
+    _refresh_index(process_id, data, was_fresh)
+    _update_search_index(process_id, data, replace=True)
+
+
+def _read_journal(process_id: str) -> List[Dict[str, Any]]:
+    """
+    Lê as alterações do journal, na ordem em que foram gravadas.
+    Linhas inválidas (ex.: última linha truncada por uma queda) são ignoradas.
+    """
+    try:
+        with open(get_process_journal_path(process_id), "rb") as f:
+            linhas = f.readlines()
+    except FileNotFoundError:
+        return []
+
+    deltas = []
+    for linha in linhas:
+        try:
+            delta = decode_json(linha)
+        except ValueError:
+            continue
+        if isinstance(delta, dict):
+            deltas.append(delta)
+    return deltas
+
+
+def compact_process_journal(process_id: str) -> None:
+    """
+    Incorpora o journal ao JSON do processo e remove o journal.
+    Se houver uma queda entre as duas etapas, reaplicar o journal é inofensivo
+    (as chaves recebem os mesmos valores).
+    """
+    with _JOURNAL_LOCK:
+        if not os.path.exists(get_process_journal_path(process_id)):
+            return
+        data = load_process_data(process_id)
+        _write_process_file(process_id, data, SAVE_COMPACT, SAVE_FSYNC)
+        _remove_journal(process_id)
+
+
+def patch_process_data(process_id: str, delta: Dict[str, Any], fsync: Optional[bool] = None) -> None:
+    """
+    Mescla 'delta' no documento salvo do processo (as chaves de primeiro nível
+    de 'delta' substituem as existentes; as demais são preservadas).
+
+    A alteração é anexada ao journal, custando o tamanho da mudança e não o do
+    documento inteiro. O journal é compactado quando fica maior que o JSON.
+    """
+    fsync = SAVE_FSYNC if fsync is None else fsync
+    file_path = get_process_file_path(process_id)
+    journal_path = get_process_journal_path(process_id)
+    was_fresh = not _index_is_stale()
+
+    with _JOURNAL_LOCK:
+        # Processo ainda sem documento: o próprio delta vira o documento
+        if not os.path.exists(file_path):
+            _write_process_file(process_id, delta, SAVE_COMPACT, fsync)
+            _refresh_index(process_id, delta, was_fresh)
+            _update_search_index(process_id, delta, replace=True)
+            return
+
+        linha = encode_json(delta) + b"\n"
+        with open(journal_path, "ab+") as f:
+            # Última linha truncada por uma queda: começa numa linha nova para não corromper esta
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    linha = b"\n" + linha
+            f.write(linha)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        journal_size = os.path.getsize(journal_path)
+        if journal_size > max(JOURNAL_MIN_COMPACT_BYTES, os.path.getsize(file_path)):
+            compact_process_journal(process_id)
+
+    # Metadados do índice só mudam quando o delta toca nesses campos
+    if INDEX_FIELDS.intersection(delta):
+        _refresh_index(process_id, load_process_data(process_id), was_fresh)
+    else:
+        _touch_index(was_fresh)
+    # As chaves do delta substituem as do documento: basta reindexá-las
+    _update_search_index(process_id, delta, replace=False)
 
 
 def load_process_data(process_id: str) -> Dict[str, Any]:
     """
-    Carrega os dados do arquivo JSON do processo.
+    Carrega os dados do arquivo JSON do processo, já com as alterações do journal.
     Se o arquivo não existir, retorna {}.
     """
     file_path = get_process_file_path(process_id)
 
-    if not os.path.exists(file_path):
-        return {}
+    # JSON e journal lidos juntos: uma compactação no meio reescreveria o JSON e
+    # apagaria o journal entre as duas leituras, perdendo as alterações do journal
+    with _JOURNAL_LOCK:
+        if not os.path.exists(file_path):
+            return {}
 
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        try:
+            with open(file_path, "rb") as f:
+                data = decode_json(f.read())
 
-    except Exception:
-        return {}
+        except Exception:
+            return {}
+
+        deltas = _read_journal(process_id)
+
+    for delta in deltas:
+        data.update(delta)
+
+    return data
 
 
 def delete_process(process_id: str) -> bool:
     """
-    Remove o arquivo JSON do processo.
+    Remove o arquivo JSON do processo e libera suas imagens no blob store.
     Retorna True se removido.
     """
     file_path = get_process_file_path(process_id)
 
     if os.path.exists(file_path):
-        os.remove(file_path)
+        was_fresh = not _index_is_stale()
+        with _JOURNAL_LOCK:
+            os.remove(file_path)
+            _remove_journal(process_id)
+        _refresh_index(process_id, None, was_fresh)
+        _update_search_index(process_id, None)
+        release_process_blobs(process_id)
         return True
 
     return False
@@ -92,12 +436,222 @@ def list_process_files() -> List[str]:
 def list_processes() -> List[str]:
     """
     Função esperada pelo frontend.
-    Retorna *somente os IDs* dos processos.
+    Retorna *somente os IDs* dos processos, ordenados, a partir do índice de metadados.
     Exemplo: ['a1b2c3d4', 'x9y8z7w6']
     """
-    files = list_process_files()
-    ids = [os.path.splitext(f)[0] for f in files]
-    return sorted(ids)
+    with _INDEX_LOCK:
+        get_process_index()
+        return list(_INDEX_CACHE["ids"])
+
+
+# ============================================================
+# ÍNDICE DE METADADOS (listagem sem abrir cada JSON)
+# ============================================================
+
+# Campos mantidos no índice para cada processo: id, AUTOR, REU, status, mtime, size.
+# O índice guarda o mtime de /data observado na última gravação; se /data mudar por
+# fora do data_handler (ex.: cópia manual de JSONs), o índice é reconstruído.
+# Ele fica numa subpasta para que a sua própria gravação não altere o mtime de /data.
+INDEX_DIR_NAME = "index"
+INDEX_FILE_NAME = "processos.json"
+
+_INDEX_LOCK = threading.RLock()
+_INDEX_CACHE: Dict[str, Any] = {"mtime_ns": None, "dir_mtime_ns": None, "index": {}, "ids": []}
+
+
+def get_index_file_path() -> str:
+    """
+    Retorna o caminho do arquivo de índice de metadados.
+    """
+    return os.path.join(PROCESS_DATA_DIR, INDEX_DIR_NAME, INDEX_FILE_NAME)
+
+
+def _data_dir_mtime_ns() -> int:
+    return os.stat(PROCESS_DATA_DIR).st_mtime_ns
+
+
+def _load_index_file() -> bool:
+    """Carrega o arquivo de índice no cache, se ele mudou. Retorna False se ausente/ilegível."""
+    index_path = get_index_file_path()
+    try:
+        mtime_ns = os.stat(index_path).st_mtime_ns
+        if _INDEX_CACHE["mtime_ns"] != mtime_ns:
+            with open(index_path, "rb") as f:
+                conteudo = decode_json(f.read())
+            _INDEX_CACHE.update(
+                mtime_ns=mtime_ns,
+                dir_mtime_ns=conteudo["dir_mtime_ns"],
+                index=conteudo["processos"],
+                ids=sorted(conteudo["processos"]),
+            )
+    except Exception:
+        return False
+    return True
+
+
+def _index_is_stale() -> bool:
+    """True se o índice não existe ou se /data mudou desde a sua última gravação."""
+    with _INDEX_LOCK:
+        if not _load_index_file():
+            return True
+        return _data_dir_mtime_ns() != _INDEX_CACHE["dir_mtime_ns"]
+
+
+def _index_entry(process_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Monta a entrada do índice (aceita as variantes AUTOR/AUTORES e REU/REUS)."""
+    size = 0
+    mtime = 0.0
+    for path in (get_process_file_path(process_id), get_process_journal_path(process_id)):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        size += st.st_size
+        mtime = max(mtime, st.st_mtime)
+
+    return {
+        "id": process_id,
+        "AUTOR": data.get("AUTOR", data.get("AUTORES", "N/A")),
+        "REU": data.get("REU", data.get("REUS", "N/A")),
+        "status": data.get("status"),
+        "mtime": mtime,
+        "size": size,
+    }
+
+
+def _write_index(index: Dict[str, Dict[str, Any]]) -> None:
+    """Grava o índice de forma atômica, junto com o mtime atual de /data."""
+    index_path = get_index_file_path()
+    index_dir = os.path.dirname(index_path)
+    os.makedirs(index_dir, exist_ok=True)
+    dir_mtime_ns = _data_dir_mtime_ns()
+
+    fd, tmp_path = tempfile.mkstemp(dir=index_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(encode_json({"dir_mtime_ns": dir_mtime_ns, "processos": index}))
+    os.replace(tmp_path, index_path)
+
+    _INDEX_CACHE.update(
+        mtime_ns=os.stat(index_path).st_mtime_ns,
+        dir_mtime_ns=dir_mtime_ns,
+        index=index,
+        ids=sorted(index),
+    )
+
+
+def rebuild_process_index() -> Dict[str, Dict[str, Any]]:
+    """
+    Reconstrói o índice lendo todos os JSONs da pasta /data.
+    """
+    with _INDEX_LOCK:
+        index = {}
+        for f in list_process_files():
+            process_id = os.path.splitext(f)[0]
+            index[process_id] = _index_entry(process_id, load_process_data(process_id))
+        _write_index(index)
+        return index
+
+
+def get_process_index() -> Dict[str, Dict[str, Any]]:
+    """
+    Retorna o índice {id: metadados}, reconstruindo-o se estiver desatualizado.
+    Enquanto o arquivo não muda, usa a cópia em memória (sem reler o disco).
+    """
+    with _INDEX_LOCK:
+        if _index_is_stale():
+            return rebuild_process_index()
+        return _INDEX_CACHE["index"]
+
+
+def _refresh_index(process_id: str, data: Optional[Dict[str, Any]], was_fresh: bool) -> None:
+    """
+    Atualiza (ou remove, se data=None) a entrada do processo após uma gravação.
+    Se o índice já estava desatualizado antes da operação, é deixado assim para
+    ser reconstruído na próxima leitura.
+    """
+    if not was_fresh:
+        return
+    with _INDEX_LOCK:
+        if not _load_index_file():
+            return
+        index = dict(_INDEX_CACHE["index"])
+        if data is None:
+            index.pop(process_id, None)
+        else:
+            index[process_id] = _index_entry(process_id, data)
+        _write_index(index)
+
+
+def _touch_index(was_fresh: bool) -> None:
+    """
+    Registra no índice o novo mtime de /data após mudanças que não alteram
+    metadados (ex.: criação/compactação do journal).
+    """
+    if not was_fresh:
+        return
+    with _INDEX_LOCK:
+        if _load_index_file() and _data_dir_mtime_ns() != _INDEX_CACHE["dir_mtime_ns"]:
+            _write_index(_INDEX_CACHE["index"])
+
+
+
+# ============================================================
+# ÍNDICE DE BUSCA TEXTUAL (FTS5, ver db_handler.buscar_conteudo)
+# ============================================================
+
+def _collect_text(value: Any, parts: List[str]) -> None:
+    """Acumula em 'parts' os textos de 'value' (percorrendo listas e dicionários)."""
+    if isinstance(value, str):
+        if value.strip():
+            parts.append(value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key not in SEARCH_SKIP_KEYS:
+                _collect_text(item, parts)
+    elif isinstance(value, list):
+        for item in value:
+            _collect_text(item, parts)
+
+
+def search_texts(data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Retorna {chave de primeiro nível: texto} para o índice de busca.
+    Chaves sem texto ficam com "" (são removidas do índice).
+    """
+    texts = {}
+    for key, value in data.items():
+        if key in SEARCH_SKIP_KEYS:
+            continue
+        parts: List[str] = []
+        _collect_text(value, parts)
+        texts[key] = "\n".join(parts)
+    return texts
+
+
+def _update_search_index(process_id: str, data: Optional[Dict[str, Any]], replace: bool = True) -> None:
+    """
+    Mantém o índice de busca do processo em dia. 'data' None remove o processo.
+    O índice é secundário: uma falha no SQLite não impede o save do JSON
+    (rebuild_search_index reconstrói tudo).
+    """
+    try:
+        if data is None:
+            remover_conteudo(process_id)
+        else:
+            indexar_conteudo(process_id, search_texts(data), substituir=replace)
+    except sqlite3.Error:
+        pass
+
+
+def rebuild_search_index() -> int:
+    """
+    Reindexa todos os processos da pasta /data (ex.: dados gravados antes da busca existir).
+    Retorna o número de processos indexados.
+    """
+    process_ids = list_processes()
+    for process_id in process_ids:
+        _update_search_index(process_id, load_process_data(process_id), replace=True)
+    return len(process_ids)
 
 
 # ============================================================
@@ -1,11 +1,30 @@
 import sqlite3
 import os
-from typing import List, Tuple
+import queue
+import threading
+import unicodedata
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 
 # O caminho padrão do banco de dados (usado em produção)
 # Ele cria o arquivo 'processos.db' na mesma pasta em que o script Streamlit está sendo executado.
-DB_PATH = "processos.db" 
+DB_PATH = "processos.db"
+
+# Conexões mantidas abertas por banco (reaproveitadas entre chamadas e sessões Streamlit)
+POOL_SIZE = 4
+
+# Tamanho do cache de comandos preparados de cada conexão
+CACHED_STATEMENTS = 256
+
+# Status de um processo recém-criado
+STATUS_INICIAL = "Em andamento"
+
+# Status que tiram o processo da lista de ativos na tela inicial
+STATUS_FINALIZADOS = ("Arquivado", "Concluído")
+
+# Tamanho padrão de página das consultas paginadas
+LIMITE_PADRAO = 20
 
 # --- Função de Conexão Centralizada (O Guardrail da Testabilidade) ---
 
@@ -15,18 +34,167 @@ def get_db_connection(db_path: str = DB_PATH) -> sqlite3.Connection:
 
     Se o 'db_path' for ':memory:', o Pytest usará um banco de dados temporário.
     Caso contrário, usará o 'processos.db' (produção).
+
+    A conexão sai configurada com WAL e synchronous=NORMAL e pode ser usada por
+    outras threads (o pool garante que só uma thread a use por vez).
     """
-    return sqlite3.connect(db_path)
+    conn = sqlite3.connect(
+        db_path,
+        timeout=30,
+        check_same_thread=False,
+        cached_statements=CACHED_STATEMENTS,
+    )
+    if db_path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
 
-# --- Funções CRUD (Criação, Leitura, Atualização, Exclusão) ---
+# --- Pool de Conexões ---
 
-def init_db(db_path: str = DB_PATH):
+class _ConnectionPool:
+    """
+    Pequeno pool de conexões de um banco. Conexões ociosas ficam abertas e são
+    reaproveitadas, com seus comandos preparados já em cache.
+    Para ':memory:' existe uma única conexão (senão cada uma seria um banco diferente).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.max_size = 1 if db_path == ":memory:" else POOL_SIZE
+        self.initialized = False
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.max_size:
+                self._created += 1
+                return get_db_connection(self.db_path)
+        return self._idle.get()
+
+    def release(self, conn: sqlite3.Connection):
+        # Nunca devolve ao pool uma conexão com transação pendente
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close_all(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+            self._created = 0
+            self.initialized = False
+
+_POOLS: Dict[str, _ConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+def _get_pool(db_path: str) -> _ConnectionPool:
+    with _POOLS_LOCK:
+        pool = _POOLS.get(db_path)
+        if pool is None:
+            pool = _POOLS[db_path] = _ConnectionPool(db_path)
+        return pool
+
+# Conexão emprestada a cada thread, por banco:
+# [conexão, dentro de transacao(), dados alterados, ações pós-commit]
+_EM_USO = threading.local()
+
+def _conexoes_da_thread() -> Dict[str, list]:
+    if not hasattr(_EM_USO, "conexoes"):
+        _EM_USO.conexoes = {}
+    return _EM_USO.conexoes
+
+@contextmanager
+def conexao(db_path: str = DB_PATH) -> Iterator[sqlite3.Connection]:
     """
-    Inicializa o banco de dados e cria a tabela 'processos' se ela não existir.
+    Empresta uma conexão do pool durante o bloco 'with' (somente leitura ou
+    quando o chamador controla o commit).
+    Chamadas aninhadas na mesma thread recebem a mesma conexão.
     """
-    conn = get_db_connection(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
+    em_uso = _conexoes_da_thread()
+    if db_path in em_uso:
+        yield em_uso[db_path][0]
+        return
+
+    pool = _get_pool(db_path)
+    conn = pool.acquire()
+    em_uso[db_path] = [conn, False, False, []]
+    try:
+        yield conn
+    finally:
+        del em_uso[db_path]
+        pool.release(conn)
+
+@contextmanager
+def transacao(db_path: str = DB_PATH) -> Iterator[sqlite3.Connection]:
+    """
+    Executa o bloco 'with' numa transação: commit ao final, rollback em caso de erro.
+    Uma transacao() aberta dentro de outra (mesma thread) participa da externa:
+    o commit ou rollback acontece uma única vez, ao final da mais externa.
+    """
+    with conexao(db_path) as conn:
+        estado = _conexoes_da_thread()[db_path]
+        if estado[1]:
+            yield conn
+            return
+        estado[1] = True
+        estado[2] = False
+        estado[3] = []
+        try:
+            with conn:
+                yield conn
+        finally:
+            estado[1] = False
+            acoes, estado[3] = estado[3], []
+        # Só depois do commit: um leitor não pode guardar em cache, sob a versão
+        # nova, dados ainda não confirmados
+        if estado[2]:
+            _incrementar_versao(db_path)
+        # Uma ação que falha não impede as demais; o primeiro erro é repassado
+        erro = None
+        for acao in acoes:
+            try:
+                acao()
+            except Exception as e:
+                erro = erro or e
+        if erro is not None:
+            raise erro
+
+def apos_commit(acao: Callable[[], None], db_path: str = DB_PATH):
+    """
+    Agenda 'acao' para depois do commit da transacao() mais externa desta thread
+    (ex.: apagar arquivos, que não voltam num rollback). Se a transação for
+    desfeita, a ação é descartada. Fora de uma transação, executa na hora.
+    """
+    estado = _conexoes_da_thread().get(db_path)
+    if estado is not None and estado[1]:
+        estado[3].append(acao)
+    else:
+        acao()
+
+def fechar_conexoes():
+    """
+    Fecha todas as conexões abertas pelos pools (ex.: ao final dos testes).
+    """
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+    for pool in pools:
+        pool.close_all()
+
+# --- Migrações de Esquema (PRAGMA user_version) ---
+
+def _migracao_001_tabela_processos(conn: sqlite3.Connection):
+    """Esquema original da tabela 'processos'."""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS processos (
             id TEXT PRIMARY KEY,
             autor TEXT,
@@ -35,72 +203,469 @@ def init_db(db_path: str = DB_PATH):
             atualizado_em TEXT
         )
     """)
-    conn.commit()
-    conn.close()
+
+def _migracao_002_atualizado_em_iso(conn: sqlite3.Connection):
+    """
+    Converte 'atualizado_em' de "dd/mm/aaaa HH:MM:SS" para ISO-8601
+    ("aaaa-mm-ddTHH:MM:SS"), que ordena corretamente como texto.
+    Um único UPDATE, sem trazer as linhas para o Python.
+    """
+    conn.execute("""
+        UPDATE processos
+        SET atualizado_em = substr(atualizado_em, 7, 4) || '-' || substr(atualizado_em, 4, 2) || '-'
+            || substr(atualizado_em, 1, 2)
+            || CASE WHEN length(atualizado_em) > 10 THEN 'T' || substr(atualizado_em, 12) ELSE '' END
+        WHERE atualizado_em GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]*'
+    """)
+
+def _migracao_003_indices(conn: sqlite3.Connection):
+    """Índices das consultas filtradas/paginadas da tela inicial."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_processos_status ON processos (status, atualizado_em)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_processos_atualizado_em ON processos (atualizado_em)")
+
+def _migracao_004_busca_textual(conn: sqlite3.Connection):
+    """
+    Busca textual (FTS5) no conteúdo dos processos. O texto fica em
+    'processos_conteudo' (uma linha por chave de primeiro nível do JSON) e o
+    índice 'processos_fts' é mantido por triggers (tabela de conteúdo externo).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS processos_conteudo (
+            rowid INTEGER PRIMARY KEY,
+            id TEXT NOT NULL,
+            chave TEXT NOT NULL,
+            texto TEXT NOT NULL,
+            UNIQUE (id, chave)
+        )
+    """)
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS processos_fts USING fts5(
+            texto, content='processos_conteudo', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS processos_conteudo_ai AFTER INSERT ON processos_conteudo BEGIN
+            INSERT INTO processos_fts (rowid, texto) VALUES (new.rowid, new.texto);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS processos_conteudo_ad AFTER DELETE ON processos_conteudo BEGIN
+            INSERT INTO processos_fts (processos_fts, rowid, texto) VALUES ('delete', old.rowid, old.texto);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS processos_conteudo_au AFTER UPDATE ON processos_conteudo BEGIN
+            INSERT INTO processos_fts (processos_fts, rowid, texto) VALUES ('delete', old.rowid, old.texto);
+            INSERT INTO processos_fts (rowid, texto) VALUES (new.rowid, new.texto);
+        END
+    """)
+
+def _migracao_005_coluna_busca(conn: sqlite3.Connection):
+    """
+    Coluna 'busca': número, autor e réu sem acentos e em minúsculas (ver
+    texto_busca). O LIKE do SQLite só ignora maiúsculas em ASCII ("JOSÉ" não
+    casaria com "josé"); com os dois lados normalizados, a busca ignora ambos.
+    """
+    conn.execute("ALTER TABLE processos ADD COLUMN busca TEXT NOT NULL DEFAULT ''")
+    linhas = conn.execute("SELECT id, autor, reu FROM processos").fetchall()
+    conn.executemany("UPDATE processos SET busca = ? WHERE id = ?",
+                     [(texto_busca(id, autor, reu), id) for id, autor, reu in linhas])
+
+# Ordem de aplicação: a posição na lista (1, 2, ...) é a versão gravada em user_version.
+# Novas alterações de esquema (ex.: ALTER TABLE ... ADD COLUMN) entram no final da lista.
+MIGRACOES = [
+    _migracao_001_tabela_processos,
+    _migracao_002_atualizado_em_iso,
+    _migracao_003_indices,
+    _migracao_004_busca_textual,
+    _migracao_005_coluna_busca,
+]
+
+def versao_esquema(db_path: str = DB_PATH) -> int:
+    """
+    Retorna a versão do esquema gravada no banco (PRAGMA user_version).
+    """
+    with conexao(db_path) as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrar(db_path: str = DB_PATH) -> int:
+    """
+    Aplica, em ordem, as migrações ainda não aplicadas ao banco e retorna a versão final.
+    Cada migração roda na mesma transação que atualiza o user_version: se falhar,
+    nada é gravado e ela será tentada de novo na próxima inicialização.
+    """
+    with conexao(db_path) as conn:
+        for versao, migracao in enumerate(MIGRACOES, start=1):
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= versao:
+                continue
+            # BEGIN IMMEDIATE: outra sessão migrando ao mesmo tempo espera aqui
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("PRAGMA user_version").fetchone()[0] < versao:
+                    migracao(conn)
+                    conn.execute(f"PRAGMA user_version = {versao}")
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+# --- Datas ---
+
+FORMATO_EXIBICAO = "%d/%m/%Y %H:%M:%S"
+
+def agora_iso() -> str:
+    """
+    Data/hora atual no formato gravado em 'atualizado_em' (ISO-8601, ordenável).
+    """
+    return datetime.now().isoformat(timespec="seconds")
+
+def _normalizar_data_hora(valor: Optional[str]) -> str:
+    """
+    Aceita ISO-8601 ou o formato antigo "dd/mm/aaaa HH:MM:SS" e devolve ISO-8601.
+    """
+    if not valor:
+        return agora_iso()
+    try:
+        return datetime.strptime(valor, FORMATO_EXIBICAO).isoformat(timespec="seconds")
+    except ValueError:
+        return valor
+
+def formatar_data_hora(valor: Optional[str]) -> str:
+    """
+    Converte o 'atualizado_em' gravado (ISO-8601) para exibição: "dd/mm/aaaa HH:MM:SS".
+    """
+    if not valor:
+        return ""
+    try:
+        return datetime.fromisoformat(valor).strftime(FORMATO_EXIBICAO)
+    except ValueError:
+        return valor
+
+# --- Versão dos Dados (invalidação de caches de leitura) ---
+
+# Contador por banco, incrementado a cada gravação na tabela 'processos' feita
+# por este processo Python. Caches de consulta (ex.: st.cache_data na tela
+# inicial) incluem a versão na chave e só são refeitos quando ela muda.
+_VERSOES: Dict[str, int] = {}
+_VERSOES_LOCK = threading.Lock()
+
+def _incrementar_versao(db_path: str):
+    with _VERSOES_LOCK:
+        _VERSOES[db_path] = _VERSOES.get(db_path, 0) + 1
+
+def _marcar_alteracao(db_path: str):
+    """
+    Chamada dentro de transacao(): a versão é incrementada no commit da
+    transação mais externa (e não muda se ela for desfeita).
+    """
+    _conexoes_da_thread()[db_path][2] = True
+
+def versao_dados(db_path: str = DB_PATH) -> int:
+    """
+    Retorna a versão atual dos dados de processos do banco (muda a cada inserção,
+    atualização de status ou exclusão).
+    """
+    with _VERSOES_LOCK:
+        return _VERSOES.get(db_path, 0)
+
+# --- Funções CRUD (Criação, Leitura, Atualização, Exclusão) ---
+
+def init_db(db_path: str = DB_PATH):
+    """
+    Inicializa o banco de dados, criando/atualizando o esquema pelas migrações pendentes.
+    Chamadas seguintes (ex.: a cada carregamento de página) não acessam o banco.
+    """
+    pool = _get_pool(db_path)
+    if pool.initialized:
+        return
+    migrar(db_path)
+    pool.initialized = True
 
 def listar_processos(db_path: str = DB_PATH) -> List[Tuple]:
     """
     Retorna todos os processos cadastrados no banco de dados.
     """
-    conn = get_db_connection(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, autor, reu, status, atualizado_em FROM processos")
-    processos = cursor.fetchall()
-    conn.close()
-    return processos
+    with conexao(db_path) as conn:
+        return conn.execute("SELECT id, autor, reu, status, atualizado_em FROM processos").fetchall()
+
+def normalizar_busca(texto: Optional[str]) -> str:
+    """Texto sem acentos e em minúsculas (casefold), para comparar "JOSÉ" com "jose"."""
+    if not texto:
+        return ""
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+def texto_busca(id: Optional[str], autor: Optional[str], reu: Optional[str]) -> str:
+    """Valor da coluna 'busca' (um campo por linha: o termo não casa entre dois campos)."""
+    return "\n".join(normalizar_busca(valor) for valor in (id, autor, reu))
+
+def _atualizar_busca(conn: sqlite3.Connection, id: str):
+    """Recalcula a coluna 'busca' do processo a partir dos valores gravados."""
+    linha = conn.execute("SELECT autor, reu FROM processos WHERE id = ?", (id,)).fetchone()
+    if linha is not None:
+        conn.execute("UPDATE processos SET busca = ? WHERE id = ?", (texto_busca(id, *linha), id))
+
+def _filtro_processos(
+    status: Optional[Iterable[str]],
+    excluir_status: Optional[Iterable[str]],
+    texto: Optional[str],
+) -> Tuple[str, List]:
+    """
+    Monta a cláusula WHERE (e seus parâmetros) comum às consultas filtradas.
+    """
+    condicoes = []
+    parametros: List = []
+
+    if status is not None:
+        status = list(status)
+        if not status:
+            return " WHERE 0", []
+        condicoes.append(f"status IN ({', '.join('?' * len(status))})")
+        parametros.extend(status)
+
+    if excluir_status:
+        excluir_status = list(excluir_status)
+        condicoes.append(f"status NOT IN ({', '.join('?' * len(excluir_status))})")
+        parametros.extend(excluir_status)
+
+    termo = normalizar_busca(texto).strip() if texto else ""
+    if termo:
+        termo = "%" + termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        condicoes.append("busca LIKE ? ESCAPE '\\'")
+        parametros.append(termo)
+
+    if not condicoes:
+        return "", parametros
+    return " WHERE " + " AND ".join(condicoes), parametros
+
+def buscar_processos(
+    status: Optional[Iterable[str]] = None,
+    excluir_status: Optional[Iterable[str]] = None,
+    texto: Optional[str] = None,
+    limite: int = LIMITE_PADRAO,
+    offset: int = 0,
+    apos: Optional[Tuple[str, str]] = None,
+    db_path: str = DB_PATH,
+) -> List[Tuple]:
+    """
+    Retorna uma página de processos, do mais para o menos recentemente atualizado.
+
+    - status / excluir_status: conjunto de status aceitos / recusados.
+    - texto: busca parcial (sem distinção de maiúsculas nem de acentos) no número, autor e réu.
+    - limite / offset: paginação por posição.
+    - apos: paginação por chave; (atualizado_em, id) da última linha da página anterior.
+    """
+    where, parametros = _filtro_processos(status, excluir_status, texto)
+
+    if apos is not None:
+        where += (" AND " if where else " WHERE ") + "(atualizado_em, id) < (?, ?)"
+        parametros.extend(apos)
+        offset = 0
+
+    sql = (
+        "SELECT id, autor, reu, status, atualizado_em FROM processos"
+        + where
+        + " ORDER BY atualizado_em DESC, id DESC LIMIT ? OFFSET ?"
+    )
+    with conexao(db_path) as conn:
+        return conn.execute(sql, (*parametros, limite, offset)).fetchall()
 
-def inserir_processo(id: str, autor: str, reu: str, status: str, atualizado_em: str, db_path: str = DB_PATH):
+def contar_processos(
+    status: Optional[Iterable[str]] = None,
+    excluir_status: Optional[Iterable[str]] = None,
+    texto: Optional[str] = None,
+    db_path: str = DB_PATH,
+) -> int:
     """
-    Insere um novo processo no banco.
+    Conta os processos que atendem aos mesmos filtros de buscar_processos.
     """
-    conn = get_db_connection(db_path)
-    cursor = conn.cursor()
+    where, parametros = _filtro_processos(status, excluir_status, texto)
+    with conexao(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM processos" + where, parametros).fetchone()[0]
+
+def inserir_processo(id: str, autor: str, reu: str, status: str, atualizado_em: Optional[str] = None, db_path: str = DB_PATH):
+    """
+    Insere um novo processo no banco. 'atualizado_em' é gravado em ISO-8601
+    (o formato antigo "dd/mm/aaaa HH:MM:SS" também é aceito); se omitido, usa a hora atual.
+    """
+    atualizado_em = _normalizar_data_hora(atualizado_em)
     try:
-        cursor.execute("""
-            INSERT INTO processos (id, autor, reu, status, atualizado_em)
-            VALUES (?, ?, ?, ?, ?)
-        """, (id, autor, reu, status, atualizado_em))
-        conn.commit()
+        with transacao(db_path) as conn:
+            conn.execute("""
+                INSERT INTO processos (id, autor, reu, status, atualizado_em, busca)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (id, autor, reu, status, atualizado_em, texto_busca(id, autor, reu)))
+            _marcar_alteracao(db_path)
     except sqlite3.IntegrityError:
         # Lidar com tentativa de inserir ID duplicado (embora 'home.py' já verifique)
         raise ValueError(f"O processo com ID {id} já existe no banco de dados.")
-    finally:
-        conn.close()
+
+def registrar_processo(
+    id: str,
+    autor: Optional[str] = None,
+    reu: Optional[str] = None,
+    status: Optional[str] = None,
+    atualizado_em: Optional[str] = None,
+    db_path: str = DB_PATH,
+):
+    """
+    Cria a linha do processo, se não existir, ou atualiza os campos informados
+    (os None são mantidos). Sem 'atualizado_em', a linha nova recebe a hora atual
+    e a existente mantém a sua (ex.: um save não "desarquiva" a data do processo).
+    """
+    with transacao(db_path) as conn:
+        conn.execute("""
+            INSERT INTO processos (id, autor, reu, status, atualizado_em)
+            VALUES (:id, :autor, :reu, coalesce(:status, :status_inicial), coalesce(:atualizado_em, :agora))
+            ON CONFLICT (id) DO UPDATE SET
+                autor = coalesce(:autor, autor),
+                reu = coalesce(:reu, reu),
+                status = coalesce(:status, status),
+                atualizado_em = coalesce(:atualizado_em, processos.atualizado_em)
+        """, {
+            "id": id, "autor": autor, "reu": reu, "status": status,
+            "status_inicial": STATUS_INICIAL, "agora": agora_iso(),
+            "atualizado_em": _normalizar_data_hora(atualizado_em) if atualizado_em else None,
+        })
+        _atualizar_busca(conn, id)
+        _marcar_alteracao(db_path)
 
 def processo_existe(id: str, db_path: str = DB_PATH) -> bool:
     """
     Verifica se um processo já existe no banco.
     """
-    conn = get_db_connection(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM processos WHERE id = ?", (id,))
-    existe = cursor.fetchone()[0] > 0
-    conn.close()
-    return existe
+    with conexao(db_path) as conn:
+        return conn.execute("SELECT 1 FROM processos WHERE id = ? LIMIT 1", (id,)).fetchone() is not None
 
 def excluir_processo(id: str, db_path: str = DB_PATH):
     """
     Exclui um processo do banco de dados.
     """
-    conn = get_db_connection(db_path)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM processos WHERE id = ?", (id,))
-    conn.commit()
-    conn.close()
+    with transacao(db_path) as conn:
+        conn.execute("DELETE FROM processos WHERE id = ?", (id,))
+        _marcar_alteracao(db_path)
 
 def atualizar_status(id: str, novo_status: str, db_path: str = DB_PATH):
     """
     Altera o status de um processo existente no banco, registrando a data/hora da mudança.
     Usado para Arquivar/Desarquivar/Concluir.
     """
-    conn = get_db_connection(db_path)
-    cursor = conn.cursor()
-    
-    # Adiciona a data/hora da atualização
-    atualizado_em = datetime.now().strftime("%d/%m/%Y %H:%M:%S") 
-    
-    cursor.execute("""
-        UPDATE processos SET status = ?, atualizado_em = ? WHERE id = ?
-    """, (novo_status, atualizado_em, id))
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    # Adiciona a data/hora da atualização (ISO-8601, ordenável no índice)
+    atualizado_em = agora_iso()
+
+    with transacao(db_path) as conn:
+        conn.execute("""
+            UPDATE processos SET status = ?, atualizado_em = ? WHERE id = ?
+        """, (novo_status, atualizado_em, id))
+        _marcar_alteracao(db_path)
+
+def atualizar_status_em_lote(
+    ids: Iterable[str],
+    novo_status: str,
+    atualizado_em: Optional[str] = None,
+    db_path: str = DB_PATH,
+) -> int:
+    """
+    Altera o status de vários processos numa única transação, com a mesma
+    data/hora de atualização para todos (hora atual se omitida).
+    Retorna quantas linhas foram alteradas.
+    """
+    atualizado_em = _normalizar_data_hora(atualizado_em)
+    parametros = [(novo_status, atualizado_em, id) for id in dict.fromkeys(ids)]
+    if not parametros:
+        return 0
+
+    with transacao(db_path) as conn:
+        cursor = conn.executemany("""
+            UPDATE processos SET status = ?, atualizado_em = ? WHERE id = ?
+        """, parametros)
+        _marcar_alteracao(db_path)
+        return cursor.rowcount
+
+def excluir_em_lote(ids: Iterable[str], db_path: str = DB_PATH) -> int:
+    """
+    Exclui vários processos do banco numa única transação. Retorna quantas linhas foram excluídas.
+    """
+    parametros = [(id,) for id in dict.fromkeys(ids)]
+    if not parametros:
+        return 0
+
+    with transacao(db_path) as conn:
+        cursor = conn.executemany("DELETE FROM processos WHERE id = ?", parametros)
+        _marcar_alteracao(db_path)
+        return cursor.rowcount
+
+# --- Busca Textual no Conteúdo dos Processos (FTS5) ---
+
+def indexar_conteudo(id: str, textos: Dict[str, str], substituir: bool = True, db_path: str = DB_PATH):
+    """
+    Atualiza o índice de busca do processo com {chave: texto}.
+
+    - substituir=True: 'textos' é o documento inteiro; chaves ausentes são removidas do índice.
+    - substituir=False: atualiza apenas as chaves informadas (saves parciais).
+    Chaves cujo texto não mudou não são reescritas.
+    """
+    init_db(db_path)
+    with transacao(db_path) as conn:
+        if substituir:
+            chaves = list(textos)
+            conn.execute(
+                f"DELETE FROM processos_conteudo WHERE id = ? AND chave NOT IN ({', '.join('?' * len(chaves))})",
+                (id, *chaves),
+            )
+        vazias = [(id, chave) for chave, texto in textos.items() if not texto]
+        if vazias:
+            conn.executemany("DELETE FROM processos_conteudo WHERE id = ? AND chave = ?", vazias)
+        conn.executemany("""
+            INSERT INTO processos_conteudo (id, chave, texto) VALUES (?, ?, ?)
+            ON CONFLICT (id, chave) DO UPDATE SET texto = excluded.texto
+            WHERE texto IS NOT excluded.texto
+        """, [(id, chave, texto) for chave, texto in textos.items() if texto])
+
+def remover_conteudo(id: str, db_path: str = DB_PATH):
+    """
+    Remove o processo do índice de busca.
+    """
+    init_db(db_path)
+    with transacao(db_path) as conn:
+        conn.execute("DELETE FROM processos_conteudo WHERE id = ?", (id,))
+
+def _consulta_fts(consulta: str) -> str:
+    """
+    Converte o texto digitado em uma consulta FTS5 segura: cada palavra vira um
+    termo entre aspas com busca por prefixo, e todas precisam estar presentes.
+    """
+    termos = [t.replace('"', '""') for t in consulta.split()]
+    return " ".join(f'"{t}"*' for t in termos if t.strip('"'))
+
+def buscar_conteudo(consulta: str, limite: int = LIMITE_PADRAO, db_path: str = DB_PATH) -> List[Tuple]:
+    """
+    Busca no conteúdo indexado dos processos (quesitos, conclusões, descrições...).
+    Retorna [(id, chave, trecho, relevancia)], um por processo, do mais relevante
+    para o menos relevante. O trecho destaca os termos encontrados em **negrito**.
+    """
+    consulta_fts = _consulta_fts(consulta)
+    if not consulta_fts:
+        return []
+
+    init_db(db_path)
+    with conexao(db_path) as conn:
+        cursor = conn.execute("""
+            SELECT c.id, c.chave,
+                   snippet(processos_fts, 0, '**', '**', '…', 16),
+                   bm25(processos_fts) AS relevancia
+            FROM processos_fts
+            JOIN processos_conteudo c ON c.rowid = processos_fts.rowid
+            WHERE processos_fts MATCH ?
+            ORDER BY relevancia
+        """, (consulta_fts,))
+        # Várias chaves do mesmo processo podem casar: fica só a mais relevante
+        resultados: Dict[str, Tuple] = {}
+        for linha in cursor:
+            if linha[0] not in resultados:
+                resultados[linha[0]] = linha
+                if len(resultados) >= limite:
+                    break
+        return list(resultados.values())
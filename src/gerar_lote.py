@@ -0,0 +1,204 @@
+"""
+gerar_lote.py
+Geração de laudos em lote, sem interface (fora do Streamlit).
+
+Lê os JSONs de processo via data_handler.load_process_data, gera cada laudo com
+word_handler.gerar_laudo em um pool de processos e grava em /output.
+Processos cujo JSON e template não mudaram desde a última geração são pulados.
+
+Uso:
+    python -m src.gerar_lote                 # todos os processos em /data
+    python -m src.gerar_lote 0001234-56 ...  # apenas os processos informados
+    python -m src.gerar_lote --forcar        # regera tudo, ignorando o manifesto
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.data_handler import (
+    BASE_DIR,
+    get_process_file_path,
+    get_process_journal_path,
+    list_processes,
+    load_process_data,
+)
+from src.word_handler import CAMINHO_MODELO_PADRAO, gerar_laudo
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+PASTA_SAIDA_PADRAO = os.path.join(BASE_DIR, "output")
+
+# Manifesto com os hashes (JSON do processo + template) da última geração bem-sucedida
+NOME_MANIFESTO = ".lote_manifesto.json"
+
+
+# ============================================================
+# FUNÇÕES AUXILIARES
+# ============================================================
+
+def nucleos_disponiveis() -> int:
+    """Núcleos que este processo pode usar (respeita a afinidade de CPU, quando suportada)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _sha256_arquivo(caminho: str) -> str:
+    """Hash SHA-256 do conteúdo de um arquivo."""
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def caminho_saida_laudo(process_id: str, pasta_saida: str = PASTA_SAIDA_PADRAO) -> str:
+    """Caminho do DOCX gerado para o processo."""
+    return os.path.join(pasta_saida, f"{process_id}_LAUDO.docx")
+
+
+def carregar_manifesto(pasta_saida: str) -> Dict[str, Dict[str, str]]:
+    """Carrega o manifesto da pasta de saída. Retorna {} se ausente ou corrompido."""
+    caminho = os.path.join(pasta_saida, NOME_MANIFESTO)
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def salvar_manifesto(pasta_saida: str, manifesto: Dict[str, Dict[str, str]]) -> None:
+    """Grava o manifesto via arquivo temporário, para não corromper em caso de interrupção."""
+    caminho = os.path.join(pasta_saida, NOME_MANIFESTO)
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def esta_atualizado(process_id: str, assinatura: Dict[str, str],
+                    manifesto: Dict[str, Dict[str, str]], pasta_saida: str) -> bool:
+    """True se o laudo existe e foi gerado a partir do mesmo JSON e do mesmo template."""
+    return (
+        manifesto.get(process_id) == assinatura
+        and os.path.exists(caminho_saida_laudo(process_id, pasta_saida))
+    )
+
+
+# ============================================================
+# TAREFA EXECUTADA EM CADA PROCESSO DO POOL
+# ============================================================
+
+def gerar_laudo_processo(process_id: str, caminho_modelo: str, pasta_saida: str) -> Tuple[str, float, Optional[str]]:
+    """
+    Gera o laudo de um processo.
+    Retorna (process_id, segundos, erro); erro é None em caso de sucesso.
+    """
+    inicio = time.perf_counter()
+    try:
+        dados = load_process_data(process_id)
+        if not dados:
+            raise ValueError("JSON do processo vazio ou ilegível.")
+
+        dados.setdefault("numero_processo", dados.get("NUMERO_PROCESSO", process_id))
+        gerar_laudo(
+            caminho_modelo,
+            caminho_saida_laudo(process_id, pasta_saida),
+            dados,
+            dados.get("adendos", []),
+            dados.get("anexos", []),
+        )
+        return process_id, time.perf_counter() - inicio, None
+    except Exception as e:
+        return process_id, time.perf_counter() - inicio, f"{type(e).__name__}: {e}"
+
+
+# ============================================================
+# EXECUÇÃO DO LOTE
+# ============================================================
+
+def gerar_lote(process_ids: Optional[List[str]] = None,
+               caminho_modelo: str = CAMINHO_MODELO_PADRAO,
+               pasta_saida: str = PASTA_SAIDA_PADRAO,
+               workers: Optional[int] = None,
+               forcar: bool = False) -> Dict[str, Any]:
+    """
+    Gera os laudos de vários processos em paralelo.
+    Retorna um resumo com as listas 'gerados', 'pulados' e 'falhas'.
+    """
+    os.makedirs(pasta_saida, exist_ok=True)
+    process_ids = process_ids or list_processes()
+    workers = workers or nucleos_disponiveis()
+
+    sha_modelo = _sha256_arquivo(caminho_modelo)
+    manifesto = {} if forcar else carregar_manifesto(pasta_saida)
+
+    pendentes = {}
+    pulados = []
+    for process_id in process_ids:
+        caminho_json = get_process_file_path(process_id)
+        if not os.path.exists(caminho_json):
+            print(f"[--] {process_id}: JSON não encontrado, ignorado.")
+            continue
+        assinatura = {"json_sha256": _sha256_arquivo(caminho_json), "modelo_sha256": sha_modelo}
+        # Saves parciais pendentes no journal também alteram o conteúdo do processo
+        caminho_journal = get_process_journal_path(process_id)
+        if os.path.exists(caminho_journal):
+            assinatura["journal_sha256"] = _sha256_arquivo(caminho_journal)
+        if esta_atualizado(process_id, assinatura, manifesto, pasta_saida):
+            pulados.append(process_id)
+        else:
+            pendentes[process_id] = assinatura
+
+    print(f"{len(pendentes)} laudo(s) a gerar, {len(pulados)} sem alteração | {workers} worker(s)")
+
+    gerados, falhas = [], []
+    inicio = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [
+            pool.submit(gerar_laudo_processo, process_id, caminho_modelo, pasta_saida)
+            for process_id in pendentes
+        ]
+        for futuro in as_completed(futuros):
+            process_id, segundos, erro = futuro.result()
+            if erro:
+                falhas.append(process_id)
+                print(f"[ERRO] {process_id} ({segundos:.2f}s): {erro}")
+                continue
+
+            gerados.append(process_id)
+            print(f"[OK] {process_id} ({segundos:.2f}s)")
+            # Atualiza o manifesto a cada laudo: uma interrupção não perde o que já foi gerado
+            manifesto[process_id] = pendentes[process_id]
+            salvar_manifesto(pasta_saida, manifesto)
+
+    total = time.perf_counter() - inicio
+    print(f"Concluído em {total:.2f}s: {len(gerados)} gerado(s), {len(pulados)} pulado(s), {len(falhas)} falha(s).")
+    return {"gerados": gerados, "pulados": pulados, "falhas": falhas}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gera laudos em lote a partir dos processos em /data.")
+    parser.add_argument("processos", nargs="*", help="IDs dos processos (padrão: todos).")
+    parser.add_argument("--modelo", default=CAMINHO_MODELO_PADRAO, help="Template DOCX.")
+    parser.add_argument("--saida", default=PASTA_SAIDA_PADRAO, help="Pasta de saída dos laudos.")
+    parser.add_argument("--workers", type=int, default=None, help="Número de processos (padrão: núcleos disponíveis).")
+    parser.add_argument("--forcar", action="store_true", help="Regera todos os laudos, mesmo sem alteração.")
+    args = parser.parse_args(argv)
+
+    resumo = gerar_lote(args.processos, args.modelo, args.saida, args.workers, args.forcar)
+    return 1 if resumo["falhas"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+image_handler.py
+Pré-processamento das imagens de anexos/adendos antes da inserção no DOCX.
+
+A imagem é reamostrada para a resolução necessária à largura em que será
+exibida no laudo (ex.: 6 polegadas a 200 DPI = 1200 px), tem os metadados
+EXIF removidos e é recomprimida em PNG (gráficos, textos, transparência) ou
+JPEG (fotos e digitalizações coloridas). O resultado fica em cache no disco,
+indexado pelo hash do conteúdo original; o cache é limitado a
+IMAGE_CACHE_MAX_BYTES, descartando as entradas usadas há mais tempo.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMAGE_CACHE_DIR = os.path.join(BASE_DIR, "data", "cache_imagens")
+
+os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+
+DPI_PADRAO = 200
+QUALIDADE_JPEG = 85
+
+# Até este número de cores a imagem é tratada como gráfico/texto (PNG)
+MAX_CORES_PNG = 64
+
+# Tamanho máximo do cache em disco e intervalo mínimo entre duas podas
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+PODA_INTERVALO_SEGUNDOS = 10 * 60
+
+_PODA_LOCK = threading.Lock()
+_ULTIMA_PODA = {"instante": None}
+
+
+# ============================================================
+# FUNÇÕES AUXILIARES
+# ============================================================
+
+def _cache_path(sha256: str, largura_px: int) -> str:
+    """Caminho do arquivo em cache para a imagem original e a largura alvo."""
+    return os.path.join(IMAGE_CACHE_DIR, sha256[:2], f"{sha256}_{largura_px}")
+
+
+def _entradas_cache() -> List[Tuple[float, int, str]]:
+    """(último uso, tamanho, caminho) de cada imagem em cache."""
+    entradas = []
+    for pasta, _, arquivos in os.walk(IMAGE_CACHE_DIR):
+        for nome in arquivos:
+            if nome.endswith(".tmp"):
+                continue
+            caminho = os.path.join(pasta, nome)
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, caminho))
+    return entradas
+
+
+def podar_cache_imagens(max_bytes: Optional[int] = None) -> int:
+    """
+    Apaga as imagens em cache usadas há mais tempo (mtime, renovado a cada
+    leitura) até o total caber em 'max_bytes' (IMAGE_CACHE_MAX_BYTES se omitido).
+    Retorna quantas foram apagadas.
+    """
+    if max_bytes is None:
+        max_bytes = IMAGE_CACHE_MAX_BYTES
+    entradas = _entradas_cache()
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    apagadas = 0
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= tamanho
+        apagadas += 1
+    return apagadas
+
+
+def _podar_se_preciso() -> None:
+    """Poda o cache no máximo uma vez a cada PODA_INTERVALO_SEGUNDOS (por processo)."""
+    agora = time.monotonic()
+    with _PODA_LOCK:
+        ultima = _ULTIMA_PODA["instante"]
+        if ultima is not None and agora - ultima < PODA_INTERVALO_SEGUNDOS:
+            return
+        _ULTIMA_PODA["instante"] = agora
+    podar_cache_imagens()
+
+
+def _tem_transparencia(img: Image.Image) -> bool:
+    return img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def _eh_grafico(img: Image.Image) -> bool:
+    """Heurística: poucas cores (gráficos EOG, textos digitalizados em P&B) comprimem melhor em PNG."""
+    if img.mode in ("1", "P"):
+        return True
+    # Amostragem sem interpolação: preserva o conjunto de cores original
+    amostra = img.resize((min(img.width, 256), min(img.height, 256)), Image.NEAREST)
+    return amostra.getcolors(maxcolors=MAX_CORES_PNG) is not None
+
+
+def _codificar_png(img: Image.Image) -> bytes:
+    buffer = BytesIO()
+    if img.mode not in ("1", "L", "P", "RGB", "RGBA"):
+        img = img.convert("RGBA" if _tem_transparencia(img) else "RGB")
+    img.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _codificar_jpeg(img: Image.Image) -> bytes:
+    buffer = BytesIO()
+    if img.mode not in ("L", "RGB"):
+        img = img.convert("RGB")
+    img.save(buffer, format="JPEG", quality=QUALIDADE_JPEG, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _recomprimir(img: Image.Image, grafico: bool) -> bytes:
+    """Codifica a imagem em PNG (gráficos/transparência) ou JPEG (fotos), sem metadados."""
+    if grafico or _tem_transparencia(img):
+        return _codificar_png(img)
+    return _codificar_jpeg(img)
+
+
+# ============================================================
+# FUNÇÃO PRINCIPAL
+# ============================================================
+
+def preparar_imagem_docx(dados: bytes, largura_pol: float, dpi: int = DPI_PADRAO) -> bytes:
+    """
+    Retorna a imagem pronta para o add_picture: reduzida para 'largura_pol' polegadas
+    a 'dpi' pontos por polegada, sem EXIF e recomprimida.
+    Se os bytes não forem uma imagem legível pelo Pillow, devolve o original.
+    """
+    largura_px = int(largura_pol * dpi)
+    sha256 = hashlib.sha256(dados).hexdigest()
+    cache_path = _cache_path(sha256, largura_px)
+
+    try:
+        with open(cache_path, "rb") as f:
+            resultado = f.read()
+    except OSError:
+        pass
+    else:
+        # Renova o mtime: a poda descarta primeiro as entradas sem uso recente
+        try:
+            os.utime(cache_path)
+        except OSError:
+            pass
+        return resultado
+
+    try:
+        with Image.open(BytesIO(dados)) as original:
+            tem_exif = bool(original.getexif())
+            # Aplica a rotação indicada no EXIF antes de descartá-lo (fotos de celular)
+            img = ImageOps.exif_transpose(original)
+            # A classificação é feita antes da redução, que cria tons intermediários
+            grafico = _eh_grafico(img)
+            if img.width > largura_px:
+                altura_px = max(1, round(img.height * largura_px / img.width))
+                img = img.resize((largura_px, altura_px), Image.LANCZOS)
+            resultado = _recomprimir(img, grafico)
+    except Exception:
+        return dados
+
+    # Imagem já pequena e sem EXIF: se a recompressão não reduziu, mantém o original
+    if not tem_exif and len(resultado) >= len(dados):
+        resultado = dados
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(resultado)
+    os.replace(tmp_path, cache_path)
+    _podar_se_preciso()
+
+    return resultado
@@ -0,0 +1,587 @@
+"""
+process_model.py
+Modelo tipado do estado de um processo (documento JSON em /data).
+
+A página valida com ele o documento carregado e o entrega ao word_handler para
+gerar o laudo; st.session_state continua com dicts, editados pelos widgets.
+
+Dataclasses com __slots__ (menos memória por item do que um dict e acesso
+por atributo, sem cadeias de .get()):
+- Processo: identificação, datas, etapas e as listas abaixo;
+- DocumentoQuestionado, Padrao: documentos da Etapa 4;
+- AnaliseEOG: análise gráfica de um questionado (Etapa 5);
+- Quesito: quesito de uma das partes, com a resposta do perito (Etapa 7);
+- Anexo: anexos e adendos do laudo (imagens, gráficos EOG).
+
+processo_de_dict valida o JSON existente e unifica as variantes de chaves
+(AUTOR/AUTORES, numero_processo/NUMERO_PROCESSO, analises_eog_list/saved_analyses,
+pergunta/texto...). processo_para_dict grava sempre as mesmas chaves, na mesma
+ordem. Chaves que o modelo não conhece ficam em 'extras' de cada objeto
+(None quando não há nenhuma) e voltam intactas na gravação.
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+from src.data_handler import decode_json, encode_json
+
+# Formato antigo das datas, ainda presente em documentos salvos pelo fluxo de backup
+FORMATO_DATA_ANTIGO = "%d/%m/%Y"
+
+
+# ============================================================
+# DATACLASSES
+# ============================================================
+
+@dataclass(slots=True)
+class DocumentoQuestionado:
+    id: str = ""
+    tipo_documento: str = ""
+    fls_documentos: str = ""
+    descricao_imagem: str = ""
+    imagem_ref: Optional[str] = None
+    extras: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class Padrao:
+    id: str = ""
+    tipo_documento: str = ""
+    numeros: str = ""
+    data_documento: str = ""
+    descricao_imagem: str = ""
+    extras: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class AnaliseEOG:
+    questionado_id: str = ""
+    id: str = ""
+    conclusao_status: str = "PENDENTE"
+    eog: Dict[str, str] = field(default_factory=dict)
+    confronto_texts: Dict[str, str] = field(default_factory=dict)
+    descricao_analise: str = ""
+    imagem_ref: Optional[str] = None
+    is_saved: bool = False
+    # Radar EOG da análise entra no laudo como adendo 'grafico_eog'
+    incluir_grafico: bool = False
+    extras: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class Quesito:
+    id: str = ""
+    texto: str = ""
+    resposta: str = ""
+    fls: str = ""
+    referencias: Tuple[str, ...] = ()
+    imagem_ref: Optional[str] = None
+    tem_imagem: bool = False
+    extras: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class Anexo:
+    id: str = ""
+    descricao: str = ""
+    filename: str = ""
+    mime_type: Optional[str] = None
+    origem: Optional[str] = None
+    id_referencia: Optional[str] = None
+    tipo: Optional[str] = None
+    bytes_ref: Optional[str] = None
+    eog: Optional[Dict[str, str]] = None
+    # Bytes ainda não descarregados para o blob store (só em memória, nunca no JSON)
+    conteudo: Optional[bytes] = None
+    extras: Optional[Dict[str, Any]] = None
+
+
+@dataclass(slots=True)
+class Processo:
+    numero: str = ""
+    autor: str = ""
+    reu: str = ""
+    status: Optional[str] = None
+    atualizado_em: Optional[str] = None
+    data_laudo: Optional[date] = None
+    etapa_atual: int = 1
+    etapas_concluidas: Set[int] = field(default_factory=set)
+    questionados: List[DocumentoQuestionado] = field(default_factory=list)
+    padroes: List[Padrao] = field(default_factory=list)
+    # Por id do questionado
+    analises: Dict[str, AnaliseEOG] = field(default_factory=dict)
+    quesitos_autor: List[Quesito] = field(default_factory=list)
+    quesitos_reu: List[Quesito] = field(default_factory=list)
+    quesitos_autor_nao_enviados: bool = False
+    quesitos_reu_nao_enviados: bool = False
+    conclusao_final: str = ""
+    anexos: List[Anexo] = field(default_factory=list)
+    adendos: List[Anexo] = field(default_factory=list)
+    extras: Optional[Dict[str, Any]] = None
+
+
+# ============================================================
+# VALIDAÇÃO DOS CAMPOS
+# ============================================================
+
+# Leitura tolerante (processo_de_dict(..., estrito=False), usada na geração do laudo):
+# valor de tipo inesperado vira um substituto em vez de ValueError, como o laudo
+# aceitava antes do modelo
+_ESTRITO: ContextVar[bool] = ContextVar("process_model_estrito", default=True)
+
+
+def _onde(caminho: str, campo: str) -> str:
+    """Caminho do campo na mensagem de erro (montado só quando há erro)."""
+    return f"{caminho}.{campo}" if campo else caminho
+
+
+def _invalido(caminho: str, campo: str, mensagem: str, substituto: Any) -> Any:
+    """ValueError com o caminho do campo; na leitura tolerante, retorna o substituto."""
+    if _ESTRITO.get():
+        raise ValueError(f"{_onde(caminho, campo)}: {mensagem}")
+    return substituto
+
+
+def _primeiro(data: Mapping[str, Any], chaves) -> Any:
+    """Valor da primeira chave presente (e não nula) entre as variantes."""
+    for chave in chaves:
+        valor = data.get(chave)
+        if valor is not None:
+            return valor
+    return None
+
+
+def _texto(valor: Any, caminho: str, campo: str = "", padrao: str = "") -> str:
+    if valor is None:
+        return padrao
+    if isinstance(valor, str):
+        return valor
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return str(valor)
+    return _invalido(caminho, campo, f"esperado texto, recebido {type(valor).__name__}", str(valor))
+
+
+def _texto_opcional(valor: Any, caminho: str, campo: str = "") -> Optional[str]:
+    return None if valor is None else _texto(valor, caminho, campo)
+
+
+def _booleano(valor: Any, caminho: str, campo: str = "") -> bool:
+    if valor is None:
+        return False
+    if isinstance(valor, bool):
+        return valor
+    if valor in (0, 1):
+        return bool(valor)
+    return _invalido(caminho, campo, f"esperado verdadeiro/falso, recebido {valor!r}", bool(valor))
+
+
+def _inteiro(valor: Any, caminho: str, campo: str = "", padrao: int = 0) -> int:
+    if valor is None:
+        return padrao
+    if isinstance(valor, int) and not isinstance(valor, bool):
+        return valor
+    if isinstance(valor, str) and valor.strip().isdigit():
+        return int(valor)
+    return _invalido(caminho, campo, f"esperado número inteiro, recebido {valor!r}", padrao)
+
+
+def _data(valor: Any, caminho: str, campo: str = "") -> Optional[date]:
+    """Aceita date/datetime, ISO-8601 (data ou data/hora) e o formato antigo dd/mm/aaaa."""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    if isinstance(valor, str):
+        try:
+            return date.fromisoformat(valor[:10])
+        except ValueError:
+            pass
+        try:
+            return datetime.strptime(valor, FORMATO_DATA_ANTIGO).date()
+        except ValueError:
+            pass
+    return _invalido(caminho, campo, f"data inválida {valor!r}", None)
+
+
+def _lista(valor: Any, caminho: str, campo: str = "") -> list:
+    if valor is None:
+        return []
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return list(valor)
+    return _invalido(caminho, campo, f"esperada uma lista, recebido {type(valor).__name__}", [])
+
+
+def _dicionario(valor: Any, caminho: str, campo: str = "") -> Mapping[str, Any]:
+    # dict primeiro: o isinstance com Mapping (ABC) custa caro por item
+    if type(valor) is dict or isinstance(valor, Mapping):
+        return valor
+    return _invalido(caminho, campo, f"esperado um objeto, recebido {type(valor).__name__}", {})
+
+
+def _dict_texto(valor: Any, caminho: str, campo: str = "") -> Dict[str, str]:
+    if valor is None:
+        return {}
+    caminho = _onde(caminho, campo)
+    return {str(k): _texto(v, caminho, str(k)) for k, v in _dicionario(valor, caminho).items()}
+
+
+def _conteudo(valor: Any, caminho: str, campo: str = "") -> Optional[bytes]:
+    if valor is None or isinstance(valor, bytes):
+        return valor
+    if isinstance(valor, bytearray):
+        return bytes(valor)
+    return _invalido(caminho, campo, f"esperados bytes, recebido {type(valor).__name__}", None)
+
+
+def _extras(data: Mapping[str, Any], conhecidas: frozenset) -> Optional[Dict[str, Any]]:
+    """Chaves desconhecidas do item (None se não houver: poupa um dict vazio por objeto)."""
+    if data.keys() <= conhecidas:
+        return None
+    extras = {k: v for k, v in data.items() if k not in conhecidas}
+    return extras or None
+
+
+# ============================================================
+# DECODIFICAÇÃO (dict do JSON / sessão -> modelo)
+# ============================================================
+# Cada item tenta primeiro o caminho rápido: o documento gravado pela página já
+# tem as chaves canônicas com os tipos exatos, e o objeto é montado direto,
+# sem a conversão campo a campo. Qualquer divergência (chave legada, campo
+# ausente, tipo diferente) cai na validação completa, que dá o mesmo
+# resultado ou o mesmo erro.
+
+_CHAVES_QUESTIONADO = frozenset({"id", "TIPO_DOCUMENTO", "FLS_DOCUMENTOS", "DESCRICAO_IMAGEM", "imagem_bytes_ref"})
+
+def questionado_de_dict(data: Any, caminho: str = "questionado") -> DocumentoQuestionado:
+    if type(data) is dict:
+        get = data.get
+        id_, tipo, fls, descricao, ref = (get("id"), get("TIPO_DOCUMENTO"), get("FLS_DOCUMENTOS"),
+                                          get("DESCRICAO_IMAGEM"), get("imagem_bytes_ref"))
+        if (type(id_) is str and type(tipo) is str and type(fls) is str and type(descricao) is str
+                and (ref is None or type(ref) is str)):
+            return DocumentoQuestionado(id_, tipo, fls, descricao, ref, _extras(data, _CHAVES_QUESTIONADO))
+    data = _dicionario(data, caminho)
+    return DocumentoQuestionado(
+        id=_texto(data.get("id"), caminho, "id"),
+        tipo_documento=_texto(data.get("TIPO_DOCUMENTO"), caminho, "TIPO_DOCUMENTO"),
+        fls_documentos=_texto(data.get("FLS_DOCUMENTOS"), caminho, "FLS_DOCUMENTOS"),
+        descricao_imagem=_texto(data.get("DESCRICAO_IMAGEM"), caminho, "DESCRICAO_IMAGEM"),
+        imagem_ref=_texto_opcional(data.get("imagem_bytes_ref"), caminho, "imagem_bytes_ref"),
+        extras=_extras(data, _CHAVES_QUESTIONADO),
+    )
+
+
+_CHAVES_PADRAO = frozenset({
+    "id", "TIPO_DOCUMENTO", "TIPO_DOCUMENTO_OPCAO", "TIPO_DOCUMENTO_CUSTOM", "DESCRICAO",
+    "NUMEROS", "FLS", "DATA_DOCUMENTO", "DESCRICAO_IMAGEM",
+})
+
+def padrao_de_dict(data: Any, caminho: str = "padrao") -> Padrao:
+    if type(data) is dict:
+        get = data.get
+        id_, tipo, numeros, data_doc, descricao = (get("id"), get("TIPO_DOCUMENTO"), get("NUMEROS"),
+                                                   get("DATA_DOCUMENTO"), get("DESCRICAO_IMAGEM"))
+        if (type(id_) is str and type(tipo) is str and type(numeros) is str
+                and type(data_doc) is str and type(descricao) is str):
+            return Padrao(id_, tipo, numeros, data_doc, descricao, _extras(data, _CHAVES_PADRAO))
+    data = _dicionario(data, caminho)
+    # Variantes: TIPO_DOCUMENTO (página), TIPO_DOCUMENTO_OPCAO/_CUSTOM (backup), DESCRICAO (PCE)
+    tipo = data.get("TIPO_DOCUMENTO")
+    if tipo is None:
+        tipo = data.get("TIPO_DOCUMENTO_OPCAO")
+        if tipo == "Outros":
+            tipo = data.get("TIPO_DOCUMENTO_CUSTOM") or tipo
+    if tipo is None:
+        tipo = data.get("DESCRICAO")
+    return Padrao(
+        id=_texto(data.get("id"), caminho, "id"),
+        tipo_documento=_texto(tipo, caminho, "TIPO_DOCUMENTO"),
+        numeros=_texto(_primeiro(data, ("NUMEROS", "FLS")), caminho, "NUMEROS"),
+        data_documento=_texto(data.get("DATA_DOCUMENTO"), caminho, "DATA_DOCUMENTO"),
+        descricao_imagem=_texto(data.get("DESCRICAO_IMAGEM"), caminho, "DESCRICAO_IMAGEM"),
+        extras=_extras(data, _CHAVES_PADRAO),
+    )
+
+
+_CHAVES_ANALISE = frozenset({
+    "id", "questionado_id", "conclusao_status", "eog", "eog_elements", "confronto_texts",
+    "descricao_analise", "imagem_analise_bytes_ref", "is_saved", "incluir_grafico_laudo",
+})
+
+def _so_textos(valor: Any) -> bool:
+    """dict {texto: texto} (caminho rápido do eog/confronto_texts)."""
+    return type(valor) is dict and all(type(k) is str and type(v) is str for k, v in valor.items())
+
+
+def analise_de_dict(data: Any, caminho: str = "analise", questionado_id: Optional[str] = None) -> AnaliseEOG:
+    if type(data) is dict:
+        get = data.get
+        qid, id_, status, eog, textos, descricao, ref, salva, grafico = (
+            get("questionado_id") or questionado_id, get("id"), get("conclusao_status"), get("eog"),
+            get("confronto_texts"), get("descricao_analise"), get("imagem_analise_bytes_ref"),
+            get("is_saved"), get("incluir_grafico_laudo", False))
+        if (type(qid) is str and type(id_) is str and type(status) is str and type(descricao) is str
+                and (ref is None or type(ref) is str) and type(salva) is bool and type(grafico) is bool
+                and _so_textos(eog) and _so_textos(textos)):
+            return AnaliseEOG(qid, id_, status, dict(eog), dict(textos), descricao, ref, salva, grafico,
+                              _extras(data, _CHAVES_ANALISE))
+    data = _dicionario(data, caminho)
+    return AnaliseEOG(
+        questionado_id=_texto(_primeiro(data, ("questionado_id",)) or questionado_id, caminho, "questionado_id"),
+        id=_texto(data.get("id"), caminho, "id"),
+        conclusao_status=_texto(data.get("conclusao_status"), caminho, "conclusao_status", padrao="PENDENTE"),
+        eog=_dict_texto(_primeiro(data, ("eog", "eog_elements")), caminho, "eog"),
+        confronto_texts=_dict_texto(data.get("confronto_texts"), caminho, "confronto_texts"),
+        descricao_analise=_texto(data.get("descricao_analise"), caminho, "descricao_analise"),
+        imagem_ref=_texto_opcional(data.get("imagem_analise_bytes_ref"), caminho, "imagem_analise_bytes_ref"),
+        is_saved=_booleano(data.get("is_saved"), caminho, "is_saved"),
+        incluir_grafico=_booleano(data.get("incluir_grafico_laudo"), caminho, "incluir_grafico_laudo"),
+        extras=_extras(data, _CHAVES_ANALISE),
+    )
+
+
+_CHAVES_QUESITO = frozenset({
+    "id", "texto", "pergunta", "resposta", "resposta_formatada", "fls", "referencias",
+    "imagem_bytes_ref", "tem_imagem",
+})
+
+def quesito_de_dict(data: Any, caminho: str = "quesito") -> Quesito:
+    if type(data) is dict:
+        get = data.get
+        id_, texto, resposta, fls, refs, ref, tem = (get("id"), get("texto"), get("resposta"), get("fls"),
+                                                     get("referencias"), get("imagem_bytes_ref"), get("tem_imagem"))
+        if (type(id_) is str and type(texto) is str and type(resposta) is str and type(fls) is str
+                and type(refs) is list and all(type(r) is str for r in refs)
+                and (ref is None or type(ref) is str) and type(tem) is bool):
+            return Quesito(id_, texto, resposta, fls, tuple(refs), ref, tem, _extras(data, _CHAVES_QUESITO))
+    data = _dicionario(data, caminho)
+    return Quesito(
+        id=_texto(data.get("id"), caminho, "id"),
+        texto=_texto(_primeiro(data, ("texto", "pergunta")), caminho, "texto"),
+        resposta=_texto(_primeiro(data, ("resposta", "resposta_formatada")), caminho, "resposta"),
+        fls=_texto(data.get("fls"), caminho, "fls"),
+        referencias=tuple(_texto(r, caminho, "referencias") for r in _lista(data.get("referencias"), caminho, "referencias")),
+        imagem_ref=_texto_opcional(data.get("imagem_bytes_ref"), caminho, "imagem_bytes_ref"),
+        tem_imagem=_booleano(data.get("tem_imagem"), caminho, "tem_imagem"),
+        extras=_extras(data, _CHAVES_QUESITO),
+    )
+
+
+_CHAVES_ANEXO = frozenset({
+    "id", "id_adendo", "descricao", "filename", "mime_type", "origem", "id_referencia",
+    "tipo", "bytes_ref", "eog", "bytes",
+})
+
+def anexo_de_dict(data: Any, caminho: str = "anexo") -> Anexo:
+    data = _dicionario(data, caminho)
+    eog = data.get("eog")
+    return Anexo(
+        id=_texto(_primeiro(data, ("id", "id_adendo")), caminho, "id"),
+        descricao=_texto(data.get("descricao"), caminho, "descricao"),
+        filename=_texto(data.get("filename"), caminho, "filename"),
+        mime_type=_texto_opcional(data.get("mime_type"), caminho, "mime_type"),
+        origem=_texto_opcional(data.get("origem"), caminho, "origem"),
+        id_referencia=_texto_opcional(data.get("id_referencia"), caminho, "id_referencia"),
+        tipo=_texto_opcional(data.get("tipo"), caminho, "tipo"),
+        bytes_ref=_texto_opcional(data.get("bytes_ref"), caminho, "bytes_ref"),
+        eog=None if eog is None else _dict_texto(eog, caminho, "eog"),
+        conteudo=_conteudo(data.get("bytes"), caminho, "bytes"),
+        extras=_extras(data, _CHAVES_ANEXO),
+    )
+
+
+def _quesitos_da_parte(data: Mapping[str, Any], lista: str, legados: tuple, caminho: str):
+    """
+    Quesitos de uma parte: LISTA_QS_<PARTE> (página) ou o formato do backup
+    quesitos_<parte>_data = {"list": [...], "nao_enviados": bool}.
+    Retorna (quesitos, nao_enviados).
+    """
+    itens = data.get(lista)
+    nao_enviados = data.get(f"{lista}_NAO_ENVIADOS")
+    for chave in legados:
+        legado = data.get(chave)
+        if legado is None:
+            continue
+        legado = _dicionario(legado, chave)
+        if itens is None:
+            itens = legado.get("list")
+        if nao_enviados is None:
+            nao_enviados = legado.get("nao_enviados")
+    quesitos = [quesito_de_dict(q, f"{caminho}[{i}]") for i, q in enumerate(_lista(itens, caminho))]
+    return quesitos, _booleano(nao_enviados, f"{lista}_NAO_ENVIADOS")
+
+
+_CHAVES_PROCESSO = frozenset({
+    "NUMERO_PROCESSO", "numero_processo", "AUTOR", "AUTORES", "REU", "REUS", "status",
+    "atualizado_em", "DATA_LAUDO", "etapa_atual", "etapas_concluidas",
+    "questionados_list", "questionados", "padroes_list", "padroes_pce_list", "padroes",
+    "padroes_confronto", "saved_analyses", "analises_eog_list", "analises",
+    "LISTA_QS_AUTOR", "LISTA_QS_AUTOR_NAO_ENVIADOS", "quesitos_autora_data", "quesitos_autor_data",
+    "LISTA_QS_REU", "LISTA_QS_REU_NAO_ENVIADOS", "quesitos_reu_data", "quesitos_ré_data",
+    "conclusao_final", "anexos", "adendos",
+})
+
+def processo_de_dict(data: Mapping[str, Any], numero: Optional[str] = None, estrito: bool = True) -> Processo:
+    """
+    Valida e converte o documento do processo (JSON carregado ou dados da sessão).
+    Levanta ValueError, com o caminho do campo, se algum valor tiver tipo incompatível.
+    Com estrito=False (geração do laudo) o valor incompatível é convertido para
+    texto ou descartado, e o documento é lido mesmo assim.
+    'numero' é usado quando o documento não traz o número do processo.
+    """
+    token = _ESTRITO.set(estrito)
+    try:
+        return _processo_de_dict(data, numero)
+    finally:
+        _ESTRITO.reset(token)
+
+
+def _processo_de_dict(data: Mapping[str, Any], numero: Optional[str]) -> Processo:
+    data = _dicionario(data, "processo")
+
+    questionados = _lista(_primeiro(data, ("questionados_list", "questionados")), "questionados_list")
+
+    padroes = _primeiro(data, ("padroes_list", "padroes_pce_list", "padroes"))
+    if padroes is None and data.get("padroes_confronto") is not None:
+        padroes = _dicionario(data["padroes_confronto"], "padroes_confronto").get("PCE")
+    padroes = _lista(padroes, "padroes_list")
+
+    # Análises: lista do backup e/ou dict da página (por id do questionado); o dict prevalece
+    analises: Dict[str, AnaliseEOG] = {}
+    for i, item in enumerate(_lista(data.get("analises_eog_list"), "analises_eog_list")):
+        analise = analise_de_dict(item, f"analises_eog_list[{i}]")
+        analises[analise.questionado_id] = analise
+    salvas = _primeiro(data, ("saved_analyses", "analises"))
+    if salvas is not None:
+        for qid, item in _dicionario(salvas, "saved_analyses").items():
+            analise = analise_de_dict(item, f"saved_analyses.{qid}", questionado_id=str(qid))
+            analises[analise.questionado_id] = analise
+
+    quesitos_autor, autor_nao_enviados = _quesitos_da_parte(
+        data, "LISTA_QS_AUTOR", ("quesitos_autora_data", "quesitos_autor_data"), "LISTA_QS_AUTOR")
+    quesitos_reu, reu_nao_enviados = _quesitos_da_parte(
+        data, "LISTA_QS_REU", ("quesitos_reu_data", "quesitos_ré_data"), "LISTA_QS_REU")
+
+    return Processo(
+        numero=_texto(_primeiro(data, ("NUMERO_PROCESSO", "numero_processo")) or numero, "NUMERO_PROCESSO"),
+        autor=_texto(_primeiro(data, ("AUTOR", "AUTORES")), "AUTOR"),
+        reu=_texto(_primeiro(data, ("REU", "REUS")), "REU"),
+        status=_texto_opcional(data.get("status"), "status"),
+        atualizado_em=_texto_opcional(data.get("atualizado_em"), "atualizado_em"),
+        data_laudo=_data(data.get("DATA_LAUDO"), "DATA_LAUDO"),
+        etapa_atual=_inteiro(data.get("etapa_atual"), "etapa_atual", padrao=1),
+        etapas_concluidas={_inteiro(e, "etapas_concluidas") for e in _lista(data.get("etapas_concluidas"), "etapas_concluidas")},
+        questionados=[questionado_de_dict(q, f"questionados_list[{i}]") for i, q in enumerate(questionados)],
+        padroes=[padrao_de_dict(p, f"padroes_list[{i}]") for i, p in enumerate(padroes)],
+        analises=analises,
+        quesitos_autor=quesitos_autor,
+        quesitos_reu=quesitos_reu,
+        quesitos_autor_nao_enviados=autor_nao_enviados,
+        quesitos_reu_nao_enviados=reu_nao_enviados,
+        conclusao_final=_texto(data.get("conclusao_final"), "conclusao_final"),
+        anexos=[anexo_de_dict(a, f"anexos[{i}]") for i, a in enumerate(_lista(data.get("anexos"), "anexos"))],
+        adendos=[anexo_de_dict(a, f"adendos[{i}]") for i, a in enumerate(_lista(data.get("adendos"), "adendos"))],
+        extras=_extras(data, _CHAVES_PROCESSO),
+    )
+
+
+# ============================================================
+# CODIFICAÇÃO (modelo -> dict estável, pronto para o JSON)
+# ============================================================
+# Sempre as mesmas chaves na mesma ordem; opcionais vazios (None) são omitidos.
+
+def questionado_para_dict(q: DocumentoQuestionado) -> Dict[str, Any]:
+    data = {"id": q.id, "TIPO_DOCUMENTO": q.tipo_documento, "FLS_DOCUMENTOS": q.fls_documentos,
+            "DESCRICAO_IMAGEM": q.descricao_imagem}
+    if q.imagem_ref is not None:
+        data["imagem_bytes_ref"] = q.imagem_ref
+    if q.extras:
+        data.update(q.extras)
+    return data
+
+
+def padrao_para_dict(p: Padrao) -> Dict[str, Any]:
+    data = {"id": p.id, "TIPO_DOCUMENTO": p.tipo_documento, "NUMEROS": p.numeros,
+            "DATA_DOCUMENTO": p.data_documento, "DESCRICAO_IMAGEM": p.descricao_imagem}
+    if p.extras:
+        data.update(p.extras)
+    return data
+
+
+def analise_para_dict(a: AnaliseEOG) -> Dict[str, Any]:
+    data = {"id": a.id, "questionado_id": a.questionado_id, "conclusao_status": a.conclusao_status,
+            "eog": dict(a.eog), "confronto_texts": dict(a.confronto_texts),
+            "descricao_analise": a.descricao_analise, "is_saved": a.is_saved}
+    if a.incluir_grafico:
+        data["incluir_grafico_laudo"] = True
+    if a.imagem_ref is not None:
+        data["imagem_analise_bytes_ref"] = a.imagem_ref
+    if a.extras:
+        data.update(a.extras)
+    return data
+
+
+def quesito_para_dict(q: Quesito) -> Dict[str, Any]:
+    data = {"id": q.id, "texto": q.texto, "resposta": q.resposta, "fls": q.fls,
+            "referencias": list(q.referencias), "tem_imagem": q.tem_imagem}
+    if q.imagem_ref is not None:
+        data["imagem_bytes_ref"] = q.imagem_ref
+    if q.extras:
+        data.update(q.extras)
+    return data
+
+
+def anexo_para_dict(a: Anexo) -> Dict[str, Any]:
+    data = {"id": a.id, "descricao": a.descricao, "filename": a.filename}
+    for chave, valor in (("mime_type", a.mime_type), ("origem", a.origem), ("id_referencia", a.id_referencia),
+                         ("tipo", a.tipo), ("bytes_ref", a.bytes_ref), ("eog", a.eog), ("bytes", a.conteudo)):
+        if valor is not None:
+            data[chave] = valor
+    if a.extras:
+        data.update(a.extras)
+    return data
+
+
+def processo_para_dict(p: Processo) -> Dict[str, Any]:
+    """
+    Documento do processo com as chaves usadas pela página (ver load_process/
+    save_current_state). 'etapas_concluidas' sai ordenada e DATA_LAUDO em ISO-8601.
+    """
+    data: Dict[str, Any] = {"NUMERO_PROCESSO": p.numero, "AUTOR": p.autor, "REU": p.reu}
+    if p.status is not None:
+        data["status"] = p.status
+    if p.atualizado_em is not None:
+        data["atualizado_em"] = p.atualizado_em
+    if p.data_laudo is not None:
+        data["DATA_LAUDO"] = p.data_laudo.isoformat()
+    data["etapa_atual"] = p.etapa_atual
+    data["etapas_concluidas"] = sorted(p.etapas_concluidas)
+    data["questionados_list"] = [questionado_para_dict(q) for q in p.questionados]
+    data["padroes_list"] = [padrao_para_dict(x) for x in p.padroes]
+    data["saved_analyses"] = {qid: analise_para_dict(a) for qid, a in p.analises.items()}
+    data["LISTA_QS_AUTOR"] = [quesito_para_dict(q) for q in p.quesitos_autor]
+    data["LISTA_QS_REU"] = [quesito_para_dict(q) for q in p.quesitos_reu]
+    if p.quesitos_autor_nao_enviados:
+        data["LISTA_QS_AUTOR_NAO_ENVIADOS"] = True
+    if p.quesitos_reu_nao_enviados:
+        data["LISTA_QS_REU_NAO_ENVIADOS"] = True
+    data["conclusao_final"] = p.conclusao_final
+    data["anexos"] = [anexo_para_dict(a) for a in p.anexos]
+    data["adendos"] = [anexo_para_dict(a) for a in p.adendos]
+    if p.extras:
+        data.update(p.extras)
+    return data
+
+
+def decode_processo(conteudo: Any, numero: Optional[str] = None) -> Processo:
+    """Processo a partir do JSON (bytes ou str) gravado pelo data_handler."""
+    return processo_de_dict(decode_json(conteudo), numero)
+
+
+def encode_processo(p: Processo, compact: bool = True) -> bytes:
+    """JSON estável do processo (mesmo codec do data_handler)."""
+    return encode_json(processo_para_dict(p), compact)
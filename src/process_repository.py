@@ -0,0 +1,189 @@
+"""
+process_repository.py
+Ponto único de gravação dos processos, usado por todas as páginas.
+
+Cada processo tem uma linha na tabela 'processos' (SQLite: número, partes,
+status, data da última atualização) e um documento JSON em /data (com o
+journal de saves parciais e o índice de busca). As funções abaixo alteram
+os dois dentro de uma única transação do SQLite: se a gravação do JSON
+falhar, a linha não é alterada; se o SQLite falhar, a transação é desfeita
+e a listagem nunca mostra um processo sem documento (ou vice-versa).
+
+Exclusões são a exceção: apagar arquivos não volta num rollback, então o
+JSON, o journal e as imagens só são apagados depois do commit (apos_commit).
+Se o SQLite falhar, nada é apagado.
+
+Pelo mesmo motivo, as referências do processo no blob store (todos os
+'*_ref' do documento: anexos, adendos, questionados, análises, quesitos) são
+sincronizadas depois do commit de cada gravação que pode alterá-las.
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from src import data_handler
+from src.blob_handler import collect_blob_refs, sync_process_blobs
+from src.db_handler import (
+    DB_PATH,
+    STATUS_INICIAL,
+    agora_iso,
+    apos_commit,
+    atualizar_status_em_lote,
+    excluir_em_lote,
+    excluir_processo,
+    init_db,
+    processo_existe,
+    registrar_processo,
+    transacao,
+)
+
+
+# Serializa leitura do documento + sync: o último sync reflete o último documento gravado
+_BLOBS_LOCK = threading.Lock()
+
+
+def _sincronizar_blobs(process_id: str) -> None:
+    """Registra como referências do processo todos os handles do documento gravado."""
+    with _BLOBS_LOCK:
+        sync_process_blobs(process_id, collect_blob_refs(data_handler.load_process_data(process_id)))
+
+
+def _pode_alterar_blobs(delta: Dict[str, Any]) -> bool:
+    """Um delta só com valores simples (ex.: status, datas) não muda os handles do documento."""
+    return any(isinstance(v, (dict, list)) or k.endswith("_ref") for k, v in delta.items())
+
+
+def _party_fields(data: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Autor/réu/status do documento para a linha do SQLite (aceita AUTORES/REUS antigos)."""
+    autor = data.get("AUTOR", data.get("AUTORES"))
+    reu = data.get("REU", data.get("REUS"))
+    return {
+        "autor": autor if isinstance(autor, str) else None,
+        "reu": reu if isinstance(reu, str) else None,
+        "status": data.get("status") if isinstance(data.get("status"), str) else None,
+    }
+
+
+def process_exists(process_id: str, db_path: str = DB_PATH) -> bool:
+    """True se o processo tem linha no banco ou documento em /data."""
+    init_db(db_path)
+    return processo_existe(process_id, db_path) or os.path.exists(data_handler.get_process_file_path(process_id))
+
+
+def create_process(process_id: str, autor: str, reu: str, status: str = STATUS_INICIAL,
+                   data: Optional[Dict[str, Any]] = None, db_path: str = DB_PATH) -> Dict[str, Any]:
+    """
+    Cadastra um processo novo (linha + documento JSON) e retorna o documento gravado.
+    Levanta ValueError se o número já estiver cadastrado.
+    """
+    init_db(db_path)
+    if process_exists(process_id, db_path):
+        raise ValueError(f"O processo com ID {process_id} já existe.")
+
+    atualizado_em = agora_iso()
+    document = {
+        "NUMERO_PROCESSO": process_id,
+        "AUTOR": autor,
+        "REU": reu,
+        "status": status,
+        "atualizado_em": atualizado_em,
+        "etapas_concluidas": [],
+    }
+    document.update(data or {})
+
+    with transacao(db_path):
+        registrar_processo(process_id, autor, reu, status, atualizado_em, db_path=db_path)
+        data_handler.save_process_data(process_id, document)
+        apos_commit(lambda: _sincronizar_blobs(process_id), db_path)
+    return document
+
+
+def save_process(process_id: str, data: Dict[str, Any], db_path: str = DB_PATH) -> None:
+    """Grava o documento completo do processo e atualiza sua linha no banco."""
+    init_db(db_path)
+    with transacao(db_path):
+        registrar_processo(process_id, **_party_fields(data), db_path=db_path)
+        data_handler.save_process_data(process_id, data)
+        apos_commit(lambda: _sincronizar_blobs(process_id), db_path)
+
+
+def patch_process(process_id: str, delta: Dict[str, Any], db_path: str = DB_PATH) -> None:
+    """
+    Grava só as chaves de 'delta' (ver data_handler.patch_process_data) e atualiza a linha.
+    As referências de blobs são recalculadas sobre o documento completo, já mesclado.
+    """
+    init_db(db_path)
+    with transacao(db_path):
+        registrar_processo(process_id, **_party_fields(delta), db_path=db_path)
+        data_handler.patch_process_data(process_id, delta)
+        if _pode_alterar_blobs(delta):
+            apos_commit(lambda: _sincronizar_blobs(process_id), db_path)
+
+
+def load_process(process_id: str) -> Dict[str, Any]:
+    """Documento do processo, já com o journal aplicado ({} se não existir)."""
+    return data_handler.load_process_data(process_id)
+
+
+def list_processes() -> List[str]:
+    """IDs dos processos com documento em /data, ordenados."""
+    return data_handler.list_processes()
+
+
+def get_process_index() -> Dict[str, Dict[str, Any]]:
+    """Índice {id: metadados} dos documentos (autor, réu, status...)."""
+    return data_handler.get_process_index()
+
+
+def update_status(process_id: str, status: str, db_path: str = DB_PATH) -> None:
+    """Altera o status na linha e no documento (Arquivar/Desarquivar/Concluir)."""
+    init_db(db_path)
+    atualizado_em = agora_iso()
+    with transacao(db_path):
+        registrar_processo(process_id, status=status, atualizado_em=atualizado_em, db_path=db_path)
+        if os.path.exists(data_handler.get_process_file_path(process_id)):
+            data_handler.patch_process_data(process_id, {"status": status, "atualizado_em": atualizado_em})
+
+
+def update_status_many(process_ids: Iterable[str], status: str, db_path: str = DB_PATH) -> int:
+    """
+    Altera o status de vários processos numa única transação (linhas e documentos).
+    Retorna quantas linhas foram alteradas.
+    """
+    init_db(db_path)
+    process_ids = list(dict.fromkeys(process_ids))
+    atualizado_em = agora_iso()
+    delta = {"status": status, "atualizado_em": atualizado_em}
+    with transacao(db_path):
+        alterados = atualizar_status_em_lote(process_ids, status, atualizado_em, db_path=db_path)
+        for process_id in process_ids:
+            if os.path.exists(data_handler.get_process_file_path(process_id)):
+                data_handler.patch_process_data(process_id, delta)
+    return alterados
+
+
+def delete_process(process_id: str, db_path: str = DB_PATH) -> None:
+    """
+    Exclui a linha do processo e, depois do commit, o documento (JSON + journal),
+    o índice de busca e as imagens.
+    """
+    init_db(db_path)
+    with transacao(db_path):
+        excluir_processo(process_id, db_path)
+        apos_commit(lambda: data_handler.delete_process(process_id), db_path)
+
+
+def delete_processes(process_ids: Iterable[str], db_path: str = DB_PATH) -> int:
+    """
+    Exclui as linhas de vários processos numa única transação do SQLite e, depois
+    do commit, seus documentos, índice de busca e imagens: se a transação for
+    desfeita, nenhum arquivo é apagado. Retorna quantas linhas foram excluídas.
+    """
+    init_db(db_path)
+    process_ids = list(dict.fromkeys(process_ids))
+    with transacao(db_path):
+        excluidos = excluir_em_lote(process_ids, db_path=db_path)
+        for process_id in process_ids:
+            apos_commit(lambda process_id=process_id: data_handler.delete_process(process_id), db_path)
+    return excluidos
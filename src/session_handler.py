@@ -0,0 +1,212 @@
+"""
+session_handler.py
+Contabilidade de memória do st.session_state e descarga ("spill") dos bytes
+grandes para o blob store.
+
+Uploads (anexos, adendos, imagens de análise e de quesitos) ficam em disco,
+no blob store, e a sessão guarda apenas o handle '<chave>_ref' (SHA-256).
+Os blobs descarregados pertencem ao dono "sessao:<id da sessão>" no contador
+de referências: cada sessão do navegador tem o seu (um id guardado no próprio
+estado), separado do dono do processo salvo. Um arquivo usado por várias
+sessões, ou por uma sessão e pelo processo salvo, só é apagado quando todos
+o liberam.
+
+O Streamlit não avisa quando uma sessão termina: as referências de sessões
+sem atividade há SESSION_IDLE_SECONDS são liberadas, e as de sessões de uma
+execução anterior do servidor são liberadas na primeira descarga (junto com
+os blobs gravados e nunca referenciados, ver sweep_orphan_blobs).
+
+Não depende do Streamlit: as funções recebem qualquer Mapping (ex.: st.session_state).
+"""
+
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Tuple
+
+from src.blob_handler import (
+    get_blob,
+    list_blob_owners,
+    put_blob,
+    release_process_blobs,
+    sweep_orphan_blobs,
+    sync_process_blobs,
+)
+
+# ============================================================
+# CONFIGURAÇÃO
+# ============================================================
+
+# Chaves que guardam bytes de uploads; o handle fica em '<chave>_ref'
+SPILL_KEYS = ("bytes", "imagem_bytes", "imagem_analise_bytes")
+
+# Bytes menores que isto ficam na sessão (não compensa o acesso ao disco)
+SPILL_MIN_BYTES = 32 * 1024
+
+# Chave do estado com o id da sessão (dono dos blobs descarregados)
+SESSION_ID_KEY = "_blob_session_id"
+
+# Sessões sem descarga há mais que isto têm as referências liberadas
+SESSION_IDLE_SECONDS = 24 * 60 * 60
+
+# Por dono de sessão: (últimas referências registradas, último uso em time.monotonic()).
+# Evita regravar refs.json a cada rerun e identifica as sessões ociosas.
+_LAST_SYNC: Dict[str, Tuple[Counter, float]] = {}
+_LAST_SYNC_LOCK = threading.Lock()
+
+# Referências de sessões de uma execução anterior do servidor já foram liberadas?
+_ORPHANS_RELEASED = False
+
+
+# ============================================================
+# CONTABILIDADE DE MEMÓRIA
+# ============================================================
+
+def deep_sizeof(obj: Any, _seen: Optional[set] = None) -> int:
+    """
+    Tamanho aproximado em bytes de 'obj' e de tudo o que ele contém
+    (dicts, listas, tuplas, sets, atributos de objetos, inclusive com __slots__).
+    Objetos compartilhados são contados uma única vez.
+    """
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    try:
+        size = sys.getsizeof(obj)
+    except TypeError:
+        return 0
+
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, Mapping):
+        return size + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        return size + deep_sizeof(vars(obj), seen)
+    # Objetos com __slots__ (ex.: dataclasses do process_model) não têm __dict__
+    slots: List[str] = []
+    for cls in type(obj).__mro__:
+        nomes = cls.__dict__.get("__slots__", ())
+        slots.extend((nomes,) if isinstance(nomes, str) else nomes)
+    return size + sum(deep_sizeof(getattr(obj, nome), seen) for nome in slots if hasattr(obj, nome))
+
+
+def session_memory_report(state: Mapping[str, Any]) -> List[Tuple[str, int]]:
+    """
+    Retorna [(chave, bytes)] do estado da sessão, da maior para a menor.
+    Valores compartilhados entre chaves contam só na primeira (maior) delas.
+    """
+    seen: set = set()
+    report = [(str(key), deep_sizeof(value, seen)) for key, value in state.items()]
+    return sorted(report, key=lambda item: item[1], reverse=True)
+
+
+# ============================================================
+# DESCARGA DE BLOBS (SPILL)
+# ============================================================
+
+SESSION_OWNER_PREFIX = "sessao:"
+
+
+def session_id(state: MutableMapping[str, Any]) -> str:
+    """Id da sessão, criado e guardado no estado na primeira chamada."""
+    if not state.get(SESSION_ID_KEY):
+        state[SESSION_ID_KEY] = uuid.uuid4().hex
+    return state[SESSION_ID_KEY]
+
+
+def spill_owner(state: MutableMapping[str, Any]) -> str:
+    """Dono, no contador de referências do blob store, dos blobs descarregados da sessão."""
+    return f"{SESSION_OWNER_PREFIX}{session_id(state)}"
+
+
+def _release_owner(owner: str) -> None:
+    """Libera as referências do dono (chamada com _LAST_SYNC_LOCK)."""
+    release_process_blobs(owner)
+    _LAST_SYNC.pop(owner, None)
+
+
+def release_idle_sessions(max_idle: float = SESSION_IDLE_SECONDS) -> List[str]:
+    """
+    Libera os blobs das sessões sem descarga há mais de 'max_idle' segundos e,
+    na primeira chamada do processo, os de sessões que não são deste servidor
+    (execuções anteriores) e os blobs antigos sem referência. Retorna os donos liberados.
+    """
+    global _ORPHANS_RELEASED
+    agora = time.monotonic()
+    with _LAST_SYNC_LOCK:
+        liberados = [owner for owner, (_, ultimo_uso) in _LAST_SYNC.items() if agora - ultimo_uso > max_idle]
+        varrer = not _ORPHANS_RELEASED
+        if varrer:
+            liberados += sorted(list_blob_owners(SESSION_OWNER_PREFIX) - set(_LAST_SYNC))
+            _ORPHANS_RELEASED = True
+        for owner in liberados:
+            _release_owner(owner)
+        if varrer:
+            sweep_orphan_blobs()
+    return liberados
+
+
+def _spill(value: Any, min_bytes: int, hashes: List[str]) -> None:
+    """Percorre dicts/listas trocando bytes grandes por '<chave>_ref' e coletando os handles."""
+    if isinstance(value, MutableMapping):
+        for key in SPILL_KEYS:
+            data = value.get(key)
+            if isinstance(data, (bytes, bytearray)) and len(data) >= min_bytes:
+                value[f"{key}_ref"] = put_blob(bytes(data))
+                del value[key]
+            if value.get(f"{key}_ref"):
+                hashes.append(value[f"{key}_ref"])
+        for item in value.values():
+            if isinstance(item, (MutableMapping, list)):
+                _spill(item, min_bytes, hashes)
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, (MutableMapping, list)):
+                _spill(item, min_bytes, hashes)
+
+
+def spill_session_blobs(state: MutableMapping[str, Any], keys: Optional[Iterable[str]] = None,
+                        min_bytes: int = SPILL_MIN_BYTES) -> List[str]:
+    """
+    Move para o blob store os bytes grandes encontrados no estado (em 'keys', ou em
+    todas as chaves) e registra os handles presentes como referências desta sessão.
+    Handles que saíram da sessão (inclusive ao trocar de processo) são liberados.
+    Retorna os hashes.
+    """
+    release_idle_sessions()
+
+    hashes: List[str] = []
+    for key in (list(keys) if keys is not None else list(state.keys())):
+        if key in state:
+            _spill(state[key], min_bytes, hashes)
+
+    owner = spill_owner(state)
+    counts = Counter(hashes)
+    with _LAST_SYNC_LOCK:
+        anterior = _LAST_SYNC.get(owner)
+        if anterior is None or anterior[0] != counts:
+            sync_process_blobs(owner, hashes)
+        _LAST_SYNC[owner] = (counts, time.monotonic())
+    return hashes
+
+
+def release_session_blobs(state: MutableMapping[str, Any]) -> None:
+    """Libera os blobs descarregados desta sessão (ex.: antes de carregar outro processo)."""
+    owner = spill_owner(state)
+    with _LAST_SYNC_LOCK:
+        _release_owner(owner)
+
+
+def get_spilled(item: Mapping[str, Any], key: str = "bytes") -> Optional[bytes]:
+    """Bytes de 'key' no item: em memória ou lidos do blob store pelo handle '<key>_ref'."""
+    data = item.get(key)
+    if data is not None:
+        return data
+    ref = item.get(f"{key}_ref")
+    return get_blob(ref) if ref else None
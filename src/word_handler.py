@@ -2,113 +2,418 @@ from docx import Document
 from docx.shared import Inches, Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from num2words import num2words
+import copy
+from datetime import date, datetime
+import hashlib
 import os
 import re
-from typing import List, Dict, Any 
+import threading
+from dataclasses import dataclass, field
+from typing import IO, List, Dict, Any, Optional, Tuple, Union
 from io import BytesIO
 
+from src.blob_handler import get_blob
+from src.image_handler import preparar_imagem_docx
+from src.chart_handler import radar_eog
+from src.process_model import (
+    Anexo,
+    DocumentoQuestionado,
+    Padrao,
+    Processo,
+    Quesito,
+    processo_de_dict,
+)
+
+# Template padrão do laudo (pasta /template na raiz do projeto)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_MODELO_PADRAO = os.path.join(BASE_DIR, "template", "LAUDO PERICIAL GRAFOTÉCNICO.docx")
+
 # --- FUNÇÕES DE UTILIDADE (REFINADAS) ---
 
-def substituir_em_paragrafo(paragrafo, dados: dict):
-    """Substitui placeholders simples em um parágrafo. Ignora placeholders especiais."""
-    
-    # Placeholders especiais que são tratados separadamente (multi-linha, listas ou inserções dinâmicas)
-    SPECIAL_PLACEHOLDERS = ["RESUMO_CABECALHO", "BLOCO_DOCUMENTOS_QUESTIONADOS", 
-                            "BLOCO_DOCUMENTOS_PADRAO", "BLOCO_CONCLUSAO_DINAMICO",
-                            "BLOCO_QUESITOS_AUTOR", "BLOCO_QUESITOS_REU"]
-    
-    texto_original = paragrafo.text
-    
-    # 1. Ignora parágrafos que contêm placeholders especiais
-    if any(f"[{lp}]" in texto_original for lp in SPECIAL_PLACEHOLDERS):
-        return
+# Qualquer trecho entre colchetes é tratado como placeholder candidato
+PADRAO_PLACEHOLDER = re.compile(r"\[[^\[\]]+\]")
+
+# Placeholders especiais que são tratados separadamente (multi-linha, listas ou inserções dinâmicas)
+SPECIAL_PLACEHOLDERS = frozenset({
+    "[RESUMO_CABECALHO]", "[BLOCO_DOCUMENTOS_QUESTIONADOS]",
+    "[BLOCO_DOCUMENTOS_PADRAO]", "[BLOCO_CONCLUSAO_DINAMICO]",
+    "[BLOCO_QUESITOS_AUTOR]", "[BLOCO_QUESITOS_REU]",
+})
+
+# Chaves cujo valor é convertido com str() mesmo quando não é um tipo simples
+_CHAVES_TEXTO_LIVRE = ("[ID_NOMEACAO_FLS]", "[NUM_LAUDAS_EXTENSO]")
+
 
-    # 2. Substituição de placeholders simples
+def montar_mapa_placeholders(dados: dict) -> Dict[str, str]:
+    """
+    Pré-calcula o mapa [CHAVE_MAIUSCULA] -> texto usado por substituir_em_paragrafo.
+    Deve ser montado uma vez por laudo; a substituição passa a custar O(tamanho do texto).
+    """
+    mapa = {}
     for chave, valor in dados.items():
         # Converte a chave para a notação de placeholder [CHAVE_MAIUSCULA]
-        placeholder = f"[{chave.upper().replace(' ', '_')}]" 
-        
-        if placeholder in texto_original:
-            # Tratamento de placeholders que usam [NÚMEROS] ou [NUM_LAUDAS_EXTENSO]
-            if chave.upper() == 'ID_NOMEACAO_FLS' and '[NÚMEROS]' in texto_original:
-                texto_original = texto_original.replace("[NÚMEROS]", str(valor))
-            elif chave.upper() == 'NUM_LAUDAS_EXTENSO' and '[NUM_LAUDAS_EXTENSO]' in texto_original:
-                 texto_original = texto_original.replace("[NUM_LAUDAS_EXTENSO]", str(valor))
-            
-            # Substituição padrão
-            elif isinstance(valor, (str, int, float, bool)):
-                texto_original = texto_original.replace(placeholder, str(valor))
-    
-    # Aplica a substituição final
-    paragrafo.text = texto_original
+        placeholder = f"[{chave.upper().replace(' ', '_')}]"
+
+        # Em caso de colisão (ex.: 'autor' e 'AUTOR') vale a primeira chave, como antes
+        if placeholder in mapa:
+            continue
+        if isinstance(valor, (str, int, float, bool)) or placeholder in _CHAVES_TEXTO_LIVRE:
+            mapa[placeholder] = str(valor)
+    return mapa
+
+
+# Nós de texto (w:t) visíveis de um parágrafo, na ordem do documento
+_XPATH_TEXTOS_RUN = "./w:r/w:t | ./w:hyperlink/w:r/w:t"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+
+def _calcular_substituicoes(texto: str, mapa: Dict[str, str]) -> Optional[List[Tuple[int, int, str]]]:
+    """
+    Varre o texto uma única vez e devolve os trechos (início, fim, novo_texto) a trocar.
+    Retorna None quando o parágrafo contém um placeholder especial (não deve ser tocado).
+    """
+    # Legado: [NÚMEROS] recebe ID_NOMEACAO_FLS quando ambos estão no mesmo parágrafo
+    # (nesse caso o próprio [ID_NOMEACAO_FLS] é mantido, como no fluxo original).
+    numeros_legado = (
+        "[ID_NOMEACAO_FLS]" in mapa
+        and "[NÚMEROS]" in texto
+        and "[ID_NOMEACAO_FLS]" in texto
+    )
+
+    substituicoes = []
+    for match in PADRAO_PLACEHOLDER.finditer(texto):
+        token = match.group(0)
+        if token in SPECIAL_PLACEHOLDERS:
+            return None
+        if numeros_legado and token == "[NÚMEROS]":
+            novo = mapa["[ID_NOMEACAO_FLS]"]
+        elif numeros_legado and token == "[ID_NOMEACAO_FLS]":
+            continue
+        else:
+            novo = mapa.get(token)
+        if novo is not None and novo != token:
+            substituicoes.append((match.start(), match.end(), novo))
+    return substituicoes
 
-def substituir_em_tabela(tabela, dados: dict):
+
+def _aplicar_nos_runs(nos_texto, substituicoes: List[Tuple[int, int, str]]):
+    """
+    Aplica as substituições diretamente nos nós w:t, mesmo quando o Word dividiu o
+    placeholder em vários runs. O valor herda a formatação do run onde está o '['.
+    Nenhum elemento XML é criado: apenas o texto dos nós envolvidos é alterado.
+    """
+    inicios = []
+    acumulado = 0
+    for no in nos_texto:
+        inicios.append(acumulado)
+        acumulado += len(no.text or "")
+
+    def no_do_offset(offset: int) -> int:
+        idx = 0
+        while idx + 1 < len(inicios) and inicios[idx + 1] <= offset:
+            idx += 1
+        return idx
+
+    # De trás para frente: offsets anteriores continuam válidos após cada troca
+    for inicio, fim, novo in reversed(substituicoes):
+        i = no_do_offset(inicio)
+        j = no_do_offset(fim - 1)
+        a = inicio - inicios[i]
+        b = fim - inicios[j]
+        texto_i = nos_texto[i].text or ""
+        if i == j:
+            nos_texto[i].text = texto_i[:a] + novo + texto_i[b:]
+        else:
+            nos_texto[i].text = texto_i[:a] + novo
+            for k in range(i + 1, j):
+                nos_texto[k].text = ""
+            nos_texto[j].text = (nos_texto[j].text or "")[b:]
+
+        for k in range(i, j + 1):
+            texto_k = nos_texto[k].text or ""
+            if texto_k != texto_k.strip():
+                nos_texto[k].set(_XML_SPACE, "preserve")
+
+
+def substituir_em_paragrafo(paragrafo, dados: dict, mapa: Optional[Dict[str, str]] = None,
+                            preservar_runs: bool = True):
+    """
+    Substitui placeholders simples em um parágrafo. Ignora placeholders especiais.
+    Faz uma única varredura do texto; 'mapa' (de montar_mapa_placeholders) evita
+    reconstruir a tabela de valores a cada parágrafo.
+
+    Com preservar_runs=True (padrão) apenas os runs que contêm o placeholder são
+    editados e parágrafos sem alteração não são tocados. preservar_runs=False
+    mantém o comportamento anterior (reatribui paragrafo.text, recriando os runs).
+    """
+    if mapa is None:
+        mapa = montar_mapa_placeholders(dados)
+
+    if preservar_runs:
+        nos_texto = paragrafo._p.xpath(_XPATH_TEXTOS_RUN)
+        texto_original = "".join(no.text or "" for no in nos_texto)
+    else:
+        texto_original = paragrafo.text
+
+    if "[" not in texto_original:
+        return
+
+    substituicoes = _calcular_substituicoes(texto_original, mapa)
+
+    # 1. Ignora parágrafos que contêm placeholders especiais
+    if substituicoes is None:
+        return
+
+    if preservar_runs:
+        if not substituicoes:
+            return
+        # Quebras de linha/tabulações precisam de w:br/w:tab: usa o caminho tradicional
+        if not any("\n" in novo or "\t" in novo for _, _, novo in substituicoes):
+            _aplicar_nos_runs(nos_texto, substituicoes)
+            return
+        texto_original = paragrafo.text
+        substituicoes = _calcular_substituicoes(texto_original, mapa) or []
+
+    # Aplica a substituição final (reconstrói os runs do parágrafo)
+    partes = []
+    cursor = 0
+    for inicio, fim, novo in substituicoes:
+        partes.append(texto_original[cursor:inicio])
+        partes.append(novo)
+        cursor = fim
+    partes.append(texto_original[cursor:])
+    paragrafo.text = "".join(partes)
+
+def substituir_em_tabela(tabela, dados: dict, mapa: Optional[Dict[str, str]] = None,
+                         preservar_runs: bool = True):
     """Substitui placeholders em todas as células de uma tabela."""
+    if mapa is None:
+        mapa = montar_mapa_placeholders(dados)
     for row in tabela.rows:
         for cell in row.cells:
             for paragrafo in cell.paragraphs:
-                substituir_em_paragrafo(paragrafo, dados)
+                substituir_em_paragrafo(paragrafo, dados, mapa, preservar_runs)
 
 # --- FUNÇÕES DE GERAÇÃO DE BLOCOS (PLACEHOLDERS FUNCIONAIS) ---
 
-def gerar_bloco_documentos_questionados(documentos: List[Dict[str, Any]]) -> str:
+def gerar_bloco_documentos_questionados(documentos: List[DocumentoQuestionado]) -> str:
     """Gera o texto do Bloco 4.1."""
     if not documentos:
         return "Nenhum documento questionado (PQ) foi cadastrado na Etapa 4.1."
     
     texto = "\n".join([
-        f"- {doc.get('TIPO_DOCUMENTO', 'Documento S/N')} (Fls. {doc.get('FLS_DOCUMENTOS', 'S/N')})"
+        f"- {doc.tipo_documento or 'Documento S/N'} (Fls. {doc.fls_documentos or 'S/N'})"
         for doc in documentos
     ])
     return f"Os seguintes documentos foram submetidos a exame (PQ):\n{texto}"
 
-def gerar_bloco_paradigmas(paradigmas: Dict[str, List[Dict[str, Any]]]) -> str:
-    """Gera o texto do Bloco 4.2."""
+def gerar_bloco_paradigmas(paradigmas: List[Padrao]) -> str:
+    """Gera o texto do Bloco 4.2 (padrões encontrados nos autos, PCE)."""
     if not paradigmas:
         return "Nenhum paradigma de confronto (PC) foi cadastrado na Etapa 4.2."
     
     texto = "Os paradigmas de confronto (PC) foram obtidos conforme:\n"
-    if paradigmas.get('PCE'):
-        texto += "A. Padrões Encontrados nos Autos (PCE):\n"
-        for p in paradigmas['PCE']:
-             texto += f"  - {p.get('DESCRICAO', 'PCE S/N')} (Fls. {p.get('FLS', 'S/N')})\n"
+    texto += "A. Padrões Encontrados nos Autos (PCE):\n"
+    for p in paradigmas:
+        texto += f"  - {p.tipo_documento or 'PCE S/N'} (Fls. {p.numeros or 'S/N'})\n"
     
     return texto.strip()
 
-def gerar_bloco_respostas_quesitos(dados: Dict[str, Any], parte: str) -> str:
+def gerar_bloco_respostas_quesitos(quesitos: List[Quesito], nao_enviados: bool, parte: str) -> str:
     """Gera o bloco de respostas aos quesitos (Autor ou Réu)."""
-    # Exemplo simples, deve ser substituído pela lógica real de formatação de quesitos
-    quesitos_data = dados.get(f'quesitos_{parte.lower()}_data', {}).get('list', [])
-    
-    if dados.get(f'quesitos_{parte.lower()}_data', {}).get('nao_enviados', False):
+    if nao_enviados:
         return f"A parte {parte} optou por não apresentar quesitos."
 
-    if not quesitos_data:
+    if not quesitos:
         return f"A parte {parte} não apresentou quesitos a serem respondidos."
 
     texto = ""
-    for idx, q in enumerate(quesitos_data):
+    for idx, q in enumerate(quesitos):
         texto += f"**{idx+1}. Quesito da Parte {parte}:**\n"
-        texto += f"   *Pergunta:* {q.get('pergunta', 'N/A')}\n"
-        texto += f"   *Resposta:* {q.get('resposta_formatada', 'N/A')}\n\n"
+        texto += f"   *Pergunta:* {q.texto or 'N/A'}\n"
+        texto += f"   *Resposta:* {q.resposta or 'N/A'}\n\n"
         
     return texto.strip()
 
 
+# --- MODELO COMPILADO (TEMPLATE ANALISADO UMA ÚNICA VEZ) ---
+
+# Parágrafo sentinela após o qual entram ADENDOS e ANEXOS (Bloco 8 - Encerramento)
+SENTINELA_ENCERRAMENTO = "Nada mais havendo a relatar,"
+
+# Local de um parágrafo no modelo: ("p", idx_paragrafo) no corpo ou
+# ("t", idx_tabela, idx_linha, idx_celula, idx_paragrafo) dentro de tabelas.
+Local = Tuple[Any, ...]
+
+
+@dataclass
+class ModeloCompilado:
+    """
+    Plano de renderização de um template DOCX.
+    Guarda o documento já analisado (copiado a cada renderização) e os
+    parágrafos que contêm placeholders, evitando percorrer todo o documento.
+    """
+    caminho: str
+    mtime_ns: int
+    sha256: str
+    documento: Any
+    locais: List[Local] = field(default_factory=list)
+    sentinela: Optional[Local] = None
+
+
+_CACHE_MODELOS: Dict[str, ModeloCompilado] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _iterar_paragrafos(doc):
+    """Percorre (local, parágrafo) do corpo e das tabelas, na mesma ordem do gerar_laudo."""
+    for i, paragrafo in enumerate(doc.paragraphs):
+        yield ("p", i), paragrafo
+    for t, tabela in enumerate(doc.tables):
+        for r, row in enumerate(tabela.rows):
+            for c, cell in enumerate(row.cells):
+                for k, paragrafo in enumerate(cell.paragraphs):
+                    yield ("t", t, r, c, k), paragrafo
+
+
+def _resolver_paragrafo(doc, local: Local, paragrafos_corpo):
+    """Obtém o parágrafo do documento renderizado a partir do local gravado no plano."""
+    if local[0] == "p":
+        return paragrafos_corpo[local[1]]
+    _, t, r, c, k = local
+    return doc.tables[t].rows[r].cells[c].paragraphs[k]
+
+
+def compilar_modelo(caminho_modelo: str) -> ModeloCompilado:
+    """
+    Retorna o plano compilado do template, reaproveitando o cache enquanto
+    o arquivo não mudar (mtime e, em caso de dúvida, hash SHA-256).
+    """
+    caminho_abs = os.path.abspath(caminho_modelo)
+    mtime_ns = os.stat(caminho_abs).st_mtime_ns
+
+    with _CACHE_LOCK:
+        cache = _CACHE_MODELOS.get(caminho_abs)
+        if cache and cache.mtime_ns == mtime_ns:
+            return cache
+
+        with open(caminho_abs, "rb") as f:
+            conteudo = f.read()
+        sha256 = hashlib.sha256(conteudo).hexdigest()
+
+        # Arquivo apenas "tocado" (mesmo conteúdo): mantém o plano atual
+        if cache and cache.sha256 == sha256:
+            cache.mtime_ns = mtime_ns
+            return cache
+
+        # O documento mestre nunca é percorrido: os proxies do python-docx guardam
+        # referências a subelementos lxml, que o deepcopy copiaria desconectados.
+        mestre = Document(BytesIO(conteudo))
+        analise = Document(BytesIO(conteudo))
+        modelo = ModeloCompilado(caminho=caminho_abs, mtime_ns=mtime_ns, sha256=sha256, documento=mestre)
+
+        for local, paragrafo in _iterar_paragrafos(analise):
+            if PADRAO_PLACEHOLDER.search(paragrafo.text):
+                modelo.locais.append(local)
+            if modelo.sentinela is None and local[0] == "p" and SENTINELA_ENCERRAMENTO in paragrafo.text:
+                modelo.sentinela = local
+
+        _CACHE_MODELOS[caminho_abs] = modelo
+        return modelo
+
+
+# --- IMAGENS DE ANEXOS/ADENDOS ---
+
+# Largura de exibição das imagens no laudo (polegadas)
+LARGURA_IMAGEM_POL = 6.0
+
+def _bytes_da_imagem(item: Anexo) -> Optional[bytes]:
+    """
+    Bytes da imagem do item: em memória (ainda não descarregados) ou carregados
+    sob demanda do blob store ('bytes_ref'), apenas no momento da inserção no DOCX.
+    Adendos 'grafico_eog' usam o mesmo radar (em cache) exibido na página.
+    """
+    if item.conteudo:
+        return item.conteudo
+    if item.bytes_ref:
+        return get_blob(item.bytes_ref)
+    if item.tipo == 'grafico_eog' and item.eog is not None:
+        return radar_eog(item.eog)
+    return None
+
+
+def _estilo(doc, nome: str) -> Optional[str]:
+    """'nome' se o template define o estilo; senão None (estilo padrão do parágrafo)."""
+    try:
+        doc.styles[nome]
+        return nome
+    except KeyError:
+        return None
+
+
+def _inserir_imagem(doc, imagem: bytes):
+    """Insere a imagem já reduzida/recomprimida para a largura de exibição no laudo."""
+    imagem = preparar_imagem_docx(imagem, LARGURA_IMAGEM_POL)
+    doc.add_paragraph().add_run().add_picture(BytesIO(imagem), width=Inches(LARGURA_IMAGEM_POL))
+
+
 # --- FUNÇÃO PRINCIPAL: GERAR LAUDO ---
 
-def gerar_laudo(caminho_modelo: str, caminho_saida: str, dados: Dict[str, Any], adendos: List[Dict[str, Any]], anexos: List[Dict[str, Any]]):
+def _campos_do_processo(processo: Processo) -> Dict[str, Any]:
+    """Campos simples do template lidos do modelo (as listas vão direto para os blocos)."""
+    dados = dict(processo.extras or {})
+    dados['NUMERO_PROCESSO'] = processo.numero
+    dados['AUTOR'] = processo.autor
+    dados['REU'] = processo.reu
+    return dados
+
+
+def gerar_laudo(
+    caminho_modelo: str,
+    caminho_saida: Union[str, IO[bytes]],
+    dados: Union[Processo, Dict[str, Any]],
+    adendos: Optional[List[Dict[str, Any]]] = None,
+    anexos: Optional[List[Dict[str, Any]]] = None,
+):
+    """
+    Gera o laudo a partir do template.
+    'dados' pode ser o Processo já montado (usado como está) ou o dict do JSON;
+    o dict é lido de forma tolerante: campo de tipo inesperado não impede o laudo.
+    'adendos'/'anexos', quando informados, substituem os do próprio dict.
+    'caminho_saida' pode ser um caminho em disco ou um stream binário (ex.: BytesIO).
+    """
     
-    # 0. Carrega o documento e prepara a variável de inserção
-    doc = Document(caminho_modelo)
+    # 0. Obtém o plano compilado (cache) e uma cópia independente do documento
+    modelo = compilar_modelo(caminho_modelo)
+    doc = copy.deepcopy(modelo.documento)
     target_paragrafo = None 
     
     # --- 1. Preparação dos Dados (Padronização e Geração de Blocos) ---
     
-    # 1.1. Padroniza as chaves (o word_handler espera as chaves em upper snake case)
-    dados['NUMERO_PROCESSO'] = dados.get('numero_processo', 'N/A')
-    dados['AUTOR'] = dados.get('AUTOR', 'N/A')
-    dados['REU'] = dados.get('REU', 'N/A')
+    # 1.1. Modelo tipado (variantes de chaves resolvidas lá) e campos simples do template
+    if isinstance(dados, Processo):
+        processo = dados
+        dados = _campos_do_processo(processo)
+    else:
+        dados = dict(dados)
+        if adendos is not None:
+            dados['adendos'] = adendos
+        if anexos is not None:
+            dados['anexos'] = anexos
+        processo = processo_de_dict(dados, estrito=False)
+    adendos = processo.adendos
+    anexos = processo.anexos
+
+    dados['NUMERO_PROCESSO'] = processo.numero or 'N/A'
+    dados['AUTOR'] = processo.autor or 'N/A'
+    dados['REU'] = processo.reu or 'N/A'
+    if processo.data_laudo is not None:
+        dados['DATA_LAUDO'] = processo.data_laudo
+    
+    # Datas são exibidas no padrão brasileiro
+    for chave, valor in dados.items():
+        if isinstance(valor, (date, datetime)):
+            dados[chave] = valor.strftime("%d/%m/%Y")
     
     # 1.2. Geração do placeholder [RESUMO_CABECALHO] (Multi-linha)
     resumo_cabecalho_formatado = (
@@ -126,19 +431,25 @@ def gerar_laudo(caminho_modelo: str, caminho_saida: str, dados: Dict[str, Any],
         dados['NUM_LAUDAS_EXTENSO'] = "zero"
 
     # 1.4. Geração dos Blocos de Conteúdo Dinâmico (para substituição no loop 2.2)
-    dados['BLOCO_DOCUMENTOS_QUESTIONADOS'] = gerar_bloco_documentos_questionados(dados.get('questionados_list', []))
-    # Adapte esta chamada conforme a estrutura de dados reais de 'paradigmas'
-    dados['BLOCO_DOCUMENTOS_PADRAO'] = gerar_bloco_paradigmas(dados.get('padroes_confronto', {})) 
-    dados['BLOCO_CONCLUSAO_DINAMICO'] = dados.get('BLOCO_CONCLUSAO_DINAMICO', 'Nenhuma conclusão registrada.')
+    dados['BLOCO_DOCUMENTOS_QUESTIONADOS'] = gerar_bloco_documentos_questionados(processo.questionados)
+    dados['BLOCO_DOCUMENTOS_PADRAO'] = gerar_bloco_paradigmas(processo.padroes)
+    dados['BLOCO_CONCLUSAO_DINAMICO'] = (
+        dados.get('BLOCO_CONCLUSAO_DINAMICO') or processo.conclusao_final or 'Nenhuma conclusão registrada.'
+    )
     
-    # Assume que a lógica de quesitos usa as chaves do session_state
-    dados['BLOCO_QUESITOS_AUTOR'] = gerar_bloco_respostas_quesitos(dados, 'Autora')
-    dados['BLOCO_QUESITOS_REU'] = gerar_bloco_respostas_quesitos(dados, 'Ré')
+    dados['BLOCO_QUESITOS_AUTOR'] = gerar_bloco_respostas_quesitos(
+        processo.quesitos_autor, processo.quesitos_autor_nao_enviados, 'Autora')
+    dados['BLOCO_QUESITOS_REU'] = gerar_bloco_respostas_quesitos(
+        processo.quesitos_reu, processo.quesitos_reu_nao_enviados, 'Ré')
     
     
-    # --- 2. Substituição em Parágrafos e Tabelas (Geral) ---
+    # --- 2. Substituição em Parágrafos e Tabelas (apenas onde há placeholders) ---
     
-    for paragrafo in doc.paragraphs:
+    paragrafos_corpo = doc.paragraphs
+    mapa = montar_mapa_placeholders(dados)
+
+    for local in modelo.locais:
+        paragrafo = _resolver_paragrafo(doc, local, paragrafos_corpo)
         
         # 2.1. TRATAMENTO CRÍTICO: Substituição do cabeçalho (Multi-linha)
         if "[RESUMO_CABECALHO]" in paragrafo.text:
@@ -158,16 +469,12 @@ def gerar_laudo(caminho_modelo: str, caminho_saida: str, dados: Dict[str, Any],
         # 2.2. Substituição de campos simples e blocos de texto (Blocos 4, 6, 7)
         # Atenção: Esta função deve ser chamada APÓS o tratamento do RESUMO_CABECALHO
         # e é responsável por substituir [BLOCO_DOCUMENTOS_QUESTIONADOS], etc.
-        substituir_em_paragrafo(paragrafo, dados)
+        substituir_em_paragrafo(paragrafo, dados, mapa)
 
-        # 2.3. Identifica a posição de inserção dos ADENDOS/ANEXOS (Após 8. ENCERRAMENTO)
-        # O parágrafo deve ser exatamente o que contém "Nada mais havendo a relatar..."
-        if "Nada mais havendo a relatar," in paragrafo.text:
-             # O target_paragrafo será o último parágrafo do Bloco 8
-             target_paragrafo = paragrafo
-
-    for tabela in doc.tables:
-        substituir_em_tabela(tabela, dados)
+    # 2.3. Posição de inserção dos ADENDOS/ANEXOS (Após 8. ENCERRAMENTO), já localizada na compilação
+    # O parágrafo deve ser exatamente o que contém "Nada mais havendo a relatar..."
+    if modelo.sentinela is not None:
+        target_paragrafo = _resolver_paragrafo(doc, modelo.sentinela, paragrafos_corpo)
 
     
     # --- 3. Inserção Dinâmica de ADENDOS e ANEXOS (Fluxo Corrigido) ---
@@ -184,39 +491,52 @@ def gerar_laudo(caminho_modelo: str, caminho_saida: str, dados: Dict[str, Any],
         # 3.1. INSERÇÃO DOS ANEXOS (Aparece por último no documento)
         if anexos:
             # Adiciona Título "ANEXOS" (Estilo Heading 1, se o template suportar)
-            anexo_heading = doc.add_paragraph("ANEXOS", style='Heading 1')
+            anexo_heading = doc.add_paragraph("ANEXOS", style=_estilo(doc, 'Heading 1'))
             anexo_heading.alignment = WD_ALIGN_PARAGRAPH.CENTER # Exemplo de alinhamento
             
             for item in anexos:
-                doc.add_paragraph(f"Documento: {item.get('descricao', 'N/A')}", style='Body Text')
-                doc.add_paragraph(f"Arquivo: {item.get('filename', 'N/A')}")
+                doc.add_paragraph(f"Documento: {item.descricao or 'N/A'}", style=_estilo(doc, 'Body Text'))
+                doc.add_paragraph(f"Arquivo: {item.filename or 'N/A'}")
                 
-                # Exemplo de Inserção de Imagem/Arquivo (Apenas se 'bytes' existir)
-                if item.get('bytes'):
-                    image_stream = BytesIO(item['bytes'])
+                # Exemplo de Inserção de Imagem/Arquivo (Apenas se houver imagem)
+                imagem = _bytes_da_imagem(item)
+                if imagem:
                     # Adiciona a imagem com largura limitada
-                    doc.add_paragraph().add_run().add_picture(image_stream, width=Inches(6.0))
+                    _inserir_imagem(doc, imagem)
                     doc.add_page_break() # Quebra de página após cada Anexo/Adendo grande
         
         # 3.2. INSERÇÃO DOS ADENDOS (Aparece antes dos Anexos)
         if adendos:
             # Adiciona Título "ADENDOS"
-            adendo_heading = doc.add_paragraph("ADENDOS", style='Heading 1')
+            adendo_heading = doc.add_paragraph("ADENDOS", style=_estilo(doc, 'Heading 1'))
             adendo_heading.alignment = WD_ALIGN_PARAGRAPH.CENTER 
 
             for item in adendos:
-                doc.add_paragraph(f"Descrição: {item.get('descricao', 'N/A')}", style='Body Text')
+                doc.add_paragraph(f"Descrição: {item.descricao or 'N/A'}", style=_estilo(doc, 'Body Text'))
                 
                 # Se for uma imagem/arquivo manual ou gráfico EOG
-                if item.get('bytes'):
-                    image_stream = BytesIO(item['bytes'])
-                    doc.add_paragraph().add_run().add_picture(image_stream, width=Inches(6.0))
+                imagem = _bytes_da_imagem(item)
+                if imagem:
+                    _inserir_imagem(doc, imagem)
                     doc.add_page_break() 
                 # Se for uma tabela EOG (seria necessário um handler específico para tabelas)
-                elif item.get('tipo') == 'tabela_eog':
+                elif item.tipo == 'tabela_eog':
                     doc.add_paragraph("## TABELA EOG INSERIDA AQUI ##") 
                     # ... (Lógica para reconstruir a tabela DOCX a partir dos dados EOG) ...
 
-    # --- 4. Salva o documento ---
+    # --- 4. Salva o documento (arquivo ou stream) ---
     doc.save(caminho_saida)
-    return caminho_saida
\ No newline at end of file
+    return caminho_saida
+
+
+# --- GERAÇÃO EM MEMÓRIA (USADA PELA PÁGINA 01_Gerar_laudo) ---
+
+def generate_report_from_template(dados: Union[Processo, Dict[str, Any]], caminho_modelo: str = CAMINHO_MODELO_PADRAO) -> bytes:
+    """
+    Gera o laudo inteiramente em memória e retorna os bytes do DOCX,
+    prontos para o st.download_button (sem gravar em /output).
+    'dados' pode ser o Processo já montado ou o dict com as chaves da página.
+    """
+    buffer = BytesIO()
+    gerar_laudo(caminho_modelo, buffer, dados)
+    return buffer.getvalue()
@@ -0,0 +1,45 @@
+"""
+Ambiente isolado para os testes do backend: /data, blob store e processos.db
+numa pasta temporária por teste.
+"""
+
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from src import blob_handler, chart_handler, data_handler, db_handler, image_handler, session_handler  # noqa: E402
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    """
+    Redireciona os diretórios de dados, blobs e caches de imagem para tmp_path e
+    muda o diretório atual para lá (o processos.db padrão é relativo).
+    Retorna tmp_path.
+    """
+    data_dir = tmp_path / "data"
+    blob_dir = data_dir / "blobs"
+    blob_dir.mkdir(parents=True)
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(data_handler, "PROCESS_DATA_DIR", str(data_dir))
+    monkeypatch.setattr(data_handler, "_INDEX_CACHE",
+                        {"mtime_ns": None, "dir_mtime_ns": None, "index": {}, "ids": []})
+    monkeypatch.setattr(blob_handler, "BLOB_DIR", str(blob_dir))
+    monkeypatch.setattr(blob_handler, "REFS_FILE", str(blob_dir / "refs.json"))
+    monkeypatch.setattr(blob_handler, "_REFS_CACHE", {"mtime_ns": None, "refs": {}})
+    monkeypatch.setattr(blob_handler, "_PENDENTES", {})
+    monkeypatch.setattr(session_handler, "_LAST_SYNC", {})
+    monkeypatch.setattr(session_handler, "_ORPHANS_RELEASED", False)
+    monkeypatch.setattr(chart_handler, "CHART_CACHE_DIR", str(data_dir / "cache_graficos"))
+    monkeypatch.setattr(chart_handler, "_VERSOES_PODADAS", {"feito": False})
+    monkeypatch.setattr(image_handler, "IMAGE_CACHE_DIR", str(data_dir / "cache_imagens"))
+    monkeypatch.setattr(image_handler, "_ULTIMA_PODA", {"instante": None})
+
+    db_handler.fechar_conexoes()
+    yield tmp_path
+    db_handler.fechar_conexoes()
@@ -0,0 +1,239 @@
+import os
+import threading
+import time
+
+import pytest
+
+from src import blob_handler, process_repository, session_handler
+from src.blob_handler import get_blob, put_blob, sync_process_blobs
+from src.db_handler import transacao
+from src.session_handler import (
+    release_idle_sessions,
+    release_session_blobs,
+    spill_owner,
+    spill_session_blobs,
+)
+
+
+def _sessao(*imagens):
+    """Estado de sessão com um anexo por imagem (bytes ainda em memória)."""
+    return {"anexos": [{"id": f"a{i}", "bytes": imagem} for i, imagem in enumerate(imagens)]}
+
+
+def _spill(state):
+    return spill_session_blobs(state, keys=["anexos"], min_bytes=1)
+
+
+# --- contagem de referências no blob store ---
+
+def test_blob_so_e_apagado_quando_nenhum_dono_o_referencia(ambiente):
+    sha256 = put_blob(b"imagem")
+    sync_process_blobs("P1", [sha256, sha256])
+    sync_process_blobs("P2", [sha256])
+
+    sync_process_blobs("P1", [])
+    assert get_blob(sha256) == b"imagem"
+
+    blob_handler.release_process_blobs("P2")
+    assert get_blob(sha256) is None
+
+
+def test_list_blob_owners_filtra_por_prefixo(ambiente):
+    sync_process_blobs("P1", [put_blob(b"a")])
+    sync_process_blobs("sessao:x", [put_blob(b"b")])
+    assert blob_handler.list_blob_owners("sessao:") == {"sessao:x"}
+
+
+def test_blob_regravado_e_ainda_nao_registrado_nao_e_apagado(ambiente):
+    sha256 = put_blob(b"imagem")
+    sync_process_blobs("P1", [sha256])
+
+    # Outra sessão envia a mesma imagem e P1 a descarta antes do registro da sessão
+    assert put_blob(b"imagem") == sha256
+    sync_process_blobs("P1", [])
+    assert get_blob(sha256) == b"imagem"
+
+    sync_process_blobs("sessao:x", [sha256])
+    sync_process_blobs("sessao:x", [])
+    assert get_blob(sha256) is None
+
+
+def test_referencias_inalteradas_nao_regravam_refs_json(ambiente, monkeypatch):
+    sha256 = put_blob(b"imagem")
+    sync_process_blobs("P1", [sha256, sha256])
+
+    gravacoes = []
+    monkeypatch.setattr(blob_handler, "_save_refs", gravacoes.append)
+    sync_process_blobs("P1", [sha256, sha256])
+    blob_handler.release_process_blobs("P2")
+    assert gravacoes == []
+
+
+def test_gravacoes_concorrentes_de_donos_diferentes_nao_se_perdem(ambiente):
+    hashes = {f"P{i}": put_blob(f"imagem {i}".encode()) for i in range(20)}
+    threads = [threading.Thread(target=sync_process_blobs, args=(pid, [sha256])) for pid, sha256 in hashes.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert blob_handler.list_blob_owners("P") == set(hashes)
+    assert not [nome for nome in os.listdir(blob_handler.BLOB_DIR) if nome.endswith(".tmp")]
+
+
+def test_varredura_remove_so_blobs_antigos_sem_referencia(ambiente, monkeypatch):
+    referenciado = put_blob(b"referenciado")
+    sync_process_blobs("P", [referenciado])
+    abandonado = put_blob(b"upload nunca registrado")
+    recente = put_blob(b"upload em andamento")
+
+    monkeypatch.setattr(blob_handler, "_PENDENTES", {recente: time.monotonic()})
+    antigo = time.time() - 2 * blob_handler.BLOB_GRACE_SECONDS
+    for sha256 in (referenciado, abandonado):
+        os.utime(blob_handler.get_blob_path(sha256), (antigo, antigo))
+
+    assert blob_handler.sweep_orphan_blobs() == [abandonado]
+    assert get_blob(referenciado) == b"referenciado"
+    assert get_blob(recente) == b"upload em andamento"
+
+
+# --- donos por sessão ---
+
+def test_sessao_tem_dono_proprio_e_estavel(ambiente):
+    s1, s2 = _sessao(), _sessao()
+    assert spill_owner(s1) == spill_owner(s1)
+    assert spill_owner(s1) != spill_owner(s2)
+
+
+def test_duas_sessoes_no_mesmo_processo_nao_apagam_uploads_uma_da_outra(ambiente):
+    s1 = _sessao(b"imagem da sessao 1")
+    s2 = _sessao(b"imagem da sessao 2")
+    (h1,) = _spill(s1)
+    (h2,) = _spill(s2)
+
+    # A sessão 2 descarta a sua imagem: a da sessão 1 continua no disco
+    s2["anexos"] = []
+    _spill(s2)
+    assert get_blob(h1) == b"imagem da sessao 1"
+    assert get_blob(h2) is None
+    assert s1["anexos"][0] == {"id": "a0", "bytes_ref": h1}
+
+
+def test_blob_da_sessao_e_do_processo_salvo_sobrevive_a_liberacao_da_sessao(ambiente):
+    state = _sessao(b"imagem salva")
+    (sha256,) = _spill(state)
+    sync_process_blobs("P", [sha256])
+
+    release_session_blobs(state)
+    assert get_blob(sha256) == b"imagem salva"
+
+
+def test_trocar_de_processo_libera_uploads_nao_salvos(ambiente):
+    state = _sessao(b"upload nao salvo")
+    (sha256,) = _spill(state)
+
+    release_session_blobs(state)
+    assert get_blob(sha256) is None
+
+
+def test_sessoes_ociosas_sao_liberadas(ambiente, monkeypatch):
+    ativa, ociosa = _sessao(b"ativa"), _sessao(b"ociosa")
+    (h_ativa,) = _spill(ativa)
+    (h_ociosa,) = _spill(ociosa)
+
+    counts, _ = session_handler._LAST_SYNC[spill_owner(ociosa)]
+    session_handler._LAST_SYNC[spill_owner(ociosa)] = (counts, time.monotonic() - 3600)
+
+    assert release_idle_sessions(max_idle=60) == [spill_owner(ociosa)]
+    assert get_blob(h_ociosa) is None
+    assert get_blob(h_ativa) == b"ativa"
+
+
+def test_sessoes_de_execucao_anterior_sao_liberadas_na_primeira_descarga(ambiente):
+    antigo = put_blob(b"upload de uma sessao anterior ao reinicio")
+    sync_process_blobs("sessao:reiniciada", [antigo])
+    salvo = put_blob(b"imagem do processo")
+    sync_process_blobs("P", [salvo])
+
+    _spill(_sessao(b"nova"))
+
+    assert get_blob(antigo) is None
+    assert get_blob(salvo) == b"imagem do processo"
+    assert blob_handler.list_blob_owners("sessao:reiniciada") == set()
+
+
+# --- dono do processo salvo ---
+
+def _documento(imagens):
+    """Documento com handles em todos os lugares que guardam imagens."""
+    return {
+        "AUTOR": "Autor",
+        "REU": "Réu",
+        "anexos": [{"id": "an", "bytes_ref": imagens["anexo"]}],
+        "adendos": [{"id": "ad", "bytes_ref": imagens["adendo"]}],
+        "questionados_list": [{"id": "q1", "imagem_bytes_ref": imagens["questionado"]}],
+        "saved_analyses": {"q1": {"imagem_analise_bytes_ref": imagens["analise"]}},
+        "LISTA_QS_AUTOR": [{"id": "qa", "imagem_bytes_ref": imagens["quesito"]}],
+    }
+
+
+def _imagens():
+    return {nome: put_blob(nome.encode() * 50) for nome in ("anexo", "adendo", "questionado", "analise", "quesito")}
+
+
+def test_collect_blob_refs_encontra_handles_em_qualquer_nivel(ambiente):
+    imagens = _imagens()
+    assert sorted(blob_handler.collect_blob_refs(_documento(imagens))) == sorted(imagens.values())
+
+
+def test_save_process_registra_todos_os_handles_do_documento(ambiente):
+    imagens = _imagens()
+    process_repository.create_process("P", "Autor", "Réu")
+    process_repository.save_process("P", _documento(imagens))
+
+    # Outra dona (ex.: a sessão) registra e depois descarta as mesmas imagens
+    sync_process_blobs("sessao:x", list(imagens.values()))
+    sync_process_blobs("sessao:x", [])
+    for sha256 in imagens.values():
+        assert get_blob(sha256) is not None
+
+
+def test_sessao_que_descarta_imagem_salva_nao_quebra_o_documento(ambiente):
+    state = {"questionados_list": [{"id": "q1", "imagem_bytes": b"assinatura" * 10}]}
+    (sha256,) = spill_session_blobs(state, keys=["questionados_list"], min_bytes=1)
+    process_repository.create_process("P", "Autor", "Réu")
+    process_repository.patch_process("P", {"questionados_list": state["questionados_list"]})
+
+    # Edição não salva remove a imagem da sessão
+    state["questionados_list"][0].pop("imagem_bytes_ref")
+    spill_session_blobs(state, keys=["questionados_list"], min_bytes=1)
+
+    salvo = process_repository.load_process("P")["questionados_list"][0]["imagem_bytes_ref"]
+    assert salvo == sha256
+    assert get_blob(sha256) == b"assinatura" * 10
+
+
+def test_patch_process_libera_so_os_handles_que_sairam_do_documento(ambiente):
+    imagens = _imagens()
+    process_repository.create_process("P", "Autor", "Réu", data=_documento(imagens))
+
+    process_repository.patch_process("P", {"LISTA_QS_AUTOR": []})
+    assert get_blob(imagens["quesito"]) is None
+    for nome in ("anexo", "adendo", "questionado", "analise"):
+        assert get_blob(imagens[nome]) is not None
+
+    # Delta só com valores simples não relê o documento nem altera referências
+    process_repository.patch_process("P", {"status": "Arquivado"})
+    assert get_blob(imagens["anexo"]) is not None
+
+
+def test_gravacao_desfeita_nao_altera_referencias(ambiente):
+    imagens = _imagens()
+    process_repository.create_process("P", "Autor", "Réu", data=_documento(imagens))
+
+    with pytest.raises(RuntimeError):
+        with transacao():
+            process_repository.patch_process("P", {"anexos": []})
+            raise RuntimeError("desfaz")
+
+    assert get_blob(imagens["anexo"]) is not None
@@ -0,0 +1,49 @@
+import importlib.util
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src import chart_handler
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EOG = {"HABILIDADE_VELOCIDADE": "ADEQUADO", "CALIBRE": "DIVERGENTE"}
+
+
+def test_backend_leve_nao_importa_matplotlib(ambiente):
+    codigo = (
+        "import sys; from src import chart_handler; "
+        f"chart_handler.CHART_CACHE_DIR = {str(ambiente / 'cache_graficos')!r}; "
+        "assert chart_handler.radar_eog({}, 'png', 'leve').startswith(b'\\x89PNG'); "
+        "assert chart_handler.radar_eog({}, 'svg', 'leve').lstrip().startswith(b'<'); "
+        "assert 'matplotlib' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", codigo], cwd=BASE_DIR, check=True)
+
+
+def test_radar_em_cache_devolve_os_mesmos_bytes(ambiente):
+    assert chart_handler.radar_eog(EOG, "png", "leve") is chart_handler.radar_eog(dict(EOG), "png", "leve")
+
+
+@pytest.mark.skipif(importlib.util.find_spec("matplotlib") is not None, reason="matplotlib instalado")
+def test_backend_matplotlib_sem_matplotlib_instalado(ambiente):
+    with pytest.raises(ImportError, match="leve"):
+        chart_handler.radar_eog({"CALIBRE": "LIMITADO"}, "png", "matplotlib")
+
+
+def test_cache_em_disco_descarta_versoes_antigas(ambiente, monkeypatch):
+    cache_dir = ambiente / "data" / "cache_graficos"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    antigo = cache_dir / "radar_leve_22222.png"
+    (cache_dir / "radar_v0_leve_11111.svg").write_bytes(b"<svg/>")
+    antigo.write_bytes(b"desenho antigo")
+    monkeypatch.setattr(chart_handler, "VERSAO_RADAR", 99)
+    chart_handler._radar_bytes.cache_clear()
+
+    resultado = chart_handler.radar_eog({}, "png", "leve")
+
+    assert resultado != b"desenho antigo"
+    assert sorted(os.listdir(cache_dir)) == ["radar_v99_leve_11111.png"]
+    chart_handler._radar_bytes.cache_clear()
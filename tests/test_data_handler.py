@@ -0,0 +1,49 @@
+import threading
+
+from src import data_handler
+from src.data_handler import get_process_file_path, load_process_data, save_process_data
+
+
+def _conteudo(process_id):
+    with open(get_process_file_path(process_id), "rb") as f:
+        return f.read()
+
+
+def test_save_grava_json_indentado_por_padrao(ambiente):
+    save_process_data("P", {"AUTOR": "Autor", "anexos": []})
+    assert b"\n" in _conteudo("P")
+
+
+def test_modo_compacto_e_opcional(ambiente, monkeypatch):
+    save_process_data("P", {"AUTOR": "Autor", "anexos": []}, compact=True)
+    assert b"\n" not in _conteudo("P")
+
+    monkeypatch.setattr(data_handler, "SAVE_COMPACT", True)
+    save_process_data("Q", {"AUTOR": "Autor"})
+    assert b"\n" not in _conteudo("Q")
+    assert load_process_data("Q") == {"AUTOR": "Autor"}
+
+
+def test_load_nao_perde_o_journal_compactado_durante_a_leitura(ambiente, monkeypatch):
+    save_process_data("P", {"AUTOR": "Autor", "conclusao_final": ""})
+    data_handler.patch_process_data("P", {"conclusao_final": "Autêntica"})
+
+    read_journal = data_handler._read_journal
+    compactacoes = []
+
+    def compacta_no_meio(process_id):
+        # Outra sessão compacta o journal depois que o JSON já foi lido
+        if not compactacoes:
+            thread = threading.Thread(target=data_handler.compact_process_journal, args=(process_id,))
+            compactacoes.append(thread)
+            thread.start()
+            thread.join(timeout=0.2)
+        return read_journal(process_id)
+
+    monkeypatch.setattr(data_handler, "_read_journal", compacta_no_meio)
+    assert load_process_data("P")["conclusao_final"] == "Autêntica"
+
+    monkeypatch.setattr(data_handler, "_read_journal", read_journal)
+    for thread in compactacoes:
+        thread.join()
+    assert load_process_data("P")["conclusao_final"] == "Autêntica"
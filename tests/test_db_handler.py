@@ -0,0 +1,39 @@
+import sqlite3
+
+import pytest
+
+from src import db_handler
+from src.db_handler import buscar_processos, contar_processos, init_db, inserir_processo, registrar_processo
+
+
+@pytest.mark.parametrize("texto", ["JOSÉ", "josé", "jose", "CONCEIÇÃO", "conceicao", "0001"])
+def test_filtro_ignora_maiusculas_e_acentos(ambiente, texto):
+    init_db()
+    inserir_processo("0001", "José da Conceição", "Banco", "Em andamento")
+    inserir_processo("0002", "Maria", "Loja", "Em andamento")
+
+    assert [linha[0] for linha in buscar_processos(texto=texto)] == ["0001"]
+    assert contar_processos(texto=texto) == 1
+
+
+def test_filtro_acompanha_autor_alterado(ambiente):
+    init_db()
+    registrar_processo("0001", "Maria", "Banco")
+    registrar_processo("0001", autor="ÂNGELA")
+
+    assert contar_processos(texto="angela") == 1
+    assert contar_processos(texto="maria") == 0
+
+
+def test_migracao_preenche_a_busca_dos_processos_existentes(ambiente, monkeypatch):
+    # Banco na versão 4 (antes da coluna 'busca'), com um processo já cadastrado
+    with monkeypatch.context() as m:
+        m.setattr(db_handler, "MIGRACOES", db_handler.MIGRACOES[:4])
+        assert db_handler.migrar() == 4
+    db_handler.fechar_conexoes()
+    with sqlite3.connect(db_handler.DB_PATH) as conn:
+        conn.execute("INSERT INTO processos (id, autor, reu, status, atualizado_em) "
+                     "VALUES ('0001', 'JOÃO', 'Réu', 'Em andamento', '2024-01-01T00:00:00')")
+
+    assert db_handler.migrar() == len(db_handler.MIGRACOES)
+    assert contar_processos(texto="joao") == 1
@@ -0,0 +1,48 @@
+import hashlib
+import os
+from io import BytesIO
+
+from PIL import Image
+
+from src import image_handler
+from src.image_handler import podar_cache_imagens, preparar_imagem_docx
+
+LARGURA_POL = 6.0
+
+
+def _png(cor):
+    buffer = BytesIO()
+    Image.new("RGB", (2000, 1000), cor).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _em_cache(imagem):
+    sha256 = hashlib.sha256(imagem).hexdigest()
+    return image_handler._cache_path(sha256, int(LARGURA_POL * image_handler.DPI_PADRAO))
+
+
+def _arquivos_cache():
+    return [os.path.join(pasta, nome) for pasta, _, nomes in os.walk(image_handler.IMAGE_CACHE_DIR) for nome in nomes]
+
+
+def test_poda_descarta_as_imagens_usadas_ha_mais_tempo(ambiente):
+    vermelha, verde, azul = imagens = [_png(cor) for cor in ("red", "green", "blue")]
+    for i, imagem in enumerate(imagens):
+        preparar_imagem_docx(imagem, LARGURA_POL)
+        os.utime(_em_cache(imagem), (1000 + i, 1000 + i))
+
+    # Ler do cache renova o uso da vermelha, a mais antiga
+    preparar_imagem_docx(vermelha, LARGURA_POL)
+    total = sum(os.path.getsize(caminho) for caminho in _arquivos_cache())
+
+    assert podar_cache_imagens(max_bytes=total - 1) == 1
+    assert not os.path.exists(_em_cache(verde))
+    assert os.path.exists(_em_cache(vermelha)) and os.path.exists(_em_cache(azul))
+
+
+def test_gravacao_no_cache_poda_acima_do_limite(ambiente, monkeypatch):
+    monkeypatch.setattr(image_handler, "IMAGE_CACHE_MAX_BYTES", 0)
+
+    preparar_imagem_docx(_png("red"), LARGURA_POL)
+
+    assert _arquivos_cache() == []
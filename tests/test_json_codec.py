@@ -0,0 +1,71 @@
+import datetime
+import importlib.util
+import json
+
+import pytest
+
+from src.data_handler import JSON_CODECS, _sem_bytes, decode_json, encode_json
+
+DISPONIVEIS = [c for c in JSON_CODECS if c == "json" or importlib.util.find_spec(c) is not None]
+
+
+def _estado():
+    """Estado como a página o entrega: sets, datas, bytes de uploads e objetos pesados."""
+    return {
+        "AUTOR": "Maria José da Conceição",
+        "DATA_LAUDO": datetime.date(2024, 5, 17),
+        "atualizado_em": datetime.datetime(2024, 5, 17, 14, 30, 5),
+        "etapas_concluidas": {1, 2, 3},
+        "anexos": [
+            {"id": "a1", "bytes": b"\x89PNG...", "bytes_ref": "ab" * 32},
+            {"id": "a2", "bytes": bytearray(b"gif"), "file_obj": object()},
+        ],
+        "saved_analyses": {"q1": {"eog": {"CALIBRE": "ADEQUADO"}, "imagem_analise_bytes": memoryview(b"x")}},
+        "LISTA_QS_AUTOR": [{"id": "qa", "texto": "1. Pergunta?", "referencias": ("q1",)}],
+    }
+
+
+ESPERADO = {
+    "AUTOR": "Maria José da Conceição",
+    "DATA_LAUDO": "2024-05-17",
+    "atualizado_em": "2024-05-17T14:30:05",
+    "etapas_concluidas": [1, 2, 3],
+    "anexos": [
+        {"id": "a1", "bytes": None, "bytes_ref": "ab" * 32},
+        {"id": "a2", "bytes": None, "file_obj": None},
+    ],
+    "saved_analyses": {"q1": {"eog": {"CALIBRE": "ADEQUADO"}, "imagem_analise_bytes": None}},
+    "LISTA_QS_AUTOR": [{"id": "qa", "texto": "1. Pergunta?", "referencias": ["q1"]}],
+}
+
+
+@pytest.mark.parametrize("codec", DISPONIVEIS)
+def test_codecs_gravam_o_mesmo_documento(codec):
+    conteudo = encode_json(_estado(), codec=codec)
+
+    assert json.loads(conteudo) == ESPERADO
+    assert conteudo == encode_json(_estado(), codec="json")
+    assert decode_json(conteudo, codec=codec) == ESPERADO
+
+
+@pytest.mark.parametrize("codec", DISPONIVEIS)
+def test_codecs_indentados_gravam_os_mesmos_dados(codec):
+    assert json.loads(encode_json(_estado(), compact=False, codec=codec)) == ESPERADO
+
+
+@pytest.mark.parametrize("codec", DISPONIVEIS)
+def test_json_invalido_levanta_value_error(codec):
+    with pytest.raises(ValueError):
+        decode_json(b"{", codec=codec)
+
+
+def test_sem_bytes_copia_so_o_caminho_ate_os_bytes():
+    estado = _estado()
+    limpo = _sem_bytes(estado)
+
+    assert limpo["anexos"][0]["bytes"] is None
+    assert estado["anexos"][0]["bytes"] == b"\x89PNG..."
+    assert limpo["LISTA_QS_AUTOR"] is estado["LISTA_QS_AUTOR"]
+
+    sem_bytes = {"a": [{"b": 1}], "c": "texto"}
+    assert _sem_bytes(sem_bytes) is sem_bytes
@@ -0,0 +1,179 @@
+import re
+from datetime import date
+
+import pytest
+
+from src.data_handler import decode_json, encode_json
+from src.process_model import (
+    decode_processo,
+    encode_processo,
+    processo_de_dict,
+    processo_para_dict,
+)
+
+TEXTO = "Assinatura questionada com traçado hesitante e retoques na zona de ataque."
+EOG = {"HABILIDADE_VELOCIDADE": "ADEQUADO", "CALIBRE": "DIVERGENTE"}
+
+
+def _documento():
+    """Documento como a página grava (chaves canônicas), com chaves que o modelo não conhece."""
+    return {
+        "NUMERO_PROCESSO": "0001234-56.2023.8.26.0001",
+        "AUTOR": "Maria José da Conceição",
+        "REU": "Banco Exemplo S.A.",
+        "status": "Em andamento",
+        "atualizado_em": "2024-05-17T14:30:05",
+        "DATA_LAUDO": "2024-05-17",
+        "etapa_atual": 7,
+        "etapas_concluidas": [1, 2, 3, 4, 5, 6],
+        "questionados_list": [
+            {"id": "q1", "TIPO_DOCUMENTO": "Contrato", "FLS_DOCUMENTOS": "fls. 12",
+             "DESCRICAO_IMAGEM": TEXTO, "imagem_bytes_ref": "a" * 64},
+        ],
+        "padroes_list": [
+            {"id": "p1", "TIPO_DOCUMENTO": "Procuração", "NUMEROS": "3",
+             "DATA_DOCUMENTO": "2020-01-02", "DESCRICAO_IMAGEM": "", "colhido_em_cartorio": True},
+        ],
+        "saved_analyses": {
+            "q1": {"id": "an1", "questionado_id": "q1", "conclusao_status": "Autêntica",
+                   "eog": EOG, "confronto_texts": {"p1": TEXTO}, "descricao_analise": TEXTO,
+                   "is_saved": True, "incluir_grafico_laudo": True,
+                   "imagem_analise_bytes_ref": "b" * 64},
+        },
+        "LISTA_QS_AUTOR": [
+            {"id": "a1", "texto": f"1. {TEXTO}", "resposta": TEXTO, "fls": "fls. 3",
+             "referencias": ["q1"], "tem_imagem": True, "imagem_bytes_ref": "c" * 64},
+        ],
+        "LISTA_QS_REU": [
+            {"id": "r1", "texto": "Há montagem?", "resposta": "Não.", "fls": "",
+             "referencias": [], "tem_imagem": False},
+        ],
+        "LISTA_QS_REU_NAO_ENVIADOS": True,
+        "conclusao_final": TEXTO,
+        "anexos": [
+            {"id": "x1", "descricao": "Procuração", "filename": "procuracao.pdf",
+             "mime_type": "application/pdf", "bytes_ref": "d" * 64, "pagina": 4},
+        ],
+        "adendos": [
+            {"id": "grafico_eog_q1", "descricao": "Gráfico EOG", "filename": "grafico_eog_q1.png",
+             "origem": "analise", "id_referencia": "q1", "tipo": "grafico_eog", "eog": EOG},
+        ],
+        "NUM_LAUDAS": 12,
+    }
+
+
+def test_documento_canonico_volta_identico():
+    doc = _documento()
+    processo = processo_de_dict(doc)
+
+    assert processo_para_dict(processo) == doc
+    assert decode_processo(encode_processo(processo)) == processo
+    assert decode_json(encode_processo(processo)) == decode_json(encode_json(doc))
+
+
+def test_chaves_desconhecidas_ficam_em_extras():
+    processo = processo_de_dict(_documento())
+
+    assert processo.extras == {"NUM_LAUDAS": 12}
+    assert processo.padroes[0].extras == {"colhido_em_cartorio": True}
+    assert processo.anexos[0].extras == {"pagina": 4}
+    assert processo.questionados[0].extras is None
+
+
+def test_variantes_legadas_equivalem_ao_documento_canonico():
+    canonico = _documento()
+    legado = {
+        "numero_processo": canonico["NUMERO_PROCESSO"],
+        "AUTORES": canonico["AUTOR"],
+        "REUS": canonico["REU"],
+        "status": "Em andamento",
+        "atualizado_em": "2024-05-17T14:30:05",
+        "DATA_LAUDO": "17/05/2024",
+        "etapa_atual": "7",
+        "etapas_concluidas": [6, 5, 4, 3, 2, 1],
+        "questionados": canonico["questionados_list"],
+        "padroes_confronto": {"PCE": [
+            {"id": "p1", "TIPO_DOCUMENTO_OPCAO": "Outros", "TIPO_DOCUMENTO_CUSTOM": "Procuração",
+             "FLS": "3", "DATA_DOCUMENTO": "2020-01-02", "colhido_em_cartorio": True},
+        ]},
+        "analises_eog_list": [
+            {"id": "an1", "questionado_id": "q1", "conclusao_status": "Autêntica",
+             "eog_elements": EOG, "confronto_texts": {"p1": TEXTO}, "descricao_analise": TEXTO,
+             "is_saved": 1, "incluir_grafico_laudo": True, "imagem_analise_bytes_ref": "b" * 64},
+        ],
+        "quesitos_autora_data": {"list": [
+            {"id": "a1", "pergunta": f"1. {TEXTO}", "resposta_formatada": TEXTO, "fls": "fls. 3",
+             "referencias": ["q1"], "tem_imagem": True, "imagem_bytes_ref": "c" * 64},
+        ]},
+        "quesitos_ré_data": {"nao_enviados": True, "list": [
+            {"id": "r1", "pergunta": "Há montagem?", "resposta": "Não."},
+        ]},
+        "conclusao_final": TEXTO,
+        "anexos": canonico["anexos"],
+        "adendos": [{"id_adendo": "grafico_eog_q1",
+                     **{k: v for k, v in canonico["adendos"][0].items() if k != "id"}}],
+        "NUM_LAUDAS": 12,
+    }
+
+    processo = processo_de_dict(legado)
+
+    assert processo == processo_de_dict(canonico)
+    assert processo.data_laudo == date(2024, 5, 17)
+    # Gravado uma vez, o documento legado passa a ter só as chaves canônicas
+    assert processo_para_dict(processo) == canonico
+
+
+def test_numero_do_documento_prevalece_sobre_o_informado():
+    assert processo_de_dict({"NUMERO_PROCESSO": "1"}, numero="2").numero == "1"
+    assert processo_de_dict({}, numero="2").numero == "2"
+
+
+@pytest.mark.parametrize("campo, valor, caminho", [
+    ("DATA_LAUDO", "amanhã", "DATA_LAUDO"),
+    ("etapa_atual", "sete", "etapa_atual"),
+    ("questionados_list", [{"id": "q1", "FLS_DOCUMENTOS": ["12", "13"]}], "questionados_list[0].FLS_DOCUMENTOS"),
+    ("LISTA_QS_AUTOR", ["texto solto"], "LISTA_QS_AUTOR[0]"),
+])
+def test_valor_incompativel_erro_estrito_com_caminho(campo, valor, caminho):
+    with pytest.raises(ValueError, match=re.escape(caminho)):
+        processo_de_dict({campo: valor})
+
+
+def test_leitura_tolerante_converte_em_vez_de_falhar():
+    processo = processo_de_dict({
+        "NUMERO_PROCESSO": "0001",
+        "DATA_LAUDO": "amanhã",
+        "etapa_atual": "sete",
+        "questionados_list": [{"id": "q1", "FLS_DOCUMENTOS": ["12", "13"]}],
+        "LISTA_QS_AUTOR": ["texto solto", {"id": "a1", "texto": "Q?", "tem_imagem": "sim"}],
+        "anexos": {"id": "x1"},
+    }, estrito=False)
+
+    assert processo.data_laudo is None
+    assert processo.etapa_atual == 1
+    assert processo.questionados[0].fls_documentos == "['12', '13']"
+    assert [q.id for q in processo.quesitos_autor] == ["", "a1"]
+    assert processo.quesitos_autor[1].tem_imagem is True
+    assert processo.anexos == []
+    # A leitura tolerante vale só para a chamada: a seguinte volta a ser estrita
+    with pytest.raises(ValueError):
+        processo_de_dict({"DATA_LAUDO": "amanhã"})
+
+
+class _Mapa(dict):
+    """dict de outro tipo: força a validação completa em vez do caminho rápido."""
+
+
+def _como_mapa(valor):
+    if isinstance(valor, dict):
+        return _Mapa({k: _como_mapa(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return [_como_mapa(v) for v in valor]
+    return valor
+
+
+def test_caminho_rapido_equivale_a_validacao_completa():
+    doc = _documento()
+    doc["LISTA_QS_AUTOR"][0]["imagem_bytes"] = None
+
+    assert processo_de_dict(doc) == processo_de_dict(_como_mapa(doc))
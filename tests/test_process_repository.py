@@ -0,0 +1,117 @@
+import os
+import sqlite3
+
+import pytest
+
+from src import blob_handler, data_handler, process_repository
+from src.db_handler import processo_existe, transacao
+
+
+def _criar(process_id, imagem=b""):
+    """Processo com um anexo no blob store; retorna o hash da imagem."""
+    sha256 = blob_handler.put_blob(imagem or process_id.encode() * 100)
+    process_repository.create_process(
+        process_id, "Autor", "Réu",
+        data={"anexos": [{"id": "a1", "filename": "a.png", "bytes_ref": sha256}]},
+    )
+    return sha256
+
+
+def _intacto(process_id, sha256):
+    return (
+        processo_existe(process_id)
+        and os.path.exists(data_handler.get_process_file_path(process_id))
+        and blob_handler.get_blob(sha256) is not None
+    )
+
+
+def test_delete_processes_apaga_linhas_documentos_e_imagens(ambiente):
+    hashes = {pid: _criar(pid) for pid in ("A", "B", "C")}
+
+    assert process_repository.delete_processes(["A", "B", "A"]) == 2
+
+    for pid in ("A", "B"):
+        assert not processo_existe(pid)
+        assert not os.path.exists(data_handler.get_process_file_path(pid))
+        assert blob_handler.get_blob(hashes[pid]) is None
+    assert _intacto("C", hashes["C"])
+
+
+def test_delete_processes_desfeito_nao_apaga_arquivos(ambiente):
+    hashes = {pid: _criar(pid) for pid in ("A", "B", "C")}
+    # A exclusão de B falha no SQLite depois que a linha de A já foi excluída
+    with sqlite3.connect("processos.db") as conn:
+        conn.execute("""
+            CREATE TRIGGER falha_b BEFORE DELETE ON processos WHEN old.id = 'B'
+            BEGIN SELECT RAISE(ABORT, 'falha ao excluir B'); END
+        """)
+
+    with pytest.raises(sqlite3.DatabaseError):
+        process_repository.delete_processes(["A", "B", "C"])
+
+    for pid, sha256 in hashes.items():
+        assert _intacto(pid, sha256)
+    assert process_repository.load_process("A")["anexos"][0]["bytes_ref"] == hashes["A"]
+
+
+def test_delete_processes_falha_ao_apagar_arquivos(ambiente, monkeypatch):
+    hashes = {pid: _criar(pid) for pid in ("A", "B", "C")}
+    delete_process = data_handler.delete_process
+
+    def falha_em_b(process_id):
+        if process_id == "B":
+            raise OSError("falha ao apagar B.json")
+        return delete_process(process_id)
+
+    monkeypatch.setattr(data_handler, "delete_process", falha_em_b)
+
+    # Os arquivos só são apagados depois do commit; a falha em B não impede os demais
+    with pytest.raises(OSError):
+        process_repository.delete_processes(["A", "B", "C"])
+
+    for pid in ("A", "B", "C"):
+        assert not processo_existe(pid)
+    for pid in ("A", "C"):
+        assert not os.path.exists(data_handler.get_process_file_path(pid))
+        assert blob_handler.get_blob(hashes[pid]) is None
+    assert os.path.exists(data_handler.get_process_file_path("B"))
+    assert blob_handler.get_blob(hashes["B"]) is not None
+
+
+def test_delete_process_em_transacao_externa_desfeita(ambiente):
+    sha256 = _criar("A")
+
+    with pytest.raises(RuntimeError):
+        with transacao():
+            process_repository.delete_process("A")
+            # Ainda dentro da transação externa: nada foi apagado do disco
+            assert os.path.exists(data_handler.get_process_file_path("A"))
+            raise RuntimeError("desfaz")
+
+    assert _intacto("A", sha256)
+
+
+def test_delete_process_em_transacao_externa_confirmada(ambiente):
+    sha256 = _criar("A")
+
+    with transacao():
+        process_repository.delete_process("A")
+        assert os.path.exists(data_handler.get_process_file_path("A"))
+
+    assert not processo_existe("A")
+    assert not os.path.exists(data_handler.get_process_file_path("A"))
+    assert blob_handler.get_blob(sha256) is None
+
+
+def test_save_mantem_atualizado_em_do_processo(ambiente):
+    process_repository.create_process("0001", "Autor", "Réu")
+    process_repository.update_status("0001", "Arquivado")
+    with transacao() as conn:
+        conn.execute("UPDATE processos SET atualizado_em = '2020-01-02T03:04:05' WHERE id = '0001'")
+
+    process_repository.save_process("0001", {"AUTOR": "Autor", "REU": "Réu"})
+    process_repository.patch_process("0001", {"etapa_atual": 3})
+
+    with transacao() as conn:
+        linha = conn.execute("SELECT status, atualizado_em FROM processos WHERE id = '0001'").fetchone()
+    assert tuple(linha) == ("Arquivado", "2020-01-02T03:04:05")
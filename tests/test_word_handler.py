@@ -0,0 +1,71 @@
+from io import BytesIO
+
+from docx import Document
+
+from src.chart_handler import radar_eog
+from src.image_handler import preparar_imagem_docx
+from src.process_model import processo_de_dict
+from src.word_handler import CAMINHO_MODELO_PADRAO, LARGURA_IMAGEM_POL, gerar_laudo, generate_report_from_template
+
+EOG = {
+    "HABILIDADE_VELOCIDADE": "ADEQUADO",
+    "ESPONTANEIDADE_DINAMISMO": "LIMITADO",
+    "CALIBRE": "DIVERGENTE",
+    "ALINHAMENTO_GRAFICO": "ADEQUADO",
+    "ATAQUES_REMATES": "PENDENTE",
+}
+
+
+def _texto(docx_bytes):
+    return "\n".join(p.text for p in Document(BytesIO(docx_bytes)).paragraphs)
+
+
+def _imagens(docx_bytes):
+    doc = Document(BytesIO(docx_bytes))
+    return [parte.blob for parte in doc.part.package.parts if parte.content_type.startswith("image/")]
+
+
+def test_adendo_grafico_eog_insere_o_radar_da_pagina(ambiente):
+    processo = processo_de_dict({
+        "NUMERO_PROCESSO": "0001",
+        "AUTOR": "Autor",
+        "REU": "Réu",
+        "saved_analyses": {"q1": {"eog": EOG, "incluir_grafico_laudo": True}},
+        "adendos": [{
+            "id": "grafico_eog_q1", "tipo": "grafico_eog", "origem": "analise",
+            "id_referencia": "q1", "descricao": "Gráfico EOG", "filename": "grafico_eog_q1.png",
+            "eog": EOG,
+        }],
+    })
+    assert processo.analises["q1"].incluir_grafico
+
+    imagens = _imagens(generate_report_from_template(processo))
+
+    assert preparar_imagem_docx(radar_eog(EOG, "png"), LARGURA_IMAGEM_POL) in imagens
+
+
+def test_processo_e_dict_geram_o_mesmo_laudo(ambiente):
+    dados = {
+        "NUMERO_PROCESSO": "0001", "AUTOR": "Autor", "REU": "Réu", "DATA_LAUDO": "2024-05-17",
+        "questionados_list": [{"id": "q1", "TIPO_DOCUMENTO": "Contrato", "FLS_DOCUMENTOS": "fls. 12"}],
+        "conclusao_final": "Assinatura autêntica.",
+    }
+
+    texto = _texto(generate_report_from_template(processo_de_dict(dados)))
+
+    assert texto == _texto(generate_report_from_template(dados))
+    assert "Processo nº: 0001" in texto and "17/05/2024" in texto
+
+
+def test_dict_com_campo_de_tipo_inesperado_ainda_gera_o_laudo(ambiente):
+    dados = {
+        "NUMERO_PROCESSO": "0001", "AUTOR": "Autor", "REU": "Réu",
+        "DATA_LAUDO": "amanhã", "etapa_atual": "sete",
+        "questionados_list": [{"id": "q1", "TIPO_DOCUMENTO": "Contrato", "FLS_DOCUMENTOS": ["12", "13"]}],
+    }
+    buffer = BytesIO()
+
+    gerar_laudo(CAMINHO_MODELO_PADRAO, buffer, dados, [], [])
+
+    texto = _texto(buffer.getvalue())
+    assert "Processo nº: 0001" in texto and "amanhã" in texto